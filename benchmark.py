@@ -0,0 +1,388 @@
+# Description: Benchmarks for the HashMap implementations.
+#           run_suite() runs insert, read, delete, mixed and find_mode workloads over
+#           uniform, Zipfian, sequential and anagram keys for each HashMap variant and
+#           for dict, reporting ops/sec, p50/p99 latency and peak memory relative to dict.
+#           Results can be saved as JSON and compared with a run from another commit.
+#           bench_batch() compares the batch APIs (put_many(), get_many(),
+#           contains_many(), remove_many()) against the same work done
+#           with one call per key.
+
+
+import argparse
+import itertools
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import time
+import tracemalloc
+
+import hash_map_oa
+import hash_map_sc
+import hash_map_swiss
+from ds import DynamicArray, hash_function_1, hash_function_2
+from hash_functions import HASH_FUNCTIONS
+
+# Operation codes of a workload
+_PUT, _GET, _REMOVE, _COUNT = range(4)
+
+# Workload name: (whether the map is filled with the key set first,
+# share of each operation)
+WORKLOADS = {
+    'insert': (False, {_PUT: 1.0}),
+    'read': (True, {_GET: 0.9, _PUT: 0.1}),
+    'delete': (True, {_REMOVE: 0.9, _PUT: 0.1}),
+    'mixed': (True, {_GET: 0.5, _PUT: 0.3, _REMOVE: 0.2}),
+    # The counting pass of find_mode(): contains_key(), then get() and put()
+    'find_mode': (False, {_COUNT: 1.0}),
+}
+
+DISTRIBUTIONS = ('uniform', 'zipf', 'sequential', 'anagrams')
+
+# Exponent of the Zipfian distribution; about 1 matches word frequencies
+_ZIPF_EXPONENT = 1.1
+
+# Hash functions that can be chosen by name
+FUNCTIONS = dict(HASH_FUNCTIONS, hash_function_1=hash_function_1,
+                 hash_function_2=hash_function_2)
+
+
+class DictMap:
+    """
+    dict behind the HashMap method names, so that it runs the workloads with
+    the same per-operation call overhead as the HashMaps
+    """
+
+    __slots__ = ('_data',)
+
+    def __init__(self) -> None:
+        """Initialize an empty dict."""
+        self._data = {}
+
+    def put(self, key, value) -> None:
+        """Set key to value."""
+        self._data[key] = value
+
+    def get(self, key):
+        """Return the value of key, or None."""
+        return self._data.get(key)
+
+    def contains_key(self, key) -> bool:
+        """Return True if key is present."""
+        return key in self._data
+
+    def remove(self, key) -> None:
+        """Remove key if it is present."""
+        self._data.pop(key, None)
+
+    def get_size(self) -> int:
+        """Return the number of keys."""
+        return len(self._data)
+
+
+def map_factories(function: callable) -> dict:
+    """
+    Returns a name -> factory dict of every HashMap variant using function,
+    plus dict
+    """
+    return {
+        'SC': lambda: hash_map_sc.HashMap(11, function),
+        'SC pow2': lambda: hash_map_sc.HashMap(11, function, power_of_two=True),
+        'OA': lambda: hash_map_oa.HashMap(11, function),
+        'OA arrays': lambda: hash_map_oa.HashMap(11, function, storage="arrays"),
+        'OA triangular': lambda: hash_map_oa.HashMap(11, function, probing="triangular"),
+        'OA robin hood': lambda: hash_map_oa.HashMap(11, function, probing="robin_hood"),
+        'OA cuckoo': lambda: hash_map_oa.HashMap(11, function, probing="cuckoo"),
+        'Swiss': lambda: hash_map_swiss.HashMap(11, function),
+        'dict': DictMap,
+    }
+
+
+def key_set(distribution: str, n: int) -> list:
+    """
+    Returns n distinct keys for distribution. Anagram keys are permutations
+    of one string, so hash functions that ignore character order, such as
+    hash_function_1, give them all the same hash.
+    """
+    if distribution == 'anagrams':
+        letters = 'abcdefghijkl'
+        return [''.join(p) for p in itertools.islice(itertools.permutations(letters), n)]
+    return ['key' + str(i) for i in range(n)]
+
+
+def draw_keys(distribution: str, keys: list, count: int, rng: random.Random) -> list:
+    """
+    Returns count keys drawn from keys: in order (sequential), weighted by
+    rank (zipf), or uniformly at random (uniform, anagrams)
+    """
+    if distribution == 'sequential':
+        return [keys[i % len(keys)] for i in range(count)]
+    if distribution == 'zipf':
+        weights = [1 / (rank + 1) ** _ZIPF_EXPONENT for rank in range(len(keys))]
+        return rng.choices(keys, cum_weights=list(itertools.accumulate(weights)), k=count)
+    return [rng.choice(keys) for _ in range(count)]
+
+
+def make_ops(workload: str, distribution: str, n: int, seed: int) -> (list, list):
+    """
+    Returns the keys to fill the map with before timing (empty if the
+    workload starts from an empty map) and n (operation, key) pairs
+    """
+    rng = random.Random(seed)
+    prefill, mix = WORKLOADS[workload]
+    keys = key_set(distribution, n)
+    drawn = draw_keys(distribution, keys, n, rng)
+    codes = rng.choices(list(mix), weights=list(mix.values()), k=n)
+    return (keys if prefill else []), list(zip(codes, drawn))
+
+
+def _run_ops(hash_map, ops: list, latencies: list = None) -> None:
+    """
+    Applies ops to hash_map, appending the time in nanoseconds taken by each
+    operation to latencies if it is given
+    """
+    put, get, contains_key, remove = (hash_map.put, hash_map.get,
+                                      hash_map.contains_key, hash_map.remove)
+    clock = time.perf_counter_ns
+    for code, key in ops:
+        if latencies is not None:
+            start = clock()
+        if code == _GET:
+            get(key)
+        elif code == _PUT:
+            put(key, 1)
+        elif code == _REMOVE:
+            remove(key)
+        elif contains_key(key):
+            put(key, get(key) + 1)
+        else:
+            put(key, 1)
+        if latencies is not None:
+            latencies.append(clock() - start)
+
+
+def _fill(make_map: callable, prefill: list):
+    """
+    Returns a new map holding every key of prefill
+    """
+    hash_map = make_map()
+    for key in prefill:
+        hash_map.put(key, 1)
+    return hash_map
+
+
+def bench_case(make_map: callable, prefill: list, ops: list, repeat: int = 3) -> dict:
+    """
+    Runs ops on maps built by make_map and filled with prefill. Throughput is
+    the best of repeat untimed runs; latencies come from a separate run that
+    times every operation, and peak memory from another run under tracemalloc
+    (filling included, as that is where most of the memory goes).
+    """
+    best = float('inf')
+    for _ in range(repeat):
+        hash_map = _fill(make_map, prefill)
+        start = time.perf_counter()
+        _run_ops(hash_map, ops)
+        best = min(best, time.perf_counter() - start)
+
+    latencies = []
+    _run_ops(_fill(make_map, prefill), ops, latencies)
+    latencies.sort()
+
+    tracemalloc.start()
+    hash_map = _fill(make_map, prefill)
+    _run_ops(hash_map, ops)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    return {
+        'ops_per_sec': len(ops) / best if best else float('inf'),
+        'p50_ns': latencies[len(latencies) // 2] if latencies else 0,
+        'p99_ns': latencies[len(latencies) * 99 // 100] if latencies else 0,
+        'peak_bytes': peak,
+        'final_size': hash_map.get_size(),
+    }
+
+
+def run_suite(maps=None, workloads=None, distributions=None, sizes=(1000, 10000),
+              function: str = 'builtin', seed: int = 0, repeat: int = 3) -> list:
+    """
+    Runs every combination of map, workload, distribution and size and
+    prints one row per result. Returns the results as a list of dicts; each
+    also holds its throughput and peak memory relative to dict.
+    """
+    factories = map_factories(FUNCTIONS[function])
+    maps = list(maps or factories)
+    if 'dict' not in maps:
+        maps.append('dict')
+
+    results = []
+    print(f"{'map':<14} {'workload':<10} {'keys':<10} {'n':>7} {'ops/s':>11} "
+          f"{'p50 ns':>8} {'p99 ns':>8} {'peak KB':>9} {'vs dict':>8}")
+    for workload in workloads or WORKLOADS:
+        for distribution in distributions or DISTRIBUTIONS:
+            for n in sizes:
+                prefill, ops = make_ops(workload, distribution, n, seed)
+                rows = {name: bench_case(factories[name], prefill, ops, repeat) for name in maps}
+                baseline = rows['dict']
+                for name, row in rows.items():
+                    row.update(map=name, workload=workload, distribution=distribution,
+                               n=n, function=function,
+                               speed_vs_dict=row['ops_per_sec'] / baseline['ops_per_sec'],
+                               memory_vs_dict=row['peak_bytes'] / max(baseline['peak_bytes'], 1))
+                    results.append(row)
+                    print(f"{name:<14} {workload:<10} {distribution:<10} {n:>7} "
+                          f"{row['ops_per_sec']:>11,.0f} {row['p50_ns']:>8} {row['p99_ns']:>8} "
+                          f"{row['peak_bytes'] / 1024:>9.1f} {row['speed_vs_dict']:>7.3f}x")
+    return results
+
+
+def _git_commit() -> str:
+    """
+    Returns the git commit of the checkout holding this file, or None
+    outside a git checkout, whatever the current directory
+    """
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+                              text=True, check=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def save_results(results: list, path: str, **settings) -> None:
+    """
+    Writes results to path as JSON, along with the commit, Python version
+    and settings they were produced with
+    """
+    document = {
+        'commit': _git_commit(),
+        'python': sys.version.split()[0],
+        'platform': platform.platform(),
+        # str and bytes hashes, and so builtin-hash results, depend on it
+        'pythonhashseed': os.environ.get('PYTHONHASHSEED'),
+        'time': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'settings': settings,
+        'results': results,
+    }
+    with open(path, 'w') as file:
+        json.dump(document, file, indent=2)
+
+
+def compare_results(old_path: str, results: list, threshold: float = 0.1) -> None:
+    """
+    Prints each result whose throughput or peak memory differs by more than
+    threshold (as a fraction) from the matching result saved at old_path
+    """
+    with open(old_path) as file:
+        old = json.load(file)
+
+    def case(row):
+        return row['map'], row['workload'], row['distribution'], row['n'], row['function']
+
+    old_rows = {case(row): row for row in old['results']}
+    print(f"\nCompared with {old_path} (commit {old.get('commit')}):")
+    changed = False
+    for row in results:
+        before = old_rows.get(case(row))
+        if before is None:
+            continue
+        speed = row['ops_per_sec'] / before['ops_per_sec'] - 1
+        memory = row['peak_bytes'] / max(before['peak_bytes'], 1) - 1
+        if abs(speed) > threshold or abs(memory) > threshold:
+            changed = True
+            print(f"  {' / '.join(map(str, case(row)))}: "
+                  f"ops/s {speed:+.1%}, peak memory {memory:+.1%}")
+    if not changed:
+        print(f"  no change beyond {threshold:.0%}")
+
+
+def _timed(fn) -> float:
+    """
+    Return the time in seconds taken by calling fn
+    """
+    start = time.perf_counter()
+    fn()
+    return time.perf_counter() - start
+
+
+def bench_batch(n: int = 100_000, function: callable = hash) -> None:
+    """
+    Prints the time taken by N individual calls and by one batch call for
+    put, get, contains_key and remove on each HashMap variant.
+    """
+    keys = ['key' + str(i) for i in range(n)]
+    pairs = DynamicArray([(key, i) for i, key in enumerate(keys)])
+    key_da = DynamicArray(keys)
+
+    makers = (
+        ('SC', lambda: hash_map_sc.HashMap(11, function)),
+        ('OA', lambda: hash_map_oa.HashMap(11, function)),
+        ('OA arrays', lambda: hash_map_oa.HashMap(11, function, storage="arrays")),
+        ('Swiss', lambda: hash_map_swiss.HashMap(11, function)),
+    )
+
+    print(f"{'map':<10} {'op':<9} {'loop (s)':>9} {'batch (s)':>10} {'speedup':>8}")
+    for name, make in makers:
+        single, batch = make(), make()
+
+        def put_loop():
+            for i, key in enumerate(keys):
+                single.put(key, i)
+
+        def get_loop():
+            for key in keys:
+                single.get(key)
+
+        def contains_loop():
+            for key in keys:
+                single.contains_key(key)
+
+        def remove_loop():
+            for key in keys:
+                single.remove(key)
+
+        rows = (
+            ('put', put_loop, lambda: batch.put_many(pairs)),
+            ('get', get_loop, lambda: batch.get_many(key_da)),
+            ('contains', contains_loop, lambda: batch.contains_many(key_da)),
+            ('remove', remove_loop, lambda: batch.remove_many(key_da)),
+        )
+        for op, loop, bulk in rows:
+            loop_time, batch_time = _timed(loop), _timed(bulk)
+            print(f"{name:<10} {op:<9} {loop_time:>9.3f} {batch_time:>10.3f} "
+                  f"{loop_time / batch_time:>7.2f}x")
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(
+        description="Benchmark the HashMap implementations against dict.")
+    parser.add_argument('--maps', nargs='+', choices=list(map_factories(hash)),
+                        help="map variants to run (default: all)")
+    parser.add_argument('--workloads', nargs='+', choices=list(WORKLOADS))
+    parser.add_argument('--distributions', nargs='+', choices=DISTRIBUTIONS)
+    parser.add_argument('--sizes', nargs='+', type=int, default=[1000, 10000])
+    parser.add_argument('--function', default='builtin', choices=list(FUNCTIONS),
+                        help="hash function for the HashMaps; hash_function_1 on anagram "
+                             "keys is the worst case and very slow for large sizes")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--json', help="save the results to this file")
+    parser.add_argument('--compare', help="compare the results with a JSON file saved earlier")
+    parser.add_argument('--batch', action='store_true', help="run bench_batch() instead")
+    args = parser.parse_args()
+
+    if args.batch:
+        bench_batch()
+    else:
+        results = run_suite(args.maps, args.workloads, args.distributions, args.sizes,
+                            args.function, args.seed, args.repeat)
+        if args.json:
+            save_results(results, args.json, maps=args.maps, workloads=args.workloads,
+                         distributions=args.distributions, sizes=args.sizes,
+                         function=args.function, seed=args.seed, repeat=args.repeat)
+        if args.compare:
+            compare_results(args.compare, results)
@@ -1,7 +1,17 @@
 # Description: Data structures implementation of DynamicArray, LinkedList, and HashEntry.
+#           is_prime() and next_prime() look prime capacities up in a table sieved at import.
+#           StatsMixin gives both HashMaps opt-in operation counters.
+#           Every class declares __slots__, so instances carry no per-instance __dict__;
+#           at millions of nodes and entries that is most of the memory of a HashMap.
 
 # -------------- Used by both HashMaps (SC & OA)  -------------- #
 
+import math
+from array import array
+from bisect import bisect_left
+from itertools import compress
+
+
 class DynamicArrayException(Exception):
     pass
 
@@ -11,25 +21,26 @@ class DynamicArray:
     Class implementing a Dynamic Array
     Supported methods are:
     append, pop, swap, get_at_index, set_at_index, length
+    It can be iterated over, in place, like a list.
     """
 
+    __slots__ = ('_data',)
+
     def __init__(self, arr=None) -> None:
         """Initialize new dynamic array using a list."""
         self._data = arr.copy() if arr else []
 
     def __iter__(self):
         """
-        Disable iterator capability for DynamicArray class
-        This means loops and aggregate functions like
-        those shown below won't work:
+        Return an iterator over the elements, without copying the array,
+        so loops and aggregate functions work directly:
 
-        da = DynamicArray()
-        for value in da:        # will not work
-        min(da)                 # will not work
-        max(da)                 # will not work
-        sort(da)                # will not work
+        da = DynamicArray([3, 1, 2])
+        for value in da:        # 3, 1, 2
+        min(da)                 # 1
+        sorted(da)              # [1, 2, 3]
         """
-        return None
+        return iter(self._data)
 
     def __str__(self) -> str:
         """Override string method to provide more readable output."""
@@ -72,6 +83,230 @@ class DynamicArray:
         return len(self._data)
 
 
+def as_list(items) -> list:
+    """
+    Return the elements of a DynamicArray or any other iterable as a list
+    """
+    if isinstance(items, DynamicArray):
+        return items._data.copy()
+    return list(items)
+
+
+def backing_list(da: DynamicArray) -> list:
+    """
+    Return the list holding the elements of a DynamicArray, without copying,
+    for loops that cannot afford a method call per element. Elements may be
+    read and replaced through it, but it must not be resized.
+    """
+    return da._data
+
+
+def _sieve(limit: int) -> array:
+    """
+    Return every prime below limit, found with the sieve of Eratosthenes
+    """
+    flags = bytearray([1]) * limit
+    flags[0] = flags[1] = 0
+    for factor in range(2, math.isqrt(limit) + 1):
+        if flags[factor]:
+            flags[factor * factor::factor] = bytes(len(range(factor * factor, limit, factor)))
+    return array('L', compress(range(limit), flags))
+
+
+# Every prime below 2^16: capacities in that range are looked up directly,
+# and the table provides the trial divisors for larger ones
+_PRIME_TABLE_LIMIT = 1 << 16
+_PRIMES = _sieve(_PRIME_TABLE_LIMIT)
+
+
+def is_prime(number: int) -> bool:
+    """
+    Return True if number is a prime number
+    """
+    if number < _PRIME_TABLE_LIMIT:
+        index = bisect_left(_PRIMES, number)
+        return index < len(_PRIMES) and _PRIMES[index] == number
+
+    limit = math.isqrt(number)
+    for factor in _PRIMES:
+        if factor > limit:
+            return True
+        if number % factor == 0:
+            return False
+
+    # Only numbers of 2^32 and above get past the table
+    for factor in range(_PRIME_TABLE_LIMIT + 1, limit + 1, 2):
+        if number % factor == 0:
+            return False
+    return True
+
+
+def next_prime(number: int) -> int:
+    """
+    Return the smallest prime that is at least number
+    """
+    if number <= _PRIMES[-1]:
+        return _PRIMES[bisect_left(_PRIMES, number)]
+
+    number |= 1
+    while not is_prime(number):
+        number += 2
+    return number
+
+
+class StatsMixin:
+    """
+    Opt-in operation counters for the HashMaps. enable_stats() shadows the
+    internal lookup methods and resize_table() with counting versions on the
+    instance, so a map without stats runs the class methods untouched and
+    pays nothing for them. Probe steps (slots inspected, or chain nodes
+    walked) are measured by walking the key's probe sequence a second time
+    with the map's _probe_length(); with stats enabled every operation costs
+    about twice as much.
+    """
+
+    _stats = None
+
+    # Methods replaced by counting versions while stats are enabled
+    _COUNTED_METHODS = ('_get', '_contains', '_put', '_remove', '_find_or_insert',
+                        '_pop', '_upsert', 'resize_table', '_start_migration')
+
+    def enable_stats(self) -> None:
+        """
+        Starts counting operations, from zero if stats were never enabled.
+        """
+        if self._counting():
+            return
+        if self._stats is None:
+            self.reset_stats()
+
+        cls = type(self)
+        get, contains = cls._get.__get__(self), cls._contains.__get__(self)
+        put, remove = cls._put.__get__(self), cls._remove.__get__(self)
+        find_or_insert, pop = cls._find_or_insert.__get__(self), cls._pop.__get__(self)
+        resize_table = cls.resize_table.__get__(self)
+        start_migration = cls._start_migration.__get__(self)
+        probe_length = self._probe_length
+
+        def record(steps: int) -> None:
+            stats = self._stats
+            stats['probe_steps'] += steps
+            if steps > stats['max_probe_length']:
+                stats['max_probe_length'] = steps
+
+        def counted_get(key, hash: int) -> object:
+            self._stats['gets'] += 1
+            record(probe_length(key, hash))
+            value = get(key, hash)
+            self._stats['misses' if value is None else 'hits'] += 1
+            return value
+
+        def counted_contains(key, hash: int) -> bool:
+            self._stats['gets'] += 1
+            record(probe_length(key, hash))
+            found = contains(key, hash)
+            self._stats['hits' if found else 'misses'] += 1
+            return found
+
+        # put() goes through _find_or_insert() and remove() through _pop(),
+        # so only the outermost of the nested calls is counted
+        updating = False
+
+        def counted_update(counter: str, key, hash: int, method: callable, *args) -> object:
+            nonlocal updating
+            if updating:
+                return method(*args)
+            self._stats[counter] += 1
+            record(probe_length(key, hash))
+            updating = True
+            try:
+                return method(*args)
+            finally:
+                updating = False
+
+        def counted_put(key, value: object, hash: int) -> None:
+            counted_update('puts', key, hash, put, key, value, hash)
+
+        def counted_find_or_insert(key, hash: int, default: object = None) -> (object, bool):
+            return counted_update('puts', key, hash, find_or_insert, key, hash, default)
+
+        def counted_remove(key, hash: int) -> None:
+            counted_update('removes', key, hash, remove, key, hash)
+
+        def counted_pop(key, hash: int, default: object = None) -> object:
+            return counted_update('removes', key, hash, pop, key, hash, default)
+
+        def counted_resize(resize: callable) -> callable:
+            def counted(new_capacity: int) -> None:
+                # A resize that returns early leaves the marker in place
+                last_resize_time, self._last_resize_time = self._last_resize_time, None
+                resize(new_capacity)
+                if self._last_resize_time is None:
+                    self._last_resize_time = last_resize_time
+                    return
+                self._stats['resizes'] += 1
+                self._stats['resize_time'] += self._last_resize_time
+            return counted
+
+        self._get, self._contains = counted_get, counted_contains
+        self._put, self._remove = counted_put, counted_remove
+        self._find_or_insert, self._pop = counted_find_or_insert, counted_pop
+
+        # The thread-safe map updates keys in place through _upsert() instead
+        if hasattr(cls, '_upsert'):
+            upsert = cls._upsert.__get__(self)
+
+            def counted_upsert(key, hash: int, function: callable, default: object) -> object:
+                return counted_update('puts', key, hash, upsert, key, hash, function, default)
+
+            self._upsert = counted_upsert
+        self.resize_table = counted_resize(resize_table)
+        self._start_migration = counted_resize(start_migration)
+
+    def _counting(self) -> bool:
+        """
+        Returns True while stats are enabled
+        """
+        return '_put' in self.__dict__
+
+    def disable_stats(self) -> None:
+        """
+        Stops counting operations; the counts so far stay available.
+        """
+        for name in self._COUNTED_METHODS:
+            self.__dict__.pop(name, None)
+
+    def reset_stats(self) -> None:
+        """
+        Sets every count back to zero.
+        """
+        self._stats = {
+            'gets': 0,
+            'hits': 0,
+            'misses': 0,
+            'puts': 0,
+            'removes': 0,
+            'resizes': 0,
+            'resize_time': 0.0,
+            'probe_steps': 0,
+            'max_probe_length': 0,
+        }
+
+    def get_stats(self) -> dict:
+        """
+        Returns the counts as a dict, along with whether stats are enabled and
+        the current size and capacity. gets covers get() and contains_key()
+        (get() of a key holding None counts as a miss), puts covers put(),
+        upsert(), setdefault() and increment(), and removes covers remove()
+        and pop().
+        """
+        stats = dict(self._stats) if self._stats is not None else {}
+        stats['enabled'] = self._counting()
+        stats['size'] = self._size
+        stats['capacity'] = self._capacity
+        return stats
+
+
 def hash_function_1(key: str) -> int:
     """Sample Hash function #1 to be used with HashMap implementation"""
     hash = 0
@@ -97,11 +332,15 @@ class SLNode:
     Singly Linked List node for use in a hash map
     """
 
-    def __init__(self, key: str, value: object, next: "SLNode" = None) -> None:
-        """Initialize node given a key and value."""
+    __slots__ = ('key', 'value', 'next', 'hash')
+
+    def __init__(self, key: str, value: object, next: "SLNode" = None,
+                 hash: int = None) -> None:
+        """Initialize node given a key, value and the key's cached hash."""
         self.key = key
         self.value = value
         self.next = next
+        self.hash = hash
 
     def __str__(self) -> str:
         """Override string method to provide more readable output."""
@@ -113,6 +352,8 @@ class LinkedListIterator:
     Separate iterator class for LinkedList
     """
 
+    __slots__ = ('_node',)
+
     def __init__(self, current_node: SLNode) -> None:
         """Initialize the iterator with a node."""
         self._node = current_node
@@ -138,6 +379,8 @@ class LinkedList:
     Supported methods are: insert, remove, contains, length, iterator
     """
 
+    __slots__ = ('_head', '_size')
+
     def __init__(self) -> None:
         """
         Initialize new linked list;
@@ -162,35 +405,56 @@ class LinkedList:
         """Return an iterator for the list, starting at the head."""
         return LinkedListIterator(self._head)
 
-    def insert(self, key: str, value: object) -> None:
-        """Insert new node at front of the list."""
-        self._head = SLNode(key, value, self._head)
+    def insert(self, key: str, value: object, hash: int = None) -> SLNode:
+        """Insert new node at front of the list and return it."""
+        self._head = SLNode(key, value, self._head, hash)
         self._size += 1
+        return self._head
 
-    def remove(self, key: str) -> bool:
+    def insert_node(self, node: SLNode) -> None:
+        """Link an existing node in at the front of the list."""
+        node.next = self._head
+        self._head = node
+        self._size += 1
+
+    def remove(self, key: str, hash: int = None) -> bool:
         """
         Remove first node with matching key.
+        If hash is given, nodes with a different cached hash are skipped
+        without comparing keys.
         Return True if removal was successful, False otherwise.
         """
+        return self.pop(key, hash) is not None
+
+    def pop(self, key: str, hash: int = None) -> SLNode:
+        """
+        Remove first node with matching key and return it, or None if no match.
+        If hash is given, nodes with a different cached hash are skipped
+        without comparing keys.
+        """
         previous, node = None, self._head
         while node:
 
-            if node.key == key:
+            if (hash is None or node.hash == hash) and node.key == key:
                 if previous:
                     previous.next = node.next
                 else:
                     self._head = node.next
                 self._size -= 1
-                return True
+                return node
 
             previous, node = node, node.next
-        return False
+        return None
 
-    def contains(self, key: str) -> SLNode:
-        """Return node with matching key, or None if no match"""
+    def contains(self, key: str, hash: int = None) -> SLNode:
+        """
+        Return node with matching key, or None if no match.
+        If hash is given, nodes with a different cached hash are skipped
+        without comparing keys.
+        """
         node = self._head
         while node:
-            if node.key == key:
+            if (hash is None or node.hash == hash) and node.key == key:
                 return node
             node = node.next
         return node
@@ -204,11 +468,16 @@ class LinkedList:
 
 class HashEntry:
 
-    def __init__(self, key: str, value: object) -> None:
+    __slots__ = ('key', 'value', 'hash', 'is_tombstone')
+
+    def __init__(self, key: str, value: object, hash: int = None) -> None:
         """Initialize an entry for use in a hash map."""
         self.key = key
         self.value = value
 
+        # Cached result of the hash function for key
+        self.hash = hash
+
         # Set this value to True when you "delete" a HashEntry
         self.is_tombstone = False
 
@@ -0,0 +1,361 @@
+# Description: Frequency counting over streams. FrequencyCounter counts any iterable, one chunk
+#           at a time, with a single hash table update per element, and tracks the mode as
+#           it goes; it also gives the exact top k. CountMinSketch and SpaceSaving use a
+#           fixed amount of memory, however long the stream, in exchange for approximate
+#           counts. find_mode() and top_k() are streaming versions of hash_map_sc.find_mode().
+
+
+import heapq
+import math
+import secrets
+from array import array
+from itertools import count as counter
+
+import hash_map_sc
+from ds import DynamicArray, as_list, hash_function_1
+from hash_functions import builtin_hash, fmix64
+
+
+class FrequencyCounter:
+    """
+    Exact frequency counts kept in a separate chaining HashMap. Each element
+    costs one hash and one chain walk: its count is incremented in place
+    with the map's increment(). The highest count and the keys holding it
+    are updated as counts grow, so mode() never scans the table.
+    """
+
+    def __init__(self, capacity: int = 11, function: callable = hash_function_1) -> None:
+        """
+        Initialize an empty counter whose HashMap starts at capacity and
+        hashes keys with function.
+        """
+        self._counts = hash_map_sc.HashMap(capacity, function)
+        self._total = 0
+        self._modes = []
+        self._max_freq = 0
+
+    def update(self, items) -> None:
+        """
+        Counts every element of items, which can be a DynamicArray, any
+        iterable or a generator; elements are consumed one at a time, so a
+        stream can be counted in chunks by calling update() once per chunk.
+        """
+        function = self._counts.get_hash_function()
+        increment = self._counts._increment
+        modes, max_freq, total = self._modes, self._max_freq, self._total
+
+        for item in items:
+            freq = increment(item, 1, function(item))
+            total += 1
+            if freq > max_freq:
+                modes, max_freq = [item], freq
+            elif freq == max_freq:
+                modes.append(item)
+
+        self._modes, self._max_freq, self._total = modes, max_freq, total
+
+    def add(self, item, count: int = 1) -> None:
+        """
+        Adds count occurrences of item
+        """
+        if count < 1:
+            raise ValueError("count must be positive")
+        freq = self._counts.increment(item, count)
+        self._total += count
+        if freq > self._max_freq:
+            self._modes, self._max_freq = [item], freq
+        elif freq == self._max_freq:
+            self._modes.append(item)
+
+    def merge(self, other: "FrequencyCounter") -> None:
+        """
+        Adds the counts of other, for example one that counted another part
+        of the stream in a different thread or process.
+        """
+        # Copied first, since other may be this counter
+        for item, count in other._counts.get_keys_and_values():
+            self.add(item, count)
+
+    def count(self, item) -> int:
+        """
+        Returns the number of occurrences of item counted so far
+        """
+        return self._counts.get(item) or 0
+
+    def total(self) -> int:
+        """
+        Returns the number of elements counted so far
+        """
+        return self._total
+
+    def get_size(self) -> int:
+        """
+        Returns the number of distinct elements counted so far
+        """
+        return self._counts.get_size()
+
+    def mode(self) -> (DynamicArray, int):
+        """
+        Returns a tuple containing a dynamic array of the most frequent
+        elements, in the order they reached that frequency, and the frequency.
+        """
+        return DynamicArray(self._modes), self._max_freq
+
+    def most_common(self, k: int) -> DynamicArray:
+        """
+        Returns a dynamic array of the k most frequent (element, count) tuples,
+        most frequent first, selected with a size k heap.
+        """
+        return DynamicArray(heapq.nlargest(k, self._counts.items(), key=lambda pair: pair[1]))
+
+
+class CountMinSketch:
+    """
+    Approximate counts in depth rows of width counters. An element adds its
+    count to one counter per row, picked by mixing its hash with the row's
+    seed, and its estimate is the smallest of those counters. Estimates
+    never undercount; with probability 1 - e^-depth they overcount by at
+    most e / width times the total count.
+    """
+
+    def __init__(self, width: int = 2048, depth: int = 4,
+                 function: callable = builtin_hash) -> None:
+        """
+        Initialize an empty sketch of depth rows of width counters
+        """
+        if width < 1 or depth < 1:
+            raise ValueError("width and depth must be positive")
+        self._width = width
+        self._function = function
+        self._seeds = [secrets.randbits(64) for _ in range(depth)]
+        self._rows = [array('Q', bytes(8 * width)) for _ in range(depth)]
+        self._total = 0
+
+    @classmethod
+    def for_error(cls, epsilon: float, delta: float,
+                  function: callable = builtin_hash) -> "CountMinSketch":
+        """
+        Returns a sketch whose estimates overcount by at most epsilon times
+        the total count with probability 1 - delta
+        """
+        return cls(math.ceil(math.e / epsilon), math.ceil(math.log(1 / delta)), function)
+
+    def _indices(self, item) -> list:
+        """
+        Returns the counter index of item in each row
+        """
+        hash = self._function(item)
+        return [fmix64(hash ^ seed) % self._width for seed in self._seeds]
+
+    def add(self, item, count: int = 1) -> None:
+        """
+        Adds count occurrences of item
+        """
+        for row, index in zip(self._rows, self._indices(item)):
+            row[index] += count
+        self._total += count
+
+    def update(self, items) -> None:
+        """
+        Adds one occurrence of every element of items
+        """
+        for item in items:
+            self.add(item)
+
+    def estimate(self, item) -> int:
+        """
+        Returns an estimate, never too low, of the occurrences of item
+        """
+        return min(row[index] for row, index in zip(self._rows, self._indices(item)))
+
+    def total(self) -> int:
+        """
+        Returns the number of elements counted so far
+        """
+        return self._total
+
+    def merge(self, other: "CountMinSketch") -> None:
+        """
+        Adds the counts of other, which must share this sketch's width, seeds
+        and hash function (for example a copy made before counting began)
+        """
+        if other._width != self._width or other._seeds != self._seeds:
+            raise ValueError("sketches must have the same width and seeds")
+        for row, other_row in zip(self._rows, other._rows):
+            for index in range(self._width):
+                row[index] += other_row[index]
+        self._total += other._total
+
+
+class SpaceSaving:
+    """
+    Approximate top-k counts with the Space-Saving algorithm, monitoring at
+    most capacity elements. A new element, once capacity are monitored,
+    replaces the one with the lowest count and inherits that count as its
+    possible overcount (error). Any element occurring more than
+    total / capacity times is guaranteed to be monitored. The lowest count is
+    found with a lazily updated min-heap, rebuilt when stale entries pile up.
+    """
+
+    def __init__(self, capacity: int = 100, function: callable = hash_function_1) -> None:
+        """
+        Initialize an empty summary monitoring up to capacity elements
+        """
+        if capacity < 1:
+            raise ValueError("capacity must be positive")
+        self._capacity = capacity
+        # element -> [count, error, hash]
+        self._counts = hash_map_sc.HashMap(capacity, function)
+        self._heap = []
+        self._sequence = counter()
+        self._total = 0
+
+    def add(self, item, count: int = 1) -> None:
+        """
+        Adds count occurrences of item
+        """
+        counts = self._counts
+        hash = counts.get_hash_function()(item)
+        self._total += count
+
+        node, inserted = counts._find_or_insert(item, hash)
+        if inserted:
+            error = 0
+            if counts.get_size() > self._capacity:
+                victim, error = self._pop_min()
+                counts._remove(victim[0], victim[1])
+            node.value = [error, error, hash]
+        node.value[0] += count
+
+        heapq.heappush(self._heap, (node.value[0], next(self._sequence), item, hash))
+        if len(self._heap) > 4 * self._capacity:
+            self._rebuild_heap()
+
+    def _pop_min(self) -> ((object, int), int):
+        """
+        Removes the heap entry of the monitored element with the lowest count
+        and returns its (element, hash) and count, skipping stale entries
+        """
+        while True:
+            count, _, item, hash = heapq.heappop(self._heap)
+            value = self._counts._get(item, hash)
+            if value is not None and value[0] == count:
+                return (item, hash), count
+
+    def _rebuild_heap(self) -> None:
+        """
+        Replaces the heap with one current entry per monitored element
+        """
+        self._heap = []
+        for item, (count, error, hash) in self._counts.items():
+            self._heap.append((count, next(self._sequence), item, hash))
+        heapq.heapify(self._heap)
+
+    def update(self, items) -> None:
+        """
+        Adds one occurrence of every element of items
+        """
+        for item in items:
+            self.add(item)
+
+    def total(self) -> int:
+        """
+        Returns the number of elements counted so far
+        """
+        return self._total
+
+    def most_common(self, k: int = None) -> DynamicArray:
+        """
+        Returns a dynamic array of (element, count, error) tuples for the k
+        (default: all) monitored elements with the highest counts. The true
+        count of each element lies between count - error and count.
+        """
+        entries = [(item, count, error) for item, (count, error, _) in self._counts.items()]
+        if k is None:
+            k = len(entries)
+        return DynamicArray(heapq.nlargest(k, entries, key=lambda entry: entry[1]))
+
+    def mode(self) -> (DynamicArray, int):
+        """
+        Returns a tuple containing a dynamic array of the monitored elements
+        with the highest count, and that count
+        """
+        entries = as_list(self.most_common())
+        if not entries:
+            return DynamicArray(), 0
+        max_freq = entries[0][1]
+        return DynamicArray([entry[0] for entry in entries if entry[1] == max_freq]), max_freq
+
+
+def find_mode(items, function: callable = hash_function_1) -> (DynamicArray, int):
+    """
+    Returns a tuple containing, in this order, a dynamic array comprising the mode
+    (most occurring) value/s of items, and an integer that represents the highest
+    frequency. items can be any iterable, including a generator.
+    """
+    frequencies = FrequencyCounter(function=function)
+    frequencies.update(items)
+    return frequencies.mode()
+
+
+def top_k(items, k: int, function: callable = hash_function_1) -> DynamicArray:
+    """
+    Returns a dynamic array of the exact k most frequent (element, count)
+    tuples of items, most frequent first
+    """
+    frequencies = FrequencyCounter(function=function)
+    frequencies.update(items)
+    return frequencies.most_common(k)
+
+
+# ------------------- BASIC TESTING ---------------------------------------- #
+
+if __name__ == "__main__":
+
+    import random
+
+    print("\nTest Case - find_mode test 1")
+    print("-----------------------------")
+    test_cases = (
+        ["Arch", "Manjaro", "Manjaro", "Mint", "Mint",
+            "Mint", "Ubuntu", "Ubuntu", "Ubuntu"],
+        ["one", "two", "three", "four", "five"],
+        ["2", "4", "2", "6", "8", "4", "1", "3", "4", "5", "7", "3", "3", "2"],
+    )
+    for case in test_cases:
+        mode, frequency = find_mode(item for item in case)
+        print(f"Input: {case}\nMode : {mode}, Frequency: {frequency}\n")
+
+    print("\nTest Case - FrequencyCounter test 1")
+    print("-----------------------------")
+    frequencies = FrequencyCounter()
+    for chunk in (['a', 'b', 'a'], DynamicArray(['c', 'b']), iter(['b', 'd'])):
+        frequencies.update(chunk)
+    mode, frequency = frequencies.mode()
+    print(mode, frequency, frequencies.count('a'), frequencies.count('z'),
+          frequencies.total(), frequencies.get_size())
+    print(frequencies.most_common(2))
+    other = FrequencyCounter()
+    other.update(['a', 'a', 'e'])
+    frequencies.merge(other)
+    mode, frequency = frequencies.mode()
+    print(mode, frequency, frequencies.total())
+
+    print("\nTest Case - approximate counts test 1")
+    print("-----------------------------")
+    rnd = random.Random(7)
+    stream = [str(int(rnd.paretovariate(1.1))) for _ in range(20000)]
+    exact = FrequencyCounter()
+    exact.update(stream)
+    sketch = CountMinSketch(512, 4)
+    sketch.update(stream)
+    summary = SpaceSaving(20)
+    summary.update(iter(stream))
+
+    result = True
+    for item, count in as_list(exact.most_common(5)):
+        # the sketch never undercounts, and the summary brackets the count
+        result &= count <= sketch.estimate(item) <= count + 2 * sketch.total() // 512
+        result &= any(entry[0] == item and entry[1] - entry[2] <= count <= entry[1]
+                      for entry in as_list(summary.most_common()))
+    print(result, exact.mode()[0][0] == summary.mode()[0][0], sketch.total(), summary.total())
@@ -0,0 +1,202 @@
+# Description: Collision and distribution analysis for hash functions and HashMaps.
+#           analyze_map() reports on a live HashMap (SC or OA) and analyze_function()
+#           on a hash function applied to a sample of keys, so pathological keysets
+#           and poor capacities can be caught before they reach production.
+#           bytes_per_entry() measures the memory a HashMap variant uses per key.
+
+
+import math
+import tracemalloc
+
+from ds import DynamicArray, as_list
+
+
+def histogram(lengths) -> dict:
+    """
+    Returns a dict mapping each length in lengths to how often it occurs
+    """
+    counts = {}
+    for length in as_list(lengths):
+        counts[length] = counts.get(length, 0) + 1
+    return dict(sorted(counts.items()))
+
+
+def chi_squared(counts) -> (float, float):
+    """
+    Returns the chi-squared statistic of the per-bucket key counts against a
+    uniform distribution, and its p-value. A p-value close to 0 means the keys
+    are spread less evenly than a random hash would spread them.
+    The p-value uses the Wilson-Hilferty normal approximation.
+    """
+    counts = as_list(counts)
+    buckets, total = len(counts), sum(counts)
+    if buckets < 2 or total == 0:
+        return 0.0, 1.0
+
+    expected = total / buckets
+    statistic = sum((count - expected) ** 2 for count in counts) / expected
+
+    df = buckets - 1
+    z = ((statistic / df) ** (1 / 3) - (1 - 2 / (9 * df))) / math.sqrt(2 / (9 * df))
+    return statistic, 0.5 * math.erfc(z / math.sqrt(2))
+
+
+def _chain_report(counts: list) -> dict:
+    """
+    Builds the report shared by SC maps and hash function samples from the
+    number of keys in each bucket
+    """
+    size, capacity = sum(counts), len(counts)
+    statistic, p_value = chi_squared(counts)
+
+    # A successful lookup walks to the key's position in its chain
+    total_probes = sum(count * (count + 1) // 2 for count in counts)
+    return {
+        'size': size,
+        'capacity': capacity,
+        'load': size / capacity,
+        'empty_bucket_ratio': counts.count(0) / capacity,
+        'tombstone_ratio': 0.0,
+        'chain_length_histogram': histogram(counts),
+        'max_probe_length': max(counts, default=0),
+        'mean_probe_length': total_probes / size if size else 0.0,
+        'chi_squared': statistic,
+        'chi_squared_p_value': p_value,
+    }
+
+
+def analyze_map(hash_map) -> dict:
+    """
+    Returns a dict describing how evenly the keys of hash_map (a separate
+    chaining or open addressing HashMap) are spread over its table.
+    """
+    capacity = hash_map.get_capacity()
+
+    if hasattr(hash_map, 'chain_lengths'):
+        return _chain_report(as_list(hash_map.chain_lengths()))
+
+    # Open addressing: the uniformity test looks at each key's home slot, or
+    # home group for maps that probe a group at a time, as the map computes
+    # it from the hash the key was placed by
+    width = hash_map._HOME_WIDTH
+    counts = [0] * (capacity // width)
+    for _, _, hash in hash_map._entries():
+        counts[hash_map._home_slot(hash) // width] += 1
+    statistic, p_value = chi_squared(counts)
+
+    probes = as_list(hash_map.probe_lengths())
+    size = len(probes)
+    return {
+        'size': size,
+        'capacity': capacity,
+        'load': size / capacity,
+        'empty_bucket_ratio': hash_map.empty_buckets() / capacity,
+        'tombstone_ratio': hash_map.tombstone_count() / capacity,
+        'probe_length_histogram': histogram(probes),
+        'max_probe_length': max(probes, default=0),
+        'mean_probe_length': sum(probes) / size if size else 0.0,
+        'chi_squared': statistic,
+        'chi_squared_p_value': p_value,
+    }
+
+
+def analyze_function(function: callable, keys, capacity: int = None) -> dict:
+    """
+    Returns a dict describing how function spreads the distinct keys of a
+    sample over capacity buckets (default: one bucket per key), as a
+    separate chaining HashMap of that capacity would store them.
+    distinct_hashes counts full hash values, so it also exposes collisions
+    that no capacity can separate.
+    """
+    keys = set(as_list(keys))
+    hashes = [function(key) for key in keys]
+    if capacity is None:
+        capacity = max(len(hashes), 1)
+
+    counts = [0] * capacity
+    for hash in hashes:
+        counts[hash % capacity] += 1
+
+    report = _chain_report(counts)
+    report['distinct_hashes'] = len(set(hashes))
+    return report
+
+
+def bytes_per_entry(make_map: callable, keys) -> float:
+    """
+    Returns the memory in bytes allocated per key by a HashMap built with
+    make_map() when every key in keys is put with the value None.
+    The keys already exist, so only the map's own table, nodes and entries
+    are counted.
+    """
+    keys = as_list(keys)
+    was_tracing = tracemalloc.is_tracing()
+    if not was_tracing:
+        tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+
+    hash_map = make_map()
+    for key in keys:
+        hash_map.put(key, None)
+    used = tracemalloc.get_traced_memory()[0] - before
+
+    if not was_tracing:
+        tracemalloc.stop()
+    return used / len(keys) if keys else 0.0
+
+
+def format_report(report: dict) -> str:
+    """
+    Returns report as readable text, one statistic per line
+    """
+    out = ''
+    for name, value in report.items():
+        if isinstance(value, float):
+            value = round(value, 4)
+        out += f'{name}: {value}\n'
+    return out
+
+
+# ------------------- BASIC TESTING ---------------------------------------- #
+
+if __name__ == "__main__":
+
+    import hash_map_oa
+    import hash_map_sc
+    from ds import hash_function_1, hash_function_2
+    from hash_functions import builtin_hash
+
+    keys = DynamicArray(['key' + str(i) for i in range(1, 151)])
+
+    print("\nTest Case - analyze_function test 1")
+    print("-------------------")
+    for function in (hash_function_1, hash_function_2, builtin_hash):
+        report = analyze_function(function, keys, 151)
+        print(function.__name__, report['distinct_hashes'],
+              report['max_probe_length'], round(report['empty_bucket_ratio'], 2),
+              report['chi_squared_p_value'] < 0.01)
+
+    print("\nTest Case - analyze_map test 1")
+    print("-------------------")
+    m = hash_map_sc.HashMap(53, hash_function_1)
+    for i in range(150):
+        m.put('key' + str(i), i)
+    print(format_report(analyze_map(m)))
+
+    print("\nTest Case - analyze_map test 2")
+    print("-------------------")
+    m = hash_map_oa.HashMap(53, hash_function_1)
+    for i in range(150):
+        m.put('key' + str(i), i)
+    for i in range(0, 150, 3):
+        m.remove('key' + str(i))
+    print(format_report(analyze_map(m)))
+
+    print("\nTest Case - bytes_per_entry test 1")
+    print("-------------------")
+    keys = ['key' + str(i) for i in range(10000)]
+    for name, make_map in (
+            ('SC', lambda: hash_map_sc.HashMap(11, builtin_hash)),
+            ('OA', lambda: hash_map_oa.HashMap(11, builtin_hash)),
+            ('OA arrays', lambda: hash_map_oa.HashMap(11, builtin_hash, storage="arrays"))):
+        print(name, round(bytes_per_entry(make_map, keys)))
@@ -0,0 +1,222 @@
+# Description: Hash functions for use with both HashMaps (SC & OA) in place of
+#           hash_function_1() and hash_function_2(). Each function takes a key and
+#           returns a non-negative integer; all but builtin_hash() also take a seed,
+#           and seeded() binds one (random by default) to resist collision flooding.
+#           finalized() mixes a function's result for use with power-of-two capacities.
+
+
+import secrets
+import struct
+from functools import partial, wraps
+
+_MASK_32 = 0xFFFFFFFF
+_MASK_64 = 0xFFFFFFFFFFFFFFFF
+
+_FNV_OFFSET_64 = 0xCBF29CE484222325
+_FNV_PRIME_64 = 0x100000001B3
+
+
+def _to_bytes(key) -> bytes:
+    """
+    Return the bytes to hash for key: bytes as is, everything else as UTF-8 of str()
+    """
+    if isinstance(key, (bytes, bytearray)):
+        return bytes(key)
+    if not isinstance(key, str):
+        key = str(key)
+    return key.encode('utf-8')
+
+
+def fmix64(hash: int) -> int:
+    """
+    MurmurHash3 64-bit finalizer: mixes every input bit into every output bit
+    """
+    hash &= _MASK_64
+    hash ^= hash >> 33
+    hash = (hash * 0xFF51AFD7ED558CCD) & _MASK_64
+    hash ^= hash >> 33
+    hash = (hash * 0xC4CEB9FE1A85EC53) & _MASK_64
+    hash ^= hash >> 33
+    return hash
+
+
+def builtin_hash(key) -> int:
+    """
+    Python's built-in hash() (SipHash for str and bytes, randomized per
+    process unless PYTHONHASHSEED is set) as a non-negative 64-bit integer.
+    This is by far the fastest option as it runs in C.
+    """
+    return hash(key) & _MASK_64
+
+
+def fnv1a_64(key, seed: int = 0) -> int:
+    """
+    64-bit FNV-1a; a seed is folded into the offset basis
+    """
+    hash = (_FNV_OFFSET_64 ^ fmix64(seed)) if seed else _FNV_OFFSET_64
+    for byte in _to_bytes(key):
+        hash = ((hash ^ byte) * _FNV_PRIME_64) & _MASK_64
+    return hash
+
+
+def murmur3_32(key, seed: int = 0) -> int:
+    """
+    MurmurHash3 x86 32-bit
+    """
+    data = _to_bytes(key)
+    length = len(data)
+    hash = seed & _MASK_32
+    c1, c2 = 0xCC9E2D51, 0x1B873593
+
+    n_blocks = length // 4
+    for block in struct.unpack_from('<' + 'I' * n_blocks, data):
+        block = (block * c1) & _MASK_32
+        block = ((block << 15) | (block >> 17)) & _MASK_32
+        block = (block * c2) & _MASK_32
+        hash ^= block
+        hash = ((hash << 13) | (hash >> 19)) & _MASK_32
+        hash = (hash * 5 + 0xE6546B64) & _MASK_32
+
+    tail = data[n_blocks * 4:]
+    if tail:
+        block = int.from_bytes(tail, 'little')
+        block = (block * c1) & _MASK_32
+        block = ((block << 15) | (block >> 17)) & _MASK_32
+        block = (block * c2) & _MASK_32
+        hash ^= block
+
+    hash ^= length
+    hash ^= hash >> 16
+    hash = (hash * 0x85EBCA6B) & _MASK_32
+    hash ^= hash >> 13
+    hash = (hash * 0xC2B2AE35) & _MASK_32
+    hash ^= hash >> 16
+    return hash
+
+
+def xx_mix64(key, seed: int = 0) -> int:
+    """
+    xxHash-style 64-bit hash: eight bytes are consumed per round using the
+    xxHash64 primes, and the result goes through an avalanche finalizer.
+    Not bit-compatible with the reference xxHash64.
+    """
+    p1, p2, p3 = 0x9E3779B185EBCA87, 0xC2B2AE3D27D4EB4F, 0x165667B19E3779F9
+    data = _to_bytes(key)
+    length = len(data)
+    hash = (seed + 0x27D4EB2F165667C5 + length) & _MASK_64
+
+    n_words = length // 8
+    for word in struct.unpack_from('<' + 'Q' * n_words, data):
+        word = (word * p2) & _MASK_64
+        word = ((word << 31) | (word >> 33)) & _MASK_64
+        hash ^= (word * p1) & _MASK_64
+        hash = ((((hash << 27) | (hash >> 37)) & _MASK_64) * p1 + p3) & _MASK_64
+
+    tail = data[n_words * 8:]
+    if tail:
+        hash ^= (int.from_bytes(tail, 'little') * p1) & _MASK_64
+        hash = ((((hash << 23) | (hash >> 41)) & _MASK_64) * p2 + p3) & _MASK_64
+
+    return fmix64(hash)
+
+
+def _sipround(v0: int, v1: int, v2: int, v3: int) -> tuple:
+    """
+    One SipHash round over the four 64-bit state words
+    """
+    v0 = (v0 + v1) & _MASK_64
+    v1 = ((v1 << 13) | (v1 >> 51)) & _MASK_64
+    v1 ^= v0
+    v0 = ((v0 << 32) | (v0 >> 32)) & _MASK_64
+    v2 = (v2 + v3) & _MASK_64
+    v3 = ((v3 << 16) | (v3 >> 48)) & _MASK_64
+    v3 ^= v2
+    v0 = (v0 + v3) & _MASK_64
+    v3 = ((v3 << 21) | (v3 >> 43)) & _MASK_64
+    v3 ^= v0
+    v2 = (v2 + v1) & _MASK_64
+    v1 = ((v1 << 17) | (v1 >> 47)) & _MASK_64
+    v1 ^= v2
+    v2 = ((v2 << 32) | (v2 >> 32)) & _MASK_64
+    return v0, v1, v2, v3
+
+
+def siphash24(key, seed: int = 0) -> int:
+    """
+    SipHash-2-4, a keyed hash designed to resist collision flooding.
+    seed is the 128-bit SipHash key; its low 64 bits are k0 and its high 64 bits k1.
+    """
+    k0, k1 = seed & _MASK_64, (seed >> 64) & _MASK_64
+    v0 = k0 ^ 0x736F6D6570736575
+    v1 = k1 ^ 0x646F72616E646F6D
+    v2 = k0 ^ 0x6C7967656E657261
+    v3 = k1 ^ 0x7465646279746573
+
+    data = _to_bytes(key)
+    length = len(data)
+    n_words = length // 8
+    words = list(struct.unpack_from('<' + 'Q' * n_words, data))
+    # Last word holds the remaining bytes with the length in its top byte
+    words.append(int.from_bytes(data[n_words * 8:], 'little') | ((length & 0xFF) << 56))
+
+    for word in words:
+        v3 ^= word
+        v0, v1, v2, v3 = _sipround(v0, v1, v2, v3)
+        v0, v1, v2, v3 = _sipround(v0, v1, v2, v3)
+        v0 ^= word
+
+    v2 ^= 0xFF
+    for _ in range(4):
+        v0, v1, v2, v3 = _sipround(v0, v1, v2, v3)
+    return v0 ^ v1 ^ v2 ^ v3
+
+
+def finalized(function: callable) -> callable:
+    """
+    Return function followed by the fmix64() finalizer, so that the low bits
+    of its result depend on all of its bits, as a power-of-two capacity
+    needs. The original function is available as __wrapped__.
+    """
+    @wraps(function)
+    def finalized_function(key) -> int:
+        return fmix64(function(key))
+    return finalized_function
+
+
+def seeded(function: callable, seed: int = None) -> callable:
+    """
+    Return function with its seed bound, for use as a HashMap hash function.
+    Without a seed a random 128-bit one is drawn, so an attacker cannot
+    precompute colliding keys.
+    """
+    if seed is None:
+        seed = secrets.randbits(128)
+    return partial(function, seed=seed)
+
+
+# Hash functions by name, for choosing one from configuration
+HASH_FUNCTIONS = {
+    'builtin': builtin_hash,
+    'fnv1a_64': fnv1a_64,
+    'murmur3_32': murmur3_32,
+    'xx_mix64': xx_mix64,
+    'siphash24': siphash24,
+}
+
+
+# ------------------- BASIC TESTING ---------------------------------------- #
+
+if __name__ == "__main__":
+
+    print("\nTest Case - known answers")
+    print("-------------------")
+    print(hex(fnv1a_64('foobar')) == '0x85944171f73967e8')
+    print(hex(murmur3_32('hello')) == '0x248bfa47')
+    print(hex(siphash24(bytes(range(15)),
+                        int.from_bytes(bytes(range(16)), 'little'))) == '0xa129ca6149be45e5')
+
+    print("\nTest Case - anagrams")
+    print("-------------------")
+    for name, function in HASH_FUNCTIONS.items():
+        hashes = {function(key) for key in ('listen', 'silent', 'enlist', 'tinsel')}
+        print(name, len(hashes))
@@ -0,0 +1,394 @@
+# Description: A thread-safe HashMap built on the separate chaining HashMap in hash_map_sc.py.
+#           The table is split into stripes of consecutive buckets, each guarded by its own
+#           lock, so threads working on different stripes do not block each other. A resize
+#           is serialized by a global resize lock and runs with every stripe lock held.
+
+
+import threading
+from contextlib import contextmanager
+
+import hash_map_sc
+from ds import DynamicArray, as_list, hash_function_1, hash_function_2
+from snapshot import write_snapshot
+
+# Default number of lock stripes
+_STRIPES = 16
+
+
+class HashMap(hash_map_sc.HashMap):
+    """
+    Separate chaining HashMap that can be shared between threads.
+    An operation on a key takes the lock of the stripe holding the key's
+    bucket. Resizing replaces the bucket array while holding every stripe
+    lock, so an operation that looked up the array before a resize notices
+    the swap once it gets its stripe lock and retries on the new table.
+    The size is kept as one count per stripe, so inserts into different
+    stripes do not contend on a shared counter.
+    """
+
+    _TABLE_ATTRIBUTES = hash_map_sc.HashMap._TABLE_ATTRIBUTES + (
+        '_locks', '_resize_lock', '_counts')
+
+    def __init__(self,
+                 capacity: int = 11,
+                 function: callable = hash_function_1,
+                 max_load: float = 1.0,
+                 shrink_load: float = None,
+                 power_of_two: bool = False,
+                 stripes: int = _STRIPES) -> None:
+        """
+        Initialize new HashMap that uses separate chaining for collision
+        resolution and stripes locks over ranges of buckets.
+        Incremental resizing is not supported: the old and new tables would
+        both need locking for the whole migration.
+        """
+        if stripes < 1:
+            raise ValueError("stripes must be positive")
+        self._locks = tuple(threading.Lock() for _ in range(stripes))
+        # Reentrant so that a grow check can call resize_table() under it
+        self._resize_lock = threading.RLock()
+        super().__init__(capacity, function, False, max_load, shrink_load, power_of_two)
+
+    @property
+    def _size(self) -> int:
+        """
+        Number of keys, summed over the per-stripe counts
+        """
+        return sum(self._counts)
+
+    @_size.setter
+    def _size(self, size: int) -> None:
+        self._counts = [size] + [0] * (len(self._locks) - 1)
+
+    def _stripe(self, index: int, capacity: int) -> int:
+        """
+        Returns the stripe holding bucket index of a table of capacity buckets
+        """
+        return index * len(self._locks) // capacity
+
+    @contextmanager
+    def _exclusive(self):
+        """
+        Holds the resize lock and every stripe lock, always taken in the same
+        order so that two whole-table operations cannot deadlock.
+        """
+        with self._resize_lock:
+            for lock in self._locks:
+                lock.acquire()
+            try:
+                yield
+            finally:
+                for lock in reversed(self._locks):
+                    lock.release()
+
+    def _locked_bucket(self, hash: int):
+        """
+        Returns the buckets, index and stripe of hash with that stripe's lock
+        held, retrying until no resize replaced the table in between.
+        The caller releases self._locks[stripe].
+        """
+        while True:
+            buckets = self._buckets
+            capacity = buckets.length()
+            index = hash % capacity
+            stripe = self._stripe(index, capacity)
+            self._locks[stripe].acquire()
+            if self._buckets is buckets:
+                return buckets, index, stripe
+            self._locks[stripe].release()
+
+    def __str__(self) -> str:
+        """
+        Override string method to provide more readable output
+        """
+        with self._exclusive():
+            return super().__str__()
+
+    def _put(self, key: str, value: object, hash: int) -> None:
+        """
+        Performs put() given the already computed hash of key.
+        The load is checked after the insert, outside the stripe lock.
+        """
+        buckets, index, stripe = self._locked_bucket(hash)
+        try:
+            bucket = buckets[index]
+            target_node = None if bucket is None else bucket.contains(key, hash)
+            if target_node is not None:
+                target_node.value = value
+                return
+            self._bucket_for_insert(buckets, index).insert(key, value, hash)
+            self._counts[stripe] += 1
+        finally:
+            self._locks[stripe].release()
+
+        if self._size / buckets.length() >= self._max_load:
+            self._grow(buckets)
+
+    def _grow(self, buckets: DynamicArray) -> None:
+        """
+        Doubles the table unless another thread already resized it
+        """
+        with self._resize_lock:
+            if self._buckets is buckets and self.table_load() >= self._max_load:
+                self.resize_table(self._capacity * 2)
+
+    def empty_buckets(self) -> int:
+        """
+        Returns the number of empty buckets in the hash table.
+        """
+        with self._exclusive():
+            return super().empty_buckets()
+
+    def clear(self) -> None:
+        """
+        Clears the contents of the hash map.
+        """
+        with self._exclusive():
+            super().clear()
+
+    def resize_table(self, new_capacity: int) -> None:
+        """
+        Changes the capacity of the internal hash table.
+        """
+        with self._exclusive():
+            super().resize_table(new_capacity)
+
+    def _get(self, key: str, hash: int):
+        """
+        Performs get() given the already computed hash of key.
+        """
+        buckets, index, stripe = self._locked_bucket(hash)
+        try:
+            bucket = buckets[index]
+            link_node = None if bucket is None else bucket.contains(key, hash)
+            return None if link_node is None else link_node.value
+        finally:
+            self._locks[stripe].release()
+
+    def _contains(self, key: str, hash: int) -> bool:
+        """
+        Performs contains_key() given the already computed hash of key.
+        """
+        buckets, index, stripe = self._locked_bucket(hash)
+        try:
+            bucket = buckets[index]
+            return bucket is not None and bucket.contains(key, hash) is not None
+        finally:
+            self._locks[stripe].release()
+
+    def upsert(self, key: str, function: callable, default: object = None) -> object:
+        """
+        Sets the value of key to function(value), where value is the current
+        value of key, or default if key is not in the hash map, and returns the
+        new value. function runs under the stripe lock, so concurrent upserts
+        of a key never lose an update; it must not use the map.
+        """
+        return self._upsert(key, self._hash_function(key), function, default)
+
+    def _upsert(self, key: str, hash: int, function: callable, default: object) -> object:
+        """
+        Performs upsert() given the already computed hash of key.
+        """
+        buckets, index, stripe = self._locked_bucket(hash)
+        try:
+            bucket = buckets[index]
+            link_node = None if bucket is None else bucket.contains(key, hash)
+            value = function(default if link_node is None else link_node.value)
+            if link_node is not None:
+                link_node.value = value
+                return value
+            self._bucket_for_insert(buckets, index).insert(key, value, hash)
+            self._counts[stripe] += 1
+        finally:
+            self._locks[stripe].release()
+
+        if self._size / buckets.length() >= self._max_load:
+            self._grow(buckets)
+        return value
+
+    def setdefault(self, key: str, default: object = None) -> object:
+        """
+        Returns the value of key, first inserting key with the value default
+        if it is not in the hash map.
+        """
+        return self._upsert(key, self._hash_function(key), lambda value: value, default)
+
+    def _increment(self, key: str, delta: int, hash: int) -> int:
+        """
+        Performs increment() given the already computed hash of key.
+        """
+        return self._upsert(key, hash, lambda value: value + delta, 0)
+
+    def _pop(self, key: str, hash: int, default: object = None) -> object:
+        """
+        Performs pop() given the already computed hash of key.
+        """
+        buckets, index, stripe = self._locked_bucket(hash)
+        try:
+            bucket = buckets[index]
+            link_node = None if bucket is None else bucket.pop(key, hash)
+            if link_node is None:
+                return default
+            # Release buckets that become empty
+            if bucket.length() == 0:
+                buckets[index] = None
+            self._counts[stripe] -= 1
+        finally:
+            self._locks[stripe].release()
+
+        if self._shrink_load is not None:
+            with self._resize_lock:
+                if self._buckets is buckets:
+                    self._shrink_if_sparse()
+        return link_node.value
+
+    def put_many(self, pairs) -> None:
+        """
+        Puts every (key, value) tuple of pairs, a DynamicArray or any iterable.
+        The table is sized once for the whole batch and every key is hashed up
+        front; each key then takes only its own stripe lock.
+        """
+        pairs = as_list(pairs)
+        hashes = list(map(self._hash_function, [pair[0] for pair in pairs]))
+        with self._resize_lock:
+            self._reserve(len(pairs))
+        _put = self._put
+        for (key, value), hash in zip(pairs, hashes):
+            _put(key, value, hash)
+
+    def get_many(self, keys) -> DynamicArray:
+        """
+        Returns a dynamic array holding the value of each key in keys,
+        or None for keys that are not in the hash map.
+        """
+        keys = as_list(keys)
+        _get = self._get
+        return DynamicArray([_get(key, hash) for key, hash in
+                             zip(keys, map(self._hash_function, keys))])
+
+    def contains_many(self, keys) -> DynamicArray:
+        """
+        Returns a dynamic array holding contains_key() of each key in keys.
+        """
+        keys = as_list(keys)
+        _contains = self._contains
+        return DynamicArray([_contains(key, hash) for key, hash in
+                             zip(keys, map(self._hash_function, keys))])
+
+    def remove_many(self, keys) -> None:
+        """
+        Removes every key in keys from the hash map, each key taking only its
+        own stripe lock.
+        """
+        keys = as_list(keys)
+        _remove = self._remove
+        for key, hash in zip(keys, map(self._hash_function, keys)):
+            _remove(key, hash)
+
+    def chain_lengths(self) -> DynamicArray:
+        """
+        Returns a dynamic array holding the length of the chain in each bucket.
+        """
+        with self._exclusive():
+            return super().chain_lengths()
+
+    def get_keys_and_values(self) -> DynamicArray:
+        """
+        Returns a dynamic array where each index contains a tuple of a key/value pair
+        stored in the hash map, as a consistent snapshot.
+        """
+        with self._exclusive():
+            return super().get_keys_and_values()
+
+    def _entries(self):
+        """
+        Yields the key, value and cached hash of each key from a copy of the
+        table taken under every lock, so that other threads can keep writing
+        while the caller iterates
+        """
+        with self._exclusive():
+            entries = list(super()._entries())
+        yield from entries
+
+    def _write_snapshot(self, file) -> None:
+        """
+        Writes the hash map as a snapshot, streamed from the table with every lock held
+        """
+        with self._exclusive():
+            write_snapshot(file, self._capacity, self._size, self._hash_function,
+                           super()._entries())
+
+    def __getstate__(self) -> dict:
+        """
+        Returns the pickled state, which records the number of stripes in place of the locks
+        """
+        state = super().__getstate__()
+        state['_stripes'] = len(self._locks)
+        return state
+
+    def __setstate__(self, state: dict) -> None:
+        """
+        Restores a pickled hash map with new locks
+        """
+        state = dict(state)
+        self._locks = tuple(threading.Lock() for _ in range(state.pop('_stripes')))
+        self._resize_lock = threading.RLock()
+        super().__setstate__(state)
+
+
+# ------------------- BASIC TESTING ---------------------------------------- #
+
+if __name__ == "__main__":
+
+    print("\nTest Case - put test 1")
+    print("-------------------")
+    m = HashMap(53, hash_function_1)
+    for i in range(150):
+        m.put('str' + str(i), i * 100)
+        if i % 25 == 24:
+            print(m.empty_buckets(), round(m.table_load(), 2),
+                  m.get_size(), m.get_capacity())
+
+    print("\nTest Case - remove test 1")
+    print("-------------------")
+    m = HashMap(11, hash_function_2, shrink_load=0.1)
+    for i in range(1, 201):
+        m.put(str(i), i * 10)
+    print(m.get_size(), m.get_capacity())
+    for i in range(1, 201, 2):
+        m.remove(str(i))
+    m.remove_many([str(i) for i in range(2, 191, 2)])
+    print(m.get_size(), m.get_capacity(), m.get_many(['192', '193', '200']))
+
+    print("\nTest Case - multithreaded stress test 1")
+    print("----------------------")
+    # Threads insert and remove their own keys while sharing a table that
+    # starts small, so most inserts race with resizes triggered elsewhere
+    threads, per_thread = 8, 5000
+    m = HashMap(11, hash_function_2, stripes=8)
+    barrier = threading.Barrier(threads)
+
+    def worker(thread: int) -> None:
+        barrier.wait()
+        for i in range(per_thread):
+            m.put(f'{thread}-{i}', i)
+            # every thread counts into the same keys
+            m.increment('shared' + str(i % 10))
+        for i in range(0, per_thread, 2):
+            m.remove(f'{thread}-{i}')
+
+    pool = [threading.Thread(target=worker, args=(t,)) for t in range(threads)]
+    for thread in pool:
+        thread.start()
+    for thread in pool:
+        thread.join()
+
+    result = m.get_size() == threads * per_thread // 2 + 10
+    for i in range(10):
+        result &= m.pop('shared' + str(i)) == threads * per_thread // 10
+    for t in range(threads):
+        for i in range(per_thread):
+            result &= m.get(f'{t}-{i}') == (i if i % 2 else None)
+    keys_and_values = m.get_keys_and_values()
+    result &= keys_and_values.length() == m.get_size()
+    print(result, m.get_size(), m.get_capacity() >= m.get_size())
@@ -0,0 +1,570 @@
+# Description: A persistent open addressing HashMap kept in memory-mapped files, so a large
+#           table can be reopened without rebuilding it. The index file holds a header and a
+#           fixed-layout slot array (cached hash, offset and lengths of the key/value record);
+#           the records are appended to a data file. Both files are accessed through mmap, so
+#           opening a map reads nothing up front, and maps opened read-only by several
+#           processes share the same pages through the page cache.
+
+
+import mmap
+import os
+import pickle
+import struct
+import time
+
+import hash_map_oa
+from ds import DynamicArray, HashEntry, as_list, hash_function_1, hash_function_2
+from hash_functions import finalized
+from snapshot import function_id, hashes_match
+
+# Index file: header, then one slot per table entry
+_INDEX_MAGIC = b'HMAPIDX1'
+_HEADER = struct.Struct('<8sQQQQ88s')    # magic, capacity, size, tombstones, data end, hash id
+_HASH_ID_SIZE = 88
+_HEADER_SIZE = _HEADER.size
+_SLOT = struct.Struct('<QQII')           # hash, record offset, key length, value length
+
+# Data file: magic, then key/value records. No record starts below the
+# magic, so these offsets can mark empty and deleted slots.
+_DATA_MAGIC = b'HMAPDAT1'
+_EMPTY = 0
+_TOMBSTONE = 1
+
+
+class HashMap(hash_map_oa.HashMap):
+    """
+    Open addressing HashMap whose table lives in an index file and whose keys
+    and values live in an append-only data file, both memory-mapped.
+    Keys are strings, stored as UTF-8, and values are anything pickle can
+    store. Probing is triangular over a power-of-two table, as in
+    TriangularHashMap, and slots cache the key's hash so the table can be
+    grown by remapping the index file and re-placing the slots without
+    reading a single key. Replacing or removing a value leaves its old record
+    in the data file; the space is not reclaimed.
+    The hash function must give the same result in every process, so it
+    must be one snapshot.function_id() can name (a hash_functions function
+    or hash_function_1/2, possibly seeded), and the builtin hash() only with
+    a fixed PYTHONHASHSEED.
+    """
+
+    _DEFAULT_MAX_LOAD = 0.75
+    _MAX_LOAD_LIMIT = 0.95
+
+    def __init__(self, path: str, function: callable = hash_function_1,
+                 capacity: int = 11, max_load: float = None,
+                 readonly: bool = False) -> None:
+        """
+        Opens the map stored at path (index file path, data file path + '.data'),
+        creating it with the given capacity if it does not exist. With
+        readonly=True the files are mapped read-only and changes raise
+        PermissionError. function must be the one the map was created with;
+        its id is recorded in the file and checked.
+        """
+        hash_id = function_id(function)
+        if not hashes_match(hash_id, function):
+            raise ValueError("the hash function must be named by snapshot.function_id() "
+                             "and give the same hashes in every process")
+        if max_load is None:
+            max_load = self._DEFAULT_MAX_LOAD
+        if not 0 < max_load <= self._MAX_LOAD_LIMIT:
+            raise ValueError(f"max_load must be greater than 0 and at most {self._MAX_LOAD_LIMIT}")
+        self._max_load = max_load
+        self._shrink_load = None
+
+        self._path = path
+        self._readonly = readonly
+        self._hash_function = finalized(function)
+        self._hash_id = hash_id.encode('utf-8')
+        if len(self._hash_id) > _HASH_ID_SIZE:
+            raise ValueError(f"hash function id {hash_id!r} is too long to record")
+        self._last_resize_time = 0.0
+
+        # Incremental resizing does not apply to a file-backed table
+        self._incremental = False
+        self._old_buckets = None
+        self._old_capacity = 0
+        self._migrate_index = 0
+
+        if not os.path.exists(path):
+            if readonly:
+                raise FileNotFoundError(path)
+            self._create(self._table_capacity(capacity))
+        self._open()
+        self._min_capacity = self._capacity
+
+    def _create(self, capacity: int) -> None:
+        """
+        Writes an empty index file of capacity slots and an empty data file
+        """
+        with open(self._path + '.data', 'wb') as data_file:
+            data_file.write(_DATA_MAGIC)
+        with open(self._path, 'wb') as index_file:
+            index_file.write(_HEADER.pack(_INDEX_MAGIC, capacity, 0, 0, len(_DATA_MAGIC),
+                                          self._hash_id))
+            index_file.truncate(_HEADER_SIZE + capacity * _SLOT.size)
+
+    def _open(self) -> None:
+        """
+        Maps the index and data files and reads the header
+        """
+        mode, access = ('rb', mmap.ACCESS_READ) if self._readonly else ('r+b', mmap.ACCESS_WRITE)
+        self._index_file = open(self._path, mode)
+        self._data_file = open(self._path + '.data', mode)
+        self._index = mmap.mmap(self._index_file.fileno(), 0, access=access)
+        self._data = mmap.mmap(self._data_file.fileno(), 0, access=access)
+
+        magic, capacity, size, tombstones, data_end, hash_id = \
+            _HEADER.unpack_from(self._index, 0)
+        if magic != _INDEX_MAGIC or self._data[:len(_DATA_MAGIC)] != _DATA_MAGIC:
+            self.close()
+            raise ValueError(f"{self._path} is not a memory-mapped HashMap")
+        hash_id = hash_id.rstrip(b'\0').decode('utf-8')
+        if not hashes_match(hash_id, self._hash_function.__wrapped__):
+            self.close()
+            raise ValueError(f"{self._path} was created with hash function {hash_id!r}")
+        self._capacity, self._size, self._tombstones = capacity, size, tombstones
+        self._data_end = data_end
+
+    def _write_header(self) -> None:
+        """
+        Records the capacity, counts and end of the data in the index header
+        """
+        _HEADER.pack_into(self._index, 0, _INDEX_MAGIC, self._capacity, self._size,
+                          self._tombstones, self._data_end, self._hash_id)
+
+    def _check_writable(self) -> None:
+        """
+        Raises PermissionError if the map was opened read-only
+        """
+        if self._readonly:
+            raise PermissionError(f"{self._path} was opened read-only")
+
+    def flush(self) -> None:
+        """
+        Writes changes to the mapped files through to disk.
+        """
+        if not self._readonly:
+            self._index.flush()
+            self._data.flush()
+
+    def close(self) -> None:
+        """
+        Flushes and unmaps the files. The map cannot be used afterwards.
+        """
+        if not self._index.closed:
+            self.flush()
+            self._index.close()
+            self._data.close()
+        self._index_file.close()
+        self._data_file.close()
+
+    def __enter__(self) -> "HashMap":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def _table_capacity(self, capacity: int) -> int:
+        """
+        Returns the smallest power of two that is at least capacity
+        """
+        return 1 << max(capacity - 1, 1).bit_length()
+
+    def _slot(self, index: int) -> tuple:
+        """
+        Returns the (hash, offset, key length, value length) of slot index
+        """
+        return _SLOT.unpack_from(self._index, _HEADER_SIZE + index * _SLOT.size)
+
+    def _key_at(self, offset: int, key_length: int) -> str:
+        """
+        Returns the key of the record at offset
+        """
+        return self._data[offset:offset + key_length].decode('utf-8')
+
+    def _value_at(self, offset: int, key_length: int, value_length: int) -> object:
+        """
+        Returns the value of the record at offset
+        """
+        start = offset + key_length
+        return pickle.loads(self._data[start:start + value_length])
+
+    @staticmethod
+    def _encode_key(key: str) -> bytes:
+        """
+        Returns the stored form of key
+        """
+        if not isinstance(key, str):
+            raise TypeError("keys of a memory-mapped HashMap must be str")
+        return key.encode('utf-8')
+
+    def __str__(self) -> str:
+        """
+        Override string method to provide more readable output
+        """
+        out = ''
+        for i in range(self._capacity):
+            hash, offset, key_length, value_length = self._slot(i)
+            if offset == _EMPTY:
+                out += str(i) + ': None\n'
+            elif offset == _TOMBSTONE:
+                out += str(i) + ': TS\n'
+            else:
+                out += (str(i) + ': K: ' + self._key_at(offset, key_length) +
+                        ' V: ' + str(self._value_at(offset, key_length, value_length)) + '\n')
+        return out
+
+    def _find(self, key: bytes, hash: int) -> (int, int):
+        """
+        Triangular probe for the encoded key, continuing past tombstones until
+        an empty slot. Returns the index of the slot holding key (-1 if there
+        is none), and the first tombstone or empty slot passed.
+        """
+        index_map, data, unpack_from, slot_size = self._index, self._data, _SLOT.unpack_from, _SLOT.size
+        mask = self._capacity - 1
+        index, free = hash & mask, -1
+        for j in range(1, self._capacity + 1):
+            slot_hash, offset, key_length, _ = unpack_from(index_map, _HEADER_SIZE + index * slot_size)
+            if offset == _EMPTY:
+                return -1, (index if free < 0 else free)
+            if offset == _TOMBSTONE:
+                if free < 0:
+                    free = index
+            elif slot_hash == hash and data[offset:offset + key_length] == key:
+                return index, free
+            index = (index + j) & mask
+        return -1, free
+
+    def _probe_length(self, key, hash: int) -> int:
+        """
+        Returns the number of slots a lookup of key inspects, for the stats.
+        """
+        key, mask = self._encode_key(key), self._capacity - 1
+        index = hash & mask
+        for j in range(1, self._capacity + 1):
+            slot_hash, offset, key_length, _ = self._slot(index)
+            if offset == _EMPTY or (offset != _TOMBSTONE and slot_hash == hash
+                                    and self._data[offset:offset + key_length] == key):
+                return j
+            index = (index + j) & mask
+        return self._capacity
+
+    def _find_many(self, keys: list, hashes: list):
+        """
+        Yields, for each key of keys and its hash in hashes, the index of the
+        slot holding it, or -1, with the probe of _find() inlined
+        """
+        index_map, data, unpack_from, slot_size = self._index, self._data, _SLOT.unpack_from, _SLOT.size
+        encode_key, mask = self._encode_key, self._capacity - 1
+        for key, hash in zip(keys, hashes):
+            key = encode_key(key)
+            index, found = hash & mask, -1
+            for j in range(1, mask + 2):
+                slot_hash, offset, key_length, _ = unpack_from(index_map, _HEADER_SIZE + index * slot_size)
+                if offset == _EMPTY:
+                    break
+                if (offset != _TOMBSTONE and slot_hash == hash
+                        and data[offset:offset + key_length] == key):
+                    found = index
+                    break
+                index = (index + j) & mask
+            yield found
+
+    def _append(self, key: bytes, value: object) -> (int, int):
+        """
+        Appends a record of key and the pickled value to the data file,
+        growing its mapping as needed, and returns its offset and value length
+        """
+        value = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+        offset, end = self._data_end, self._data_end + len(key) + len(value)
+        if end > len(self._data):
+            self._data.resize(max(end, 2 * len(self._data)))
+        self._data[offset:end] = key + value
+        self._data_end = end
+        return offset, len(value)
+
+    def _store(self, index: int, hash: int, key: bytes, value: object) -> None:
+        """
+        Appends a record of key and value and points slot index at it
+        """
+        offset, value_length = self._append(key, value)
+        _SLOT.pack_into(self._index, _HEADER_SIZE + index * _SLOT.size,
+                        hash, offset, len(key), value_length)
+
+    def _put(self, key: str, value: object, hash: int) -> None:
+        """
+        Performs put() given the already computed hash of key.
+        """
+        index, inserted = self._find_or_insert(key, hash, value)
+        if not inserted:
+            self._set_slot_value(index, value)
+
+    def _find_or_insert(self, key: str, hash: int, default: object = None) -> (int, bool):
+        """
+        Returns the index of the slot holding key, inserting key with the value
+        default if it is not in the hash map, and whether it was inserted.
+        """
+        self._check_writable()
+        if self.occupied_load() >= self._max_load:
+            self._grow_or_compact()
+
+        encoded = self._encode_key(key)
+        index, free = self._find(encoded, hash)
+        if index >= 0:
+            return index, False
+
+        if self._slot(free)[1] == _TOMBSTONE:
+            self._tombstones -= 1
+        self._store(free, hash, encoded, default)
+        self._size += 1
+        self._write_header()
+        return free, True
+
+    def _slot_value(self, slot: int) -> object:
+        """
+        Returns the value in the slot at index slot
+        """
+        _, offset, key_length, value_length = self._slot(slot)
+        return self._value_at(offset, key_length, value_length)
+
+    def _set_slot_value(self, slot: int, value: object) -> None:
+        """
+        Appends a new record for the key in the slot at index slot with value
+        """
+        hash, offset, key_length, _ = self._slot(slot)
+        self._store(slot, hash, self._data[offset:offset + key_length], value)
+        self._write_header()
+
+    def empty_buckets(self) -> int:
+        """
+        Returns the number of empty buckets in the hash table.
+        """
+        return sum(1 for i in range(self._capacity) if self._slot(i)[1] == _EMPTY)
+
+    def resize_table(self, new_capacity: int) -> None:
+        """
+        Changes the capacity of the internal hash table by remapping the index
+        file. Slots are re-placed by their cached hashes; the data file is
+        left as it is.
+        """
+        self._check_writable()
+        if new_capacity < self._size:
+            return
+
+        new_capacity = self._table_capacity(new_capacity)
+        new_capacity = self._grow_for_load(new_capacity)
+
+        start = time.perf_counter()
+
+        old_slots = [slot for slot in _SLOT.iter_unpack(self._index[_HEADER_SIZE:])
+                     if slot[1] > _TOMBSTONE]
+        self._index.resize(_HEADER_SIZE + new_capacity * _SLOT.size)
+        self._index[_HEADER_SIZE:] = bytes(new_capacity * _SLOT.size)
+        self._capacity = new_capacity
+        self._tombstones = 0
+
+        mask = new_capacity - 1
+        for slot in old_slots:
+            index, j = slot[0] & mask, 1
+            while self._slot(index)[1] != _EMPTY:
+                index = (index + j) & mask
+                j += 1
+            _SLOT.pack_into(self._index, _HEADER_SIZE + index * _SLOT.size, *slot)
+        self._write_header()
+
+        self._last_resize_time = time.perf_counter() - start
+
+    def _get(self, key: str, hash: int) -> object:
+        """
+        Performs get() given the already computed hash of key.
+        """
+        index, _ = self._find(self._encode_key(key), hash)
+        if index < 0:
+            return None
+        return self._slot_value(index)
+
+    def _contains(self, key: str, hash: int) -> bool:
+        """
+        Performs contains_key() given the already computed hash of key.
+        """
+        index, _ = self._find(self._encode_key(key), hash)
+        return index >= 0
+
+    def _pop(self, key: str, hash: int, default: object = None) -> object:
+        """
+        Performs pop() given the already computed hash of key.
+        """
+        self._check_writable()
+        index, _ = self._find(self._encode_key(key), hash)
+        if index < 0:
+            return default
+        value = self._slot_value(index)
+        self._clear_slot(index)
+        self._size -= 1
+        self._write_header()
+        return value
+
+    def _clear_slot(self, index: int) -> None:
+        """
+        Marks the slot at index as a tombstone, keeping its cached hash. The
+        caller updates the size and the header.
+        """
+        hash = self._slot(index)[0]
+        _SLOT.pack_into(self._index, _HEADER_SIZE + index * _SLOT.size, hash, _TOMBSTONE, 0, 0)
+        self._tombstones += 1
+
+    def get_many(self, keys) -> DynamicArray:
+        """
+        Returns a dynamic array holding the value of each key in keys,
+        or None for keys that are not in the hash map.
+        """
+        keys = as_list(keys)
+        hashes = list(map(self._hash_function, keys))
+        if self._counting():
+            _get = self._get
+            return DynamicArray([_get(key, hash) for key, hash in zip(keys, hashes)])
+
+        slot_value = self._slot_value
+        return DynamicArray([None if index < 0 else slot_value(index)
+                             for index in self._find_many(keys, hashes)])
+
+    def remove_many(self, keys) -> None:
+        """
+        Removes every key in keys from the hash map, writing the header once.
+        """
+        self._check_writable()
+        super().remove_many(keys)
+        self._write_header()
+
+    def clear(self) -> None:
+        """
+        Clears the contents of the hash map, including the data file.
+        """
+        self._check_writable()
+        self._index[_HEADER_SIZE:] = bytes(self._capacity * _SLOT.size)
+        self._size = self._tombstones = 0
+        self._data_end = len(_DATA_MAGIC)
+        self._write_header()
+
+    def probe_lengths(self) -> DynamicArray:
+        """
+        Returns a dynamic array holding, for each key in the hash map, the number
+        of slots a successful lookup inspects before reaching it (1 for its home slot).
+        """
+        output_da = DynamicArray()
+        mask = self._capacity - 1
+        for i in range(self._capacity):
+            hash, offset, _, _ = self._slot(i)
+            if offset <= _TOMBSTONE:
+                continue
+            index, j = hash & mask, 1
+            while index != i:
+                index = (index + j) & mask
+                j += 1
+            output_da.append(j)
+        return output_da
+
+    def get_keys_and_values(self) -> DynamicArray:
+        """
+        Returns a dynamic array where each index contains a tuple of a key/value pair
+        stored in the hash map.
+        """
+        output_da = DynamicArray()
+        for i in range(self._capacity):
+            _, offset, key_length, value_length = self._slot(i)
+            if offset > _TOMBSTONE:
+                output_da.append((self._key_at(offset, key_length),
+                                  self._value_at(offset, key_length, value_length)))
+        return output_da
+
+    def _entries(self):
+        """
+        Yields the key, value and cached hash of each key, reading one record at a time
+        """
+        capacity = self._capacity
+        for i in range(capacity):
+            hash, offset, key_length, value_length = self._slot(i)
+            if offset > _TOMBSTONE:
+                yield (self._key_at(offset, key_length),
+                       self._value_at(offset, key_length, value_length), hash)
+                # A resize re-places the slots of the remapped index
+                if self._capacity != capacity:
+                    raise RuntimeError("hash map resized during iteration")
+
+    def keys(self):
+        """
+        Returns a generator over the keys in the hash map, which reads only
+        the keys of the records, not their pickled values.
+        """
+        capacity = self._capacity
+        for i in range(capacity):
+            _, offset, key_length, _ = self._slot(i)
+            if offset > _TOMBSTONE:
+                yield self._key_at(offset, key_length)
+                if self._capacity != capacity:
+                    raise RuntimeError("hash map resized during iteration")
+
+    def __getstate__(self) -> dict:
+        """
+        A memory-mapped map lives in its files; reopen it from its path instead.
+        """
+        raise TypeError("a memory-mapped HashMap cannot be pickled; save() it "
+                        "or reopen it from its path")
+
+    def __iter__(self):
+        """
+        Yields a HashEntry for each live slot.
+        """
+        for key, value, _ in self._entries():
+            yield HashEntry(key, value)
+
+
+# ------------------- BASIC TESTING ---------------------------------------- #
+
+if __name__ == "__main__":
+
+    import multiprocessing
+    import shutil
+    import tempfile
+
+    directory = tempfile.mkdtemp()
+    path = os.path.join(directory, 'table.idx')
+
+    print("\nTest Case - put test 1")
+    print("-------------------")
+    m = HashMap(path, hash_function_1, 53)
+    for i in range(150):
+        m.put('str' + str(i), i * 100)
+        if i % 25 == 24:
+            print(m.empty_buckets(), round(m.table_load(), 2),
+                  m.get_size(), m.get_capacity())
+
+    print("\nTest Case - reopen test 1")
+    print("-------------------")
+    m.remove('str0')
+    m.put('str1', {'nested': [1, 2]})
+    m.increment('str2', 1)
+    m.close()
+    with HashMap(path, hash_function_1) as m:
+        print(m.get_size(), m.get_capacity(), m.get('str0'), m.get('str1'),
+              m.get('str2'), m.get('str149'), m.contains_key('str150'))
+
+    print("\nTest Case - read-only test 1")
+    print("-------------------")
+
+    def lookup(key: str) -> object:
+        with HashMap(path, hash_function_1, readonly=True) as shared:
+            return shared.get(key)
+
+    with multiprocessing.get_context().Pool(2) as pool:
+        print(pool.map(lookup, ['str3', 'str4', 'missing']))
+    with HashMap(path, hash_function_1, readonly=True) as m:
+        try:
+            m.put('str3', 0)
+        except PermissionError:
+            print('read-only')
+    try:
+        HashMap(path, hash_function_2)
+    except ValueError:
+        print('wrong hash function')
+    shutil.rmtree(directory)
@@ -2,68 +2,164 @@
 # Date: 12/2/2022
 # Description: A HashMap implementation using quadratic probing for collision resolution.
 #           It includes the following methods: put(), get(), remove(), contains_key(),
-#           clear(), empty_buckets(), resize_table(), table_load(), get_keys(), __iter__(), __next__().
-
-
-from ds import (DynamicArray, DynamicArrayException, HashEntry,
-                hash_function_1, hash_function_2)
-
-
-class HashMap:
-    def __init__(self, capacity: int, function) -> None:
+#           clear(), empty_buckets(), resize_table(), table_load(), get_keys(), __iter__().
+#           keys(), values() and items() return independent generators over the table.
+#           upsert(), setdefault(), increment() and pop() update a key with a single probe.
+#           Passing storage="arrays" selects ArrayHashMap, which keeps the table in
+#           parallel flat arrays instead of one HashEntry object per slot.
+#           Passing probing="triangular" selects TriangularHashMap, which uses a power-of-two
+#           capacity and triangular probing that visits every slot, allowing loads up to 0.95.
+#           Passing probing="robin_hood" selects RobinHoodHashMap, which uses Robin Hood
+#           linear probing with backward-shift deletion and runs at load factors up to 0.95.
+#           Passing probing="cuckoo" selects CuckooHashMap, whose lookups check a bounded
+#           number of slots: one per hash function (way) plus a small stash.
+#           enable_stats() and get_stats() (from ds.StatsMixin) count operations and probe steps.
+#           save(), load() and pickling (from snapshot.SnapshotMixin) store the map in a binary snapshot.
+
+
+import secrets
+import time
+from array import array
+from random import randrange
+
+from ds import (DynamicArray, DynamicArrayException, HashEntry, StatsMixin, as_list,
+                backing_list, hash_function_1, hash_function_2, is_prime, next_prime)
+from hash_functions import finalized, fmix64
+from snapshot import SnapshotMixin
+
+# Control byte values used by ArrayHashMap for the state of each slot
+_EMPTY = 0
+_TOMBSTONE = 1
+_FULL = 2
+
+# Cached hashes are stored as unsigned 64-bit integers
+_HASH_MASK = 0xFFFFFFFFFFFFFFFF
+
+# Number of old slots moved to the new table per operation during an
+# incremental resize
+_MIGRATION_STEP = 4
+
+# Cuckoo hashing: evictions in one insert before the homeless entry goes to
+# the stash, stash entries allowed before the table is rebuilt, and seed sets
+# tried per rebuild
+_MAX_KICKS = 100
+_STASH_SIZE = 4
+_MAX_REBUILDS = 4
+
+# Left in an old table slot by an incremental resize once its entry has moved
+_MIGRATED = HashEntry(None, None)
+_MIGRATED.is_tombstone = True
+
+
+class HashMap(StatsMixin, SnapshotMixin):
+    # Default and highest allowed max_load: quadratic probing is only
+    # guaranteed to find a free slot while less than half the table is occupied
+    _DEFAULT_MAX_LOAD = 0.5
+    _MAX_LOAD_LIMIT = 0.5
+    # Slots per home position: a probe starts at a single slot
+    _HOME_WIDTH = 1
+
+    def __new__(cls, *args, storage: str = "entries", probing: str = "quadratic", **kwargs):
+        """
+        Dispatch to ArrayHashMap when storage="arrays" is requested, and to
+        TriangularHashMap, RobinHoodHashMap or CuckooHashMap when
+        probing="triangular", "robin_hood" or "cuckoo" is requested
+        """
+        if cls is HashMap and probing == "triangular":
+            cls = TriangularHashMap
+        elif cls is HashMap and probing == "robin_hood":
+            cls = RobinHoodHashMap
+        elif cls is HashMap and probing == "cuckoo":
+            cls = CuckooHashMap
+        elif cls is HashMap and storage == "arrays":
+            cls = ArrayHashMap
+        return super().__new__(cls)
+
+    def __init__(self, capacity: int, function, *, storage: str = "entries",
+                 incremental: bool = False, max_load: float = None,
+                 shrink_load: float = None, probing: str = "quadratic") -> None:
         """
         Initialize new HashMap that uses
-        quadratic probing for collision resolution
+        quadratic probing for collision resolution.
+        With incremental=True, growing the table moves the old slots over a
+        few at a time on each operation instead of all at once.
+        The table doubles once live entries and tombstones fill max_load of it.
+        If shrink_load is given, the table halves (never below the initial
+        capacity) once removals drop the load factor below it; it must be under
+        max_load / 2 so that a shrink cannot immediately be followed by a grow.
         """
-        self._buckets = DynamicArray()
-
-        # capacity must be a prime number
-        self._capacity = self._next_prime(capacity)
-        for _ in range(self._capacity):
-            self._buckets.append(None)
+        if storage not in ("entries", "arrays"):
+            raise ValueError(f"unknown storage mode: {storage!r}")
+        if probing not in ("quadratic", "triangular", "robin_hood", "cuckoo"):
+            raise ValueError(f"unknown probing strategy: {probing!r}")
+        if max_load is None:
+            max_load = self._DEFAULT_MAX_LOAD
+        if not 0 < max_load <= self._MAX_LOAD_LIMIT:
+            raise ValueError(f"max_load must be greater than 0 and at most {self._MAX_LOAD_LIMIT}")
+        if shrink_load is not None and not 0 < shrink_load < max_load / 2:
+            raise ValueError("shrink_load must be between 0 and max_load / 2")
+        self._max_load = max_load
+        self._shrink_load = shrink_load
+
+        self._capacity = self._table_capacity(capacity)
+        self._min_capacity = self._capacity
+        self._allocate(self._capacity)
 
         self._hash_function = function
         self._size = 0
+        self._tombstones = 0
+        self._last_resize_time = 0.0
+
+        # State of an in-progress incremental resize; _old_buckets is None
+        # when no resize is in progress
+        self._incremental = incremental
+        self._old_buckets = None
+        self._old_capacity = 0
+        self._migrate_index = 0
+
+    @staticmethod
+    def _new_buckets(capacity: int) -> DynamicArray:
+        """
+        Returns an empty table of capacity slots, allocated in one step so
+        that starting a resize does not pause for a slot-by-slot loop
+        """
+        return DynamicArray([None] * capacity)
+
+    def _allocate(self, capacity: int) -> None:
+        """
+        Create an empty table of the given capacity
+        """
+        self._buckets = self._new_buckets(capacity)
 
     def __str__(self) -> str:
         """
         Override string method to provide more readable output
         """
+        self._finish_migration()
         out = ''
         for i in range(self._buckets.length()):
             out += str(i) + ': ' + str(self._buckets[i]) + '\n'
         return out
 
+    def _table_capacity(self, capacity: int) -> int:
+        """
+        Returns the table capacity to use for a requested capacity:
+        the capacity must be a prime number
+        """
+        return self._next_prime(capacity)
+
     def _next_prime(self, capacity: int) -> int:
         """
         Increment from given number to find the closest prime number
         """
-        if capacity % 2 == 0:
-            capacity += 1
-
-        while not self._is_prime(capacity):
-            capacity += 2
-
-        return capacity
+        return next_prime(capacity)
 
     @staticmethod
     def _is_prime(capacity: int) -> bool:
         """
         Determine if given integer is a prime number and return boolean
         """
-        if capacity == 2 or capacity == 3:
-            return True
-
-        if capacity == 1 or capacity % 2 == 0:
-            return False
-
-        factor = 3
-        while factor ** 2 <= capacity:
-            if capacity % factor == 0:
-                return False
-            factor += 2
-
-        return True
+        return is_prime(capacity)
 
     def get_size(self) -> int:
         """
@@ -77,16 +173,82 @@ class HashMap:
         """
         return self._capacity
 
-    def _quadratic_probe(self, key, index):
+    def get_hash_function(self) -> callable:
+        """
+        Return hash function of map
+        """
+        return self._hash_function
+
+    def get_last_resize_time(self) -> float:
+        """
+        Return the duration in seconds of the most recent resize_table() call
+        """
+        return self._last_resize_time
+
+    def _find(self, key, hash: int) -> (int, int):
+        """
+        Quadratic probe for key, continuing past tombstones until an empty slot.
+        Returns the index of the live entry holding key (-1 if there is none),
+        and the slot where key would be inserted: the first tombstone passed,
+        otherwise the empty slot that ended the probe.
+        Entries whose cached hash differs from hash are skipped without comparing keys.
+        """
+        buckets, capacity = self._buckets, self._capacity
+        index = hash % capacity
+        free = -1
+        for j in range(capacity):
+            index_qp = (index + j * j) % capacity
+            entry = buckets[index_qp]
+            if entry is None:
+                return -1, (index_qp if free < 0 else free)
+            if entry.is_tombstone:
+                if free < 0:
+                    free = index_qp
+            elif entry.hash == hash and entry.key == key:
+                return index_qp, free
+        return -1, free
+
+    def _home_slot(self, hash: int) -> int:
+        """
+        Returns the slot a probe for a key with the given hash starts at
+        """
+        return hash % self._capacity
+
+    def _probe_length(self, key, hash: int) -> int:
         """
-        Performs quadratic probing.
+        Returns the number of slots a lookup of key inspects in the current
+        table, for the stats.
         """
-        j = 1
-        index_qp = (index + (j ** 2)) % self._capacity
-        while self._buckets[index_qp] is not None and self._buckets[index_qp].key != key:
-            index_qp = (index + (j ** 2)) % self._capacity
-            j += 1
-        return index_qp
+        buckets, capacity = self._buckets, self._capacity
+        index = hash % capacity
+        for j in range(capacity):
+            entry = buckets[(index + j * j) % capacity]
+            if entry is None or (not entry.is_tombstone and entry.hash == hash
+                                 and entry.key == key):
+                return j + 1
+        return capacity
+
+    def _find_many(self, keys: list, hashes: list):
+        """
+        Yields, for each key of keys and its hash in hashes, the index of the
+        live entry holding it in the current table, or -1. The probe of _find()
+        is inlined and the slots are read from the table's backing list, so a
+        batch does not pay a method call per key. The table is read as each
+        index is yielded, so the caller may remove the entry first.
+        """
+        buckets, capacity = backing_list(self._buckets), self._capacity
+        for key, hash in zip(keys, hashes):
+            index = hash % capacity
+            found = -1
+            for j in range(capacity):
+                index_qp = (index + j * j) % capacity
+                entry = buckets[index_qp]
+                if entry is None:
+                    break
+                if not entry.is_tombstone and entry.hash == hash and entry.key == key:
+                    found = index_qp
+                    break
+            yield found
 
     def put(self, key: str, value: object) -> None:
         """
@@ -94,37 +256,89 @@ class HashMap:
         the hash map, its associated value is replaced with the new value. If the given key is
         not in the hash map, a new key/value pair is added.
         """
-        if self.table_load() >= 0.5:
-            self.resize_table(self._capacity * 2)
+        self._put(key, value, self._hash_function(key))
 
-        # Compute initial index
-        hash = self._hash_function(key)
-        index = hash % self._capacity
-
-        # If the hash table array at initial index is empty, insert the element there and stop
-        if self._buckets[index] == None:
-            self._buckets[index] = HashEntry(key, value)
-            self._size += 1
-
-        # If the key exists, replace with new value
-        elif self._buckets[index].key == key:
-            self._buckets[index].value = value
-            if self._buckets[index].is_tombstone is True:
-                self._buckets[index].is_tombstone = False
-                self._size += 1
+    def _put(self, key: str, value: object, hash: int) -> None:
+        """
+        Performs put() given the already computed hash of key.
+        """
+        self._find_or_insert(key, hash)[0].value = value
+
+    def _find_or_insert(self, key: str, hash: int, default: object = None) -> (object, bool):
+        """
+        Returns the slot holding key, inserting key with the value default if
+        it is not in the hash map, and whether it was inserted. The slot is
+        found with a single probe; _slot_value() and _set_slot_value() read
+        and update its value in place.
+        """
+        if self._old_buckets is not None:
+            self._migrate_step()
+
+        # Tombstones lengthen probes just like live entries, so they count
+        # towards the threshold
+        if self.occupied_load() >= self._max_load:
+            self._grow_or_compact()
+
+        # A key not yet migrated is updated where it is
+        if self._old_buckets is not None:
+            old_index = self._old_find(key, hash)
+            if old_index >= 0:
+                return self._old_buckets[old_index], False
+
+        # Probe until we find either the element we’re looking for, or an empty spot
+        index, free = self._find(key, hash)
+        if index >= 0:
+            return self._buckets[index], False
+
+        # Otherwise insert, reusing the first tombstone on the probe path if any
+        if self._buckets[free] is not None:
+            self._tombstones -= 1
+        entry = HashEntry(key, default, hash)
+        self._buckets[free] = entry
+        self._size += 1
+        return entry, True
+
+    @staticmethod
+    def _slot_value(slot: HashEntry) -> object:
+        """
+        Returns the value in a slot returned by _find_or_insert()
+        """
+        return slot.value
+
+    @staticmethod
+    def _set_slot_value(slot: HashEntry, value: object) -> None:
+        """
+        Sets the value in a slot returned by _find_or_insert()
+        """
+        slot.value = value
+
+    def _grow_or_compact(self) -> None:
+        """
+        Makes room once live entries and tombstones reach max_load: if
+        tombstones take up at least half of that, they are cleared by rehashing
+        at the same capacity, otherwise the capacity is doubled.
+        """
+        if self.table_load() < self._max_load / 2:
+            new_capacity = self._capacity
         else:
-            # Probe until we find either the element we’re looking for, or an empty spot
-            index_qp = self._quadratic_probe(key, index)
-            # If spot is empty, create hash entry
-            if self._buckets[index_qp] is None:
-                self._buckets[index_qp] = HashEntry(key, value)
-                self._size += 1
-            # If not, replace with new value
-            else:
-                self._buckets[index_qp].value = value
-                if self._buckets[index_qp].is_tombstone is True:
-                    self._buckets[index_qp].is_tombstone = False
-                    self._size += 1
+            new_capacity = self._capacity * 2
+
+        if self._incremental:
+            self._start_migration(new_capacity)
+        else:
+            self.resize_table(new_capacity)
+
+    def occupied_load(self) -> float:
+        """
+        Returns the fraction of slots holding a live entry or a tombstone.
+        """
+        return (self._size + self._tombstones) / self._capacity
+
+    def compact(self) -> None:
+        """
+        Clears every tombstone by rehashing the live entries at the current capacity.
+        """
+        self.resize_table(self._capacity)
 
     def table_load(self) -> float:
         """
@@ -136,9 +350,10 @@ class HashMap:
         """
         Returns the number of empty buckets in the hash table.
         """
+        self._finish_migration()
         empty_count = 0
-        for i in range(self._buckets.length()):
-            if self._buckets[i] is None:
+        for entry in self._buckets:
+            if entry is None:
                 empty_count += 1
         return empty_count
 
@@ -149,163 +364,1364 @@ class HashMap:
         if new_capacity < self._size:
             return
 
-        if self._is_prime(new_capacity) is False:
-            new_capacity = self._next_prime(new_capacity)
+        self._finish_migration()
+
+        new_capacity = self._table_capacity(new_capacity)
+        new_capacity = self._grow_for_load(new_capacity)
+
+        start = time.perf_counter()
 
-        # new_hash_map = HashMap(new_capacity, self._hash_function)
         # initialize new buckets
-        new_buckets = DynamicArray()
-        for _ in range(new_capacity):
-            new_buckets.append(None)
+        new_buckets = self._new_buckets(new_capacity)
 
         old_buckets = self._buckets
 
         self._buckets = new_buckets
         self._capacity = new_capacity
-        self._size = 0
+        self._tombstones = 0
+        self._rehash(old_buckets)
+
+        self._last_resize_time = time.perf_counter() - start
+
+    def _grow_for_load(self, new_capacity: int) -> int:
+        """
+        Grow a resize target up front to where re-inserting every key through
+        put() would have ended up, rather than resizing again mid-rehash
+        """
+        while self._size > 1 and (self._size - 1) / new_capacity >= self._max_load:
+            new_capacity = self._table_capacity(new_capacity * 2)
+        return new_capacity
+
+    def _rehash(self, old_buckets: DynamicArray) -> None:
+        """
+        Moves every live entry of old_buckets into the current buckets.
+        Keys are already unique and the cached hash is reused, so the existing
+        HashEntry objects are placed in the first empty probe slot without
+        duplicate checks or load checks. Tombstones are dropped.
+        """
+        buckets, capacity = self._buckets, self._capacity
+        for entry in old_buckets:
+            if entry is None or entry.is_tombstone:
+                continue
+            index = entry.hash % capacity
+            index_qp, j = index, 1
+            while buckets[index_qp] is not None:
+                index_qp = (index + j * j) % capacity
+                j += 1
+            buckets[index_qp] = entry
+
+    def _start_migration(self, new_capacity: int) -> None:
+        """
+        Begins an incremental resize: a new table becomes the insert target
+        and the current one is kept as the old table until it is emptied.
+        """
+        self._finish_migration()
+        start = time.perf_counter()
 
-        for i in range(old_buckets.length()):
-            if old_buckets[i] is not None:
-                if old_buckets[i].is_tombstone is False:
-                    self.put(old_buckets[i].key, old_buckets[i].value)
+        new_capacity = self._table_capacity(new_capacity)
+        new_buckets = self._new_buckets(new_capacity)
+
+        self._old_buckets = self._buckets
+        self._old_capacity = self._capacity
+        self._migrate_index = 0
+        self._buckets = new_buckets
+        self._capacity = new_capacity
+        self._tombstones = 0
+
+        self._last_resize_time = time.perf_counter() - start
+
+    def _migrate_step(self, steps: int = _MIGRATION_STEP) -> None:
+        """
+        Moves the live entries of the next few old slots into the new table,
+        dropping the old table once every slot has been moved. Moved slots are
+        left as tombstones so probes for the remaining old keys still pass them.
+        """
+        old_buckets, buckets = self._old_buckets, self._buckets
+        end = min(self._migrate_index + steps, self._old_capacity)
+        for i in range(self._migrate_index, end):
+            entry = old_buckets[i]
+            if entry is None or entry.is_tombstone:
+                continue
+            old_buckets[i] = _MIGRATED
+
+            # The key is not live in the new table, so it goes in the first
+            # tombstone or empty slot on its probe path
+            _, free = self._find(entry.key, entry.hash)
+            if buckets[free] is not None:
+                self._tombstones -= 1
+            buckets[free] = entry
+        self._migrate_index = end
+
+        if end == self._old_capacity:
+            self._old_buckets = None
+
+    def _finish_migration(self) -> None:
+        """
+        Completes any in-progress incremental resize.
+        """
+        if self._old_buckets is not None:
+            self._migrate_step(self._old_capacity)
+
+    def _old_find(self, key, hash: int) -> int:
+        """
+        Returns the index of the live entry for key in the old table, or -1.
+        """
+        old_buckets, capacity = self._old_buckets, self._old_capacity
+        index = hash % capacity
+        for j in range(capacity):
+            entry = old_buckets[(index + j * j) % capacity]
+            if entry is None:
+                return -1
+            if not entry.is_tombstone and entry.hash == hash and entry.key == key:
+                return (index + j * j) % capacity
+        return -1
 
     def get(self, key: str) -> object:
         """
         Returns the value associated with the given key.
         """
-        # Compute the hash
-        hash = self._hash_function(key)
-        index = hash % self._capacity
-        if self._buckets[index] is None:
-            return None
+        return self._get(key, self._hash_function(key))
 
-        if self._buckets[index].is_tombstone:
+    def _get(self, key: str, hash: int) -> object:
+        """
+        Performs get() given the already computed hash of key.
+        """
+        if self._old_buckets is not None:
+            self._migrate_step()
+        if self._old_buckets is not None:
+            old_index = self._old_find(key, hash)
+            if old_index >= 0:
+                return self._old_buckets[old_index].value
+
+        index, _ = self._find(key, hash)
+        if index < 0:
             return None
-
-        # If the index location is not empty, check to see if key is there
-        # If it's not there, use quadratic probing to see if it's displaced
-        if self._buckets[index] is not None:
-            if self._buckets[index].key == key:
-                return self._buckets[index].value
-            else:
-                # Probe until we find either the element we’re looking for, or an empty spot
-                index_qp = self._quadratic_probe(key, index)
-
-                if self._buckets[index_qp] is None:
-                    return None
-                if self._buckets[index_qp].key == key:
-                    return self._buckets[index_qp].value
-                if self._buckets[index_qp].key != key:
-                    return None
+        return self._buckets[index].value
 
     def contains_key(self, key: str) -> bool:
         """
         Returns True if the given key is in the hash map. False otherwise.
         """
-        hash = self._hash_function(key)
-        index = hash % self._capacity
-        if self._buckets[index] is None:
-            return False
-
-        if self._buckets[index].is_tombstone:
-            return False
+        return self._contains(key, self._hash_function(key))
 
-        if self._buckets[index] is not None:
-            if self._buckets[index].key == key:
-                return True
-            else:
-                # Probe until we find either the element we’re looking for, or an empty spot
-                index_qp = self._quadratic_probe(key, index)
+    def _contains(self, key: str, hash: int) -> bool:
+        """
+        Performs contains_key() given the already computed hash of key.
+        """
+        if self._old_buckets is not None and self._old_find(key, hash) >= 0:
+            return True
 
-                if self._buckets[index_qp] is None:
-                    return False
-                if self._buckets[index_qp].key == key:
-                    return True
-                if self._buckets[index_qp].key != key:
-                    return False
+        index, _ = self._find(key, hash)
+        return index >= 0
 
     def remove(self, key: str) -> None:
         """
         Removes the given key and its associated value from the hash map.
         """
+        self._remove(key, self._hash_function(key))
+
+    def _remove(self, key: str, hash: int) -> None:
+        """
+        Performs remove() given the already computed hash of key.
+        """
+        self._pop(key, hash)
+
+    def upsert(self, key: str, function: callable, default: object = None) -> object:
+        """
+        Sets the value of key to function(value), where value is the current
+        value of key, or default if key is not in the hash map, and returns the
+        new value. The slot is found once; function must not modify the map.
+        """
         hash = self._hash_function(key)
-        index = hash % self._capacity
-        # if self.contains_key(key) is False:
-        #     return
-        if self._buckets[index] is None:
-            return
-        if self._buckets[index].key == key:
-            if self._buckets[index].is_tombstone is True:
-                return
-            self._buckets[index].is_tombstone = True
-            self._size -= 1
-        else:
-            # Probe until we find either the element we’re looking for, or an empty spot
-            index_qp = self._quadratic_probe(key, index)
-
-            if self._buckets[index_qp] is None:
-                return
-            if self._buckets[index_qp].key != key:
-                return
-            if self._buckets[index_qp].key == key:
-                if self._buckets[index_qp].is_tombstone is True:
-                    return
-                self._buckets[index_qp].is_tombstone = True
+        slot, inserted = self._find_or_insert(key, hash, default)
+        try:
+            value = function(self._slot_value(slot))
+        except BaseException:
+            if inserted:
+                self._remove(key, hash)
+            raise
+        self._set_slot_value(slot, value)
+        return value
+
+    def setdefault(self, key: str, default: object = None) -> object:
+        """
+        Returns the value of key, first inserting key with the value default
+        if it is not in the hash map.
+        """
+        return self._slot_value(self._find_or_insert(key, self._hash_function(key), default)[0])
+
+    def increment(self, key: str, delta: int = 1) -> int:
+        """
+        Adds delta to the value of key, which starts at 0 if key is not in the
+        hash map, and returns the new value.
+        """
+        return self._increment(key, delta, self._hash_function(key))
+
+    def _increment(self, key: str, delta: int, hash: int) -> int:
+        """
+        Performs increment() given the already computed hash of key.
+        """
+        slot = self._find_or_insert(key, hash, 0)[0]
+        value = self._slot_value(slot) + delta
+        self._set_slot_value(slot, value)
+        return value
+
+    def pop(self, key: str, default: object = None) -> object:
+        """
+        Removes the given key and returns its value, or returns default if the
+        key is not in the hash map.
+        """
+        return self._pop(key, self._hash_function(key), default)
+
+    def _pop(self, key: str, hash: int, default: object = None) -> object:
+        """
+        Performs pop() given the already computed hash of key.
+        """
+        if self._old_buckets is not None:
+            self._migrate_step()
+        if self._old_buckets is not None:
+            old_index = self._old_find(key, hash)
+            if old_index >= 0:
+                entry = self._old_buckets[old_index]
+                entry.is_tombstone = True
                 self._size -= 1
+                self._shrink_if_sparse()
+                return entry.value
+
+        index, _ = self._find(key, hash)
+        if index < 0:
+            return default
+        value = self._buckets[index].value
+        self._clear_slot(index)
+        self._size -= 1
+        self._shrink_if_sparse()
+        return value
+
+    def _clear_slot(self, index: int) -> None:
+        """
+        Removes the live entry at index of the current table, leaving a
+        tombstone. The caller updates the size.
+        """
+        backing_list(self._buckets)[index].is_tombstone = True
+        self._tombstones += 1
+
+    def _shrink_if_sparse(self) -> None:
+        """
+        Halves the capacity once the load factor drops below shrink_load, as
+        many times as needed after a batch of removals
+        """
+        if (self._shrink_load is not None and self.table_load() < self._shrink_load
+                and self._capacity > self._min_capacity):
+            new_capacity = max(self._capacity // 2, self._min_capacity)
+            while (new_capacity > self._min_capacity
+                   and self._size / new_capacity < self._shrink_load):
+                new_capacity = max(new_capacity // 2, self._min_capacity)
+            if self._incremental:
+                self._start_migration(new_capacity)
+            else:
+                self.resize_table(new_capacity)
 
     def clear(self) -> None:
         """
         Clears the contents of the hash map.
         """
-        self._buckets = DynamicArray()
-        for _ in range(self._capacity):
-            self._buckets.append(None)
+        self._allocate(self._capacity)
         self._size = 0
+        self._tombstones = 0
+        self._old_buckets = None
+
+    def _reserve(self, count: int) -> None:
+        """
+        Resizes once, if needed, so that count more keys can be added
+        without put() triggering a resize
+        """
+        new_capacity = self._capacity
+        while (self._size + self._tombstones + count) / new_capacity >= self._max_load:
+            new_capacity *= 2
+        if new_capacity != self._capacity:
+            self.resize_table(new_capacity)
+
+    def put_many(self, pairs) -> None:
+        """
+        Puts every (key, value) tuple of pairs, a DynamicArray or any iterable.
+        The table is sized once for the whole batch and every key is hashed up
+        front, so no resize happens part way through.
+        """
+        pairs = as_list(pairs)
+        hashes = list(map(self._hash_function, [pair[0] for pair in pairs]))
+        self._reserve(len(pairs))
+        _put = self._put
+        for (key, value), hash in zip(pairs, hashes):
+            _put(key, value, hash)
+
+    def get_many(self, keys) -> DynamicArray:
+        """
+        Returns a dynamic array holding the value of each key in keys,
+        or None for keys that are not in the hash map. Every key is hashed up
+        front and any incremental resize is finished once for the whole batch.
+        """
+        keys = as_list(keys)
+        hashes = list(map(self._hash_function, keys))
+        self._finish_migration()
+        if self._counting():
+            _get = self._get
+            return DynamicArray([_get(key, hash) for key, hash in zip(keys, hashes)])
+
+        buckets = backing_list(self._buckets)
+        return DynamicArray([None if index < 0 else buckets[index].value
+                             for index in self._find_many(keys, hashes)])
+
+    def contains_many(self, keys) -> DynamicArray:
+        """
+        Returns a dynamic array holding contains_key() of each key in keys.
+        """
+        keys = as_list(keys)
+        hashes = list(map(self._hash_function, keys))
+        self._finish_migration()
+        if self._counting():
+            _contains = self._contains
+            return DynamicArray([_contains(key, hash) for key, hash in zip(keys, hashes)])
+
+        return DynamicArray([index >= 0 for index in self._find_many(keys, hashes)])
+
+    def remove_many(self, keys) -> None:
+        """
+        Removes every key in keys from the hash map. The table shrinks at
+        most once, after the whole batch.
+        """
+        keys = as_list(keys)
+        hashes = list(map(self._hash_function, keys))
+        self._finish_migration()
+        if self._counting():
+            _remove = self._remove
+            for key, hash in zip(keys, hashes):
+                _remove(key, hash)
+            return
+
+        clear_slot = self._clear_slot
+        removed = 0
+        for index in self._find_many(keys, hashes):
+            if index >= 0:
+                clear_slot(index)
+                removed += 1
+        self._size -= removed
+        self._shrink_if_sparse()
+
+    def tombstone_count(self) -> int:
+        """
+        Returns the number of tombstones in the hash table.
+        """
+        self._finish_migration()
+        return self._tombstones
+
+    def probe_lengths(self) -> DynamicArray:
+        """
+        Returns a dynamic array holding, for each key in the hash map, the number
+        of slots a successful lookup inspects before reaching it (1 for its home slot).
+        """
+        self._finish_migration()
+        output_da = DynamicArray()
+        capacity = self._capacity
+        for i, entry in enumerate(self._buckets):
+            if entry is None or entry.is_tombstone:
+                continue
+            index, j = entry.hash % capacity, 0
+            while (index + j * j) % capacity != i:
+                j += 1
+            output_da.append(j + 1)
+        return output_da
 
     def get_keys_and_values(self) -> DynamicArray:
         """
         Returns a dynamic array where each index contains a tuple of a key/value pair
         stored in the hash map.
         """
+        self._finish_migration()
         output_da = DynamicArray()
-        for i in range(self._buckets.length()):
-            if self._buckets[i] is not None and self._buckets[i].is_tombstone == False:
-                output_da.append(
-                    (self._buckets[i].key, self._buckets[i].value))
+        for entry in self._buckets:
+            if entry is not None and not entry.is_tombstone:
+                output_da.append((entry.key, entry.value))
+        return output_da
+
+    def _entries(self):
+        """
+        Yields the key, value and cached hash of each key, without copying the table
+        """
+        for entry in self:
+            yield entry.key, entry.value, entry.hash
+
+    def keys(self):
+        """
+        Returns a generator over the keys in the hash map. Each call returns
+        an independent generator that walks the table in place.
+        """
+        return (key for key, _, _ in self._entries())
+
+    def values(self):
+        """
+        Returns a generator over the values in the hash map.
+        """
+        return (value for _, value, _ in self._entries())
+
+    def items(self):
+        """
+        Returns a generator over the (key, value) tuples in the hash map.
+        """
+        return ((key, value) for key, value, _ in self._entries())
+
+    def __iter__(self):
+        """
+        Yields the HashEntry of each key. Every loop gets its own generator,
+        so iterations can be nested or interleaved.
+        """
+        self._finish_migration()
+        buckets = self._buckets
+        for entry in buckets:
+            if entry is not None and not entry.is_tombstone:
+                yield entry
+            # A resize moves the entries into a new table
+            if self._buckets is not buckets:
+                raise RuntimeError("hash map resized during iteration")
+
+
+class ArrayHashMap(HashMap):
+    """
+    Open addressing HashMap that stores the table as parallel flat arrays:
+    a bytearray of control bytes (empty/tombstone/full), an array of cached
+    hashes, and plain lists of keys and values. No per-slot objects are
+    allocated, so a large map uses a fraction of the memory of HashMap.
+    """
+
+    _TABLE_ATTRIBUTES = ('_control', '_hashes', '_keys', '_values')
+
+    def __init__(self, capacity: int, function, *, storage: str = "arrays",
+                 incremental: bool = False, max_load: float = None,
+                 shrink_load: float = None, probing: str = "quadratic") -> None:
+        """
+        Initialize new array-backed HashMap that uses
+        quadratic probing for collision resolution
+        """
+        if incremental:
+            raise ValueError("incremental resizing requires storage='entries'")
+        super().__init__(capacity, function, storage=storage,
+                         incremental=incremental, max_load=max_load,
+                         shrink_load=shrink_load, probing=probing)
+
+    def _allocate(self, capacity: int) -> None:
+        """
+        Create empty slot arrays of the given capacity
+        """
+        self._control = bytearray(capacity)
+        self._hashes = array('Q', bytes(8 * capacity))
+        self._keys = [None] * capacity
+        self._values = [None] * capacity
+
+    def __str__(self) -> str:
+        """
+        Override string method to provide more readable output
+        """
+        out = ''
+        for i in range(self._capacity):
+            if self._control[i] == _EMPTY:
+                out += str(i) + ': None\n'
+            else:
+                out += (str(i) + ': K: ' + str(self._keys[i]) +
+                        ' V: ' + str(self._values[i]) +
+                        ' TS: ' + str(self._control[i] == _TOMBSTONE) + '\n')
+        return out
+
+    def _find(self, key, hash: int) -> (int, int):
+        """
+        Quadratic probe for key, continuing past tombstones until an empty slot.
+        Returns the index of the slot holding key (-1 if there is none), and the
+        slot where key would be inserted: the first tombstone passed, otherwise
+        the empty slot that ended the probe.
+        """
+        control, hashes, keys = self._control, self._hashes, self._keys
+        capacity = self._capacity
+        index = hash % capacity
+        free = -1
+        for j in range(capacity):
+            index_qp = (index + j * j) % capacity
+            state = control[index_qp]
+            if state == _EMPTY:
+                return -1, (index_qp if free < 0 else free)
+            if state == _TOMBSTONE:
+                if free < 0:
+                    free = index_qp
+            elif hashes[index_qp] == hash and keys[index_qp] == key:
+                return index_qp, free
+        return -1, free
+
+    def _probe_length(self, key, hash: int) -> int:
+        """
+        Returns the number of slots a lookup of key inspects, for the stats.
+        """
+        control, hashes, keys = self._control, self._hashes, self._keys
+        capacity = self._capacity
+        hash &= _HASH_MASK
+        index = hash % capacity
+        for j in range(capacity):
+            index_qp = (index + j * j) % capacity
+            state = control[index_qp]
+            if state == _EMPTY or (state == _FULL and hashes[index_qp] == hash
+                                   and keys[index_qp] == key):
+                return j + 1
+        return capacity
+
+    def _find_many(self, keys: list, hashes: list):
+        """
+        Yields, for each key of keys and its hash in hashes, the index of the
+        slot holding it, or -1, probing inline as HashMap._find_many() does
+        """
+        control, slot_hashes, slot_keys = self._control, self._hashes, self._keys
+        capacity = self._capacity
+        for key, hash in zip(keys, hashes):
+            hash &= _HASH_MASK
+            index = hash % capacity
+            found = -1
+            for j in range(capacity):
+                index_qp = (index + j * j) % capacity
+                state = control[index_qp]
+                if state == _EMPTY:
+                    break
+                if (state == _FULL and slot_hashes[index_qp] == hash
+                        and slot_keys[index_qp] == key):
+                    found = index_qp
+                    break
+            yield found
+
+    def _find_insert_slot(self, hash: int) -> int:
+        """
+        Quadratic probe for the first slot that is empty or a tombstone
+        """
+        control = self._control
+        capacity = self._capacity
+        index = hash % capacity
+        for j in range(capacity):
+            index_qp = (index + j * j) % capacity
+            if control[index_qp] != _FULL:
+                return index_qp
+        return -1
+
+    def _find_or_insert(self, key: str, hash: int, default: object = None) -> (int, bool):
+        """
+        Returns the index of the slot holding key, inserting key with the value
+        default if it is not in the hash map, and whether it was inserted.
+        """
+        if self.occupied_load() >= self._max_load:
+            self._grow_or_compact()
+
+        hash &= _HASH_MASK
+        index, free = self._find(key, hash)
+        if index >= 0:
+            return index, False
+
+        # Otherwise insert, reusing the first tombstone on the probe path if any
+        if self._control[free] == _TOMBSTONE:
+            self._tombstones -= 1
+        self._control[free] = _FULL
+        self._hashes[free] = hash
+        self._keys[free] = key
+        self._values[free] = default
+        self._size += 1
+        return free, True
+
+    def _put(self, key: str, value: object, hash: int) -> None:
+        """
+        Performs put() given the already computed hash of key.
+        """
+        # The insert may resize, so _values is looked up afterwards
+        index = self._find_or_insert(key, hash)[0]
+        self._values[index] = value
+
+    def _slot_value(self, slot: int) -> object:
+        """
+        Returns the value in the slot at index slot
+        """
+        return self._values[slot]
+
+    def _set_slot_value(self, slot: int, value: object) -> None:
+        """
+        Sets the value in the slot at index slot
+        """
+        self._values[slot] = value
+
+    def empty_buckets(self) -> int:
+        """
+        Returns the number of empty buckets in the hash table.
+        """
+        return self._control.count(_EMPTY)
+
+    def resize_table(self, new_capacity: int) -> None:
+        """
+        Changes the capacity of the internal hash table.
+        """
+        if new_capacity < self._size:
+            return
+
+        new_capacity = self._table_capacity(new_capacity)
+        new_capacity = self._grow_for_load(new_capacity)
+
+        start = time.perf_counter()
+
+        old_control, old_hashes = self._control, self._hashes
+        old_keys, old_values = self._keys, self._values
+
+        self._capacity = new_capacity
+        self._tombstones = 0
+        self._allocate(new_capacity)
+
+        # Cached hashes let entries be placed without calling the hash function
+        for i in range(len(old_control)):
+            if old_control[i] == _FULL:
+                hash = old_hashes[i]
+                index = self._find_insert_slot(hash)
+                self._control[index] = _FULL
+                self._hashes[index] = hash
+                self._keys[index] = old_keys[i]
+                self._values[index] = old_values[i]
+
+        self._last_resize_time = time.perf_counter() - start
+
+    def _get(self, key: str, hash: int) -> object:
+        """
+        Performs get() given the already computed hash of key.
+        """
+        index, _ = self._find(key, hash & _HASH_MASK)
+        if index < 0:
+            return None
+        return self._values[index]
+
+    def _contains(self, key: str, hash: int) -> bool:
+        """
+        Performs contains_key() given the already computed hash of key.
+        """
+        index, _ = self._find(key, hash & _HASH_MASK)
+        return index >= 0
+
+    def _pop(self, key: str, hash: int, default: object = None) -> object:
+        """
+        Performs pop() given the already computed hash of key.
+        """
+        index, _ = self._find(key, hash & _HASH_MASK)
+        if index < 0:
+            return default
+        value = self._values[index]
+        self._clear_slot(index)
+        self._size -= 1
+        self._shrink_if_sparse()
+        return value
+
+    def _clear_slot(self, index: int) -> None:
+        """
+        Removes the key at index, leaving a tombstone. The caller updates the size.
+        """
+        self._control[index] = _TOMBSTONE
+        self._tombstones += 1
+
+    def get_many(self, keys) -> DynamicArray:
+        """
+        Returns a dynamic array holding the value of each key in keys,
+        or None for keys that are not in the hash map.
+        """
+        keys = as_list(keys)
+        hashes = list(map(self._hash_function, keys))
+        if self._counting():
+            _get = self._get
+            return DynamicArray([_get(key, hash) for key, hash in zip(keys, hashes)])
+
+        values = self._values
+        return DynamicArray([None if index < 0 else values[index]
+                             for index in self._find_many(keys, hashes)])
+
+    def tombstone_count(self) -> int:
+        """
+        Returns the number of tombstones in the hash table.
+        """
+        return self._tombstones
+
+    def probe_lengths(self) -> DynamicArray:
+        """
+        Returns a dynamic array holding, for each key in the hash map, the number
+        of slots a successful lookup inspects before reaching it (1 for its home slot).
+        """
+        output_da = DynamicArray()
+        capacity = self._capacity
+        for i in range(capacity):
+            if self._control[i] != _FULL:
+                continue
+            index, j = self._hashes[i] % capacity, 0
+            while (index + j * j) % capacity != i:
+                j += 1
+            output_da.append(j + 1)
+        return output_da
+
+    def get_keys_and_values(self) -> DynamicArray:
+        """
+        Returns a dynamic array where each index contains a tuple of a key/value pair
+        stored in the hash map.
+        """
+        output_da = DynamicArray()
+        control, keys, values = self._control, self._keys, self._values
+        for i in range(self._capacity):
+            if control[i] == _FULL:
+                output_da.append((keys[i], values[i]))
         return output_da
 
+    def _entries(self):
+        """
+        Yields the key, value and cached hash of each key, without copying the table
+        """
+        control, hashes, keys, values = self._control, self._hashes, self._keys, self._values
+        for i in range(self._capacity):
+            if control[i] == _FULL:
+                yield keys[i], values[i], hashes[i]
+                # A resize moves the slots into new arrays
+                if self._control is not control:
+                    raise RuntimeError("hash map resized during iteration")
+
     def __iter__(self):
         """
-        Creates iterator for loop.
+        Yields a HashEntry for each live slot.
         """
-        self.index = 0
-        return self
+        for key, value, _ in self._entries():
+            yield HashEntry(key, value)
+
+
+class TriangularHashMap(HashMap):
+    """
+    Open addressing HashMap with a power-of-two capacity that probes by
+    triangular numbers: the home slot, then 1, 3, 6, 10, ... slots past it.
+    On a power-of-two table this sequence visits every slot exactly once in
+    capacity steps, so a probe always finds a free slot while one exists and
+    the load factor can go well past the 0.5 that quadratic probing on a
+    prime table is limited to. Indexing is a bit mask instead of a modulo,
+    and as a mask only keeps the low bits of a hash, the hash function is
+    followed by a finalizer that mixes every bit into them.
+    """
+
+    _DEFAULT_MAX_LOAD = 0.75
+    # At least one slot must stay empty for probes to terminate
+    _MAX_LOAD_LIMIT = 0.95
+
+    def __init__(self, capacity: int, function, *, storage: str = "entries",
+                 incremental: bool = False, max_load: float = None,
+                 shrink_load: float = None, probing: str = "triangular") -> None:
+        """
+        Initialize new HashMap that uses
+        triangular probing for collision resolution.
+        The capacity is rounded up to a power of two.
+        """
+        if storage != "entries":
+            raise ValueError("triangular probing requires storage='entries'")
+        super().__init__(capacity, finalized(function), storage=storage,
+                         incremental=incremental, max_load=max_load,
+                         shrink_load=shrink_load, probing=probing)
 
-    def __next__(self):
+    def _table_capacity(self, capacity: int) -> int:
         """
-        Obtains next value and advances iterator.
+        Returns the smallest power of two that is at least capacity
         """
-        current_bucket = self._buckets[self.index]
+        return 1 << max(capacity - 1, 1).bit_length()
 
-        if self.index > self._buckets.length() - 1:
-            raise StopIteration
+    def _find(self, key, hash: int) -> (int, int):
+        """
+        Triangular probe for key, continuing past tombstones until an empty slot.
+        Returns the index of the live entry holding key (-1 if there is none),
+        and the slot where key would be inserted: the first tombstone passed,
+        otherwise the empty slot that ended the probe.
+        """
+        buckets, mask = self._buckets, self._capacity - 1
+        index = hash & mask
+        free = -1
+        for j in range(1, self._capacity + 1):
+            entry = buckets[index]
+            if entry is None:
+                return -1, (index if free < 0 else free)
+            if entry.is_tombstone:
+                if free < 0:
+                    free = index
+            elif entry.hash == hash and entry.key == key:
+                return index, free
+            index = (index + j) & mask
+        return -1, free
+
+    def _probe_length(self, key, hash: int) -> int:
+        """
+        Returns the number of slots a lookup of key inspects in the current
+        table, for the stats.
+        """
+        buckets, mask = self._buckets, self._capacity - 1
+        index = hash & mask
+        for j in range(1, self._capacity + 1):
+            entry = buckets[index]
+            if entry is None or (not entry.is_tombstone and entry.hash == hash
+                                 and entry.key == key):
+                return j
+            index = (index + j) & mask
+        return self._capacity
 
-        if current_bucket is not None and current_bucket.is_tombstone is False:
-            self.index += 1
-            return current_bucket
+    def _find_many(self, keys: list, hashes: list):
+        """
+        Yields, for each key of keys and its hash in hashes, the index of the
+        live entry holding it, or -1, probing inline as HashMap._find_many() does
+        """
+        buckets, mask = backing_list(self._buckets), self._capacity - 1
+        for key, hash in zip(keys, hashes):
+            index = hash & mask
+            found = -1
+            for j in range(1, mask + 2):
+                entry = buckets[index]
+                if entry is None:
+                    break
+                if not entry.is_tombstone and entry.hash == hash and entry.key == key:
+                    found = index
+                    break
+                index = (index + j) & mask
+            yield found
+
+    def _rehash(self, old_buckets: DynamicArray) -> None:
+        """
+        Moves every live entry of old_buckets into the first empty slot on its
+        probe path in the current buckets. Tombstones are dropped.
+        """
+        buckets, mask = self._buckets, self._capacity - 1
+        for entry in old_buckets:
+            if entry is None or entry.is_tombstone:
+                continue
+            index, j = entry.hash & mask, 1
+            while buckets[index] is not None:
+                index = (index + j) & mask
+                j += 1
+            buckets[index] = entry
+
+    def _old_find(self, key, hash: int) -> int:
+        """
+        Returns the index of the live entry for key in the old table, or -1.
+        """
+        old_buckets, mask = self._old_buckets, self._old_capacity - 1
+        index = hash & mask
+        for j in range(1, self._old_capacity + 1):
+            entry = old_buckets[index]
+            if entry is None:
+                return -1
+            if not entry.is_tombstone and entry.hash == hash and entry.key == key:
+                return index
+            index = (index + j) & mask
+        return -1
+
+    def probe_lengths(self) -> DynamicArray:
+        """
+        Returns a dynamic array holding, for each key in the hash map, the number
+        of slots a successful lookup inspects before reaching it (1 for its home slot).
+        """
+        self._finish_migration()
+        output_da = DynamicArray()
+        mask = self._capacity - 1
+        for i, entry in enumerate(self._buckets):
+            if entry is None or entry.is_tombstone:
+                continue
+            index, j = entry.hash & mask, 0
+            while index != i:
+                j += 1
+                index = (index + j) & mask
+            output_da.append(j + 1)
+        return output_da
+
+
+class RobinHoodHashMap(HashMap):
+    """
+    Open addressing HashMap that uses Robin Hood linear probing. An insert
+    takes the slot of any entry that is closer to its home slot than the new
+    entry is to its own, which keeps probe lengths short and even at high
+    load factors. Removals shift the following entries back instead of
+    leaving tombstones, and a lookup stops as soon as it meets an entry closer
+    to home than the probe so far, so misses end early.
+    """
+
+    _DEFAULT_MAX_LOAD = 0.85
+    # At least one slot must stay empty for probes to terminate
+    _MAX_LOAD_LIMIT = 0.95
+
+    def __init__(self, capacity: int, function, *, storage: str = "entries",
+                 incremental: bool = False, max_load: float = None,
+                 shrink_load: float = None, probing: str = "robin_hood") -> None:
+        """
+        Initialize new HashMap that uses
+        Robin Hood linear probing for collision resolution
+        """
+        if storage != "entries":
+            raise ValueError("robin_hood probing requires storage='entries'")
+        if incremental:
+            raise ValueError("robin_hood probing does not support incremental resizing")
+        super().__init__(capacity, function, storage=storage,
+                         incremental=incremental, max_load=max_load,
+                         shrink_load=shrink_load, probing=probing)
+
+    def _distance(self, entry: HashEntry, index: int) -> int:
+        """
+        Returns how many slots past its home slot entry sits at index
+        """
+        return (index - entry.hash % self._capacity) % self._capacity
+
+    def _find(self, key, hash: int) -> (int, int):
+        """
+        Linear probe for key. Returns the index of the entry holding key (-1 if
+        there is none), and the slot where key would be inserted: the empty slot
+        or the slot of the first entry closer to home that ended the probe.
+        """
+        buckets, capacity = self._buckets, self._capacity
+        index = hash % capacity
+        for distance in range(capacity):
+            entry = buckets[index]
+            if entry is None:
+                return -1, index
+            if (index - entry.hash % capacity) % capacity < distance:
+                return -1, index
+            if entry.hash == hash and entry.key == key:
+                return index, -1
+            index = (index + 1) % capacity
+        return -1, -1
+
+    def _probe_length(self, key, hash: int) -> int:
+        """
+        Returns the number of slots a lookup of key inspects, for the stats.
+        """
+        buckets, capacity = self._buckets, self._capacity
+        index = hash % capacity
+        for distance in range(capacity):
+            entry = buckets[index]
+            if (entry is None or (index - entry.hash % capacity) % capacity < distance
+                    or (entry.hash == hash and entry.key == key)):
+                return distance + 1
+            index = (index + 1) % capacity
+        return capacity
+
+    def _find_many(self, keys: list, hashes: list):
+        """
+        Yields, for each key of keys and its hash in hashes, the index of the
+        entry holding it, or -1, probing inline as HashMap._find_many() does
+        """
+        buckets, capacity = backing_list(self._buckets), self._capacity
+        for key, hash in zip(keys, hashes):
+            index = hash % capacity
+            found = -1
+            for distance in range(capacity):
+                entry = buckets[index]
+                if entry is None or (index - entry.hash % capacity) % capacity < distance:
+                    break
+                if entry.hash == hash and entry.key == key:
+                    found = index
+                    break
+                index = (index + 1) % capacity
+            yield found
+
+    def _place(self, entry: HashEntry, index: int) -> None:
+        """
+        Stores entry at index, pushing any entry already there (and the ones
+        after it) further along until an empty slot is reached
+        """
+        buckets, capacity = self._buckets, self._capacity
+        distance = self._distance(entry, index)
+        while buckets[index] is not None:
+            resident_distance = self._distance(buckets[index], index)
+            if resident_distance < distance:
+                buckets[index], entry = entry, buckets[index]
+                distance = resident_distance
+            index = (index + 1) % capacity
+            distance += 1
+        buckets[index] = entry
+
+    def _find_or_insert(self, key: str, hash: int, default: object = None) -> (HashEntry, bool):
+        """
+        Returns the entry holding key, inserting key with the value default if
+        it is not in the hash map, and whether it was inserted. Placing the
+        entry may move it and others along the table, but it stays the same
+        object.
+        """
+        if self.table_load() >= self._max_load:
+            self.resize_table(self._capacity * 2)
+
+        index, free = self._find(key, hash)
+        if index >= 0:
+            return self._buckets[index], False
+
+        entry = HashEntry(key, default, hash)
+        self._place(entry, free)
+        self._size += 1
+        return entry, True
+
+    def _rehash(self, old_buckets: DynamicArray) -> None:
+        """
+        Moves every entry of old_buckets into the current buckets without
+        duplicate checks or load checks, reusing the cached hashes
+        """
+        capacity = self._capacity
+        for entry in old_buckets:
+            if entry is not None:
+                self._place(entry, entry.hash % capacity)
+
+    def _pop(self, key: str, hash: int, default: object = None) -> object:
+        """
+        Performs pop() given the already computed hash of key.
+        """
+        index, _ = self._find(key, hash)
+        if index < 0:
+            return default
+        value = self._buckets[index].value
+        self._clear_slot(index)
+        self._size -= 1
+        self._shrink_if_sparse()
+        return value
+
+    def _clear_slot(self, index: int) -> None:
+        """
+        Removes the entry at index. The caller updates the size.
+        """
+        # Backward shift: pull each following displaced entry one slot closer
+        # to home, so no tombstone is needed
+        buckets, capacity = self._buckets, self._capacity
+        next_index = (index + 1) % capacity
+        while buckets[next_index] is not None and self._distance(buckets[next_index], next_index) > 0:
+            buckets[index] = buckets[next_index]
+            index, next_index = next_index, (next_index + 1) % capacity
+        buckets[index] = None
+
+    def probe_lengths(self) -> DynamicArray:
+        """
+        Returns a dynamic array holding, for each key in the hash map, the number
+        of slots a successful lookup inspects before reaching it (1 for its home slot).
+        """
+        output_da = DynamicArray()
+        for i, entry in enumerate(self._buckets):
+            if entry is not None:
+                output_da.append(self._distance(entry, i) + 1)
+        return output_da
+
+
+class CuckooHashMap(HashMap):
+    """
+    Open addressing HashMap that uses cuckoo hashing. A key can only be stored
+    in one of `ways` slots, each chosen by mixing its hash with a per-way seed,
+    or in a small stash, so get() and contains_key() inspect at most
+    ways + _STASH_SIZE entries however full the table is.
+    An insert into occupied slots evicts a resident to one of its other slots,
+    which may evict another, and so on; a chain longer than _MAX_KICKS leaves
+    the last evicted entry in the stash, and once the stash overflows the
+    table is rebuilt with new seeds.
+    """
+
+    _DEFAULT_MAX_LOAD = 0.45
+    _MAX_LOAD_LIMIT = 0.9
+    _TABLE_ATTRIBUTES = ('_buckets', '_old_buckets', '_stash')
+
+    def __init__(self, capacity: int, function, *, storage: str = "entries",
+                 incremental: bool = False, max_load: float = None,
+                 shrink_load: float = None, probing: str = "cuckoo",
+                 ways: int = 2) -> None:
+        """
+        Initialize new HashMap that uses cuckoo hashing with the given number
+        of ways (candidate slots per key) for collision resolution.
+        Above a load factor of about 0.5 with 2 ways, 0.85 with 3 and 0.9 with
+        4 or more, eviction chains get long and rebuilds frequent, so max_load
+        is capped there and defaults to 0.05 below the cap.
+        """
+        if storage != "entries":
+            raise ValueError("cuckoo probing requires storage='entries'")
+        if incremental:
+            raise ValueError("cuckoo probing does not support incremental resizing")
+        if ways < 2:
+            raise ValueError("cuckoo probing needs at least 2 ways")
+        limit = 0.5 if ways == 2 else 0.85 if ways == 3 else 0.9
+        if max_load is None:
+            max_load = limit - 0.05
+        if max_load > limit:
+            raise ValueError(f"max_load must be at most {limit} with {ways} ways")
+
+        self._ways = ways
+        self._seeds = self._new_seeds()
+        self._stash_limit = _STASH_SIZE
+        super().__init__(capacity, function, storage=storage,
+                         incremental=incremental, max_load=max_load,
+                         shrink_load=shrink_load, probing=probing)
+
+    def _allocate(self, capacity: int) -> None:
+        """
+        Create an empty table of the given capacity and an empty stash
+        """
+        super()._allocate(capacity)
+        self._stash = []
+
+    def __str__(self) -> str:
+        """
+        Override string method to provide more readable output
+        """
+        out = super().__str__()
+        for entry in self._stash:
+            out += 'stash: ' + str(entry) + '\n'
+        return out
+
+    def _new_seeds(self) -> list:
+        """
+        Returns a random seed for each way
+        """
+        return [secrets.randbits(64) for _ in range(self._ways)]
+
+    def _slots(self, hash: int) -> list:
+        """
+        Returns the candidate slot of each way for a key with the given hash
+        """
+        capacity = self._capacity
+        return [fmix64(hash ^ seed) % capacity for seed in self._seeds]
+
+    def _find(self, key, hash: int) -> (int, int):
+        """
+        Checks the candidate slots of key. Returns the index of the slot
+        holding key (-1 if there is none), and the first empty candidate slot
+        (-1 if there is none). The stash is not searched.
+        """
+        buckets = self._buckets
+        free = -1
+        for index in self._slots(hash):
+            entry = buckets[index]
+            if entry is None:
+                if free < 0:
+                    free = index
+            elif entry.hash == hash and entry.key == key:
+                return index, free
+        return -1, free
+
+    def _home_slot(self, hash: int) -> int:
+        """
+        Returns the key's slot in the first table, the one a lookup tries first
+        """
+        return self._slots(hash)[0]
+
+    def _probe_length(self, key, hash: int) -> int:
+        """
+        Returns the number of slots, and stash entries, a lookup of key
+        inspects, for the stats.
+        """
+        slots = self._slots(hash)
+        for way, index in enumerate(slots):
+            entry = self._buckets[index]
+            if entry is not None and entry.hash == hash and entry.key == key:
+                return way + 1
+        stash_index = self._stash_find(key, hash)
+        return len(slots) + (stash_index + 1 if stash_index >= 0 else len(self._stash))
+
+    def _stash_find(self, key, hash: int) -> int:
+        """
+        Returns the position of key in the stash, or -1 if it is not there
+        """
+        for i, entry in enumerate(self._stash):
+            if entry.hash == hash and entry.key == key:
+                return i
+        return -1
+
+    def _place(self, entry: HashEntry) -> HashEntry:
+        """
+        Stores entry in one of its candidate slots. If they are all taken,
+        entry evicts the resident of one, which is then placed the same way in
+        one of its other slots. Returns the entry still without a slot after
+        _MAX_KICKS evictions, or None once every entry has a slot.
+        """
+        buckets = self._buckets
+        index = -1
+        for _ in range(_MAX_KICKS):
+            slots = self._slots(entry.hash)
+            for slot in slots:
+                if buckets[slot] is None:
+                    buckets[slot] = entry
+                    return None
+
+            # Random walk: evict from a random candidate slot other than the
+            # one entry was just evicted from, so it never goes straight back
+            way = randrange(self._ways - 1) if index in slots else randrange(self._ways)
+            if index in slots and way >= slots.index(index):
+                way += 1
+            index = slots[way]
+            entry, buckets[index] = buckets[index], entry
+        return entry
+
+    def _find_or_insert(self, key: str, hash: int, default: object = None) -> (HashEntry, bool):
+        """
+        Returns the entry holding key, inserting key with the value default if
+        it is not in the hash map, and whether it was inserted. Evictions and
+        rebuilds may move the entry, but it stays the same object.
+        """
+        if self.table_load() >= self._max_load:
+            self.resize_table(self._capacity * 2)
+
+        index, free = self._find(key, hash)
+        if index >= 0:
+            return self._buckets[index], False
+        stash_index = self._stash_find(key, hash)
+        if stash_index >= 0:
+            return self._stash[stash_index], False
+
+        self._size += 1
+        entry = HashEntry(key, default, hash)
+        if free >= 0:
+            self._buckets[free] = entry
+            return entry, True
+
+        homeless = self._place(entry)
+        if homeless is not None:
+            self._stash.append(homeless)
+            if len(self._stash) > self._stash_limit:
+                self.resize_table(self._capacity)
+        return entry, True
+
+    def resize_table(self, new_capacity: int) -> None:
+        """
+        Changes the capacity of the internal hash table, drawing new seeds.
+        If more entries than fit in the stash are left without a slot, new
+        seeds are drawn again, up to _MAX_REBUILDS times. Keys with equal
+        hashes share all their slots whatever the seeds, so with a weak hash
+        function the last attempt is kept and the stash limit raised above it.
+        """
+        if new_capacity < self._size:
+            return
+
+        new_capacity = self._table_capacity(new_capacity)
+        new_capacity = self._grow_for_load(new_capacity)
+
+        start = time.perf_counter()
+
+        entries = self._stash
+        for entry in self._buckets:
+            if entry is not None:
+                entries.append(entry)
+
+        self._capacity = new_capacity
+        for _ in range(_MAX_REBUILDS):
+            self._seeds = self._new_seeds()
+            self._allocate(new_capacity)
+            for entry in entries:
+                homeless = self._place(entry)
+                if homeless is not None:
+                    self._stash.append(homeless)
+            if len(self._stash) <= _STASH_SIZE:
+                break
+        # Leave headroom so a weak hash function does not force a rebuild on
+        # every further insert
+        self._stash_limit = max(_STASH_SIZE, 2 * len(self._stash))
+
+        self._last_resize_time = time.perf_counter() - start
+
+    def _get(self, key: str, hash: int) -> object:
+        """
+        Performs get() given the already computed hash of key.
+        """
+        index, _ = self._find(key, hash)
+        if index >= 0:
+            return self._buckets[index].value
+        stash_index = self._stash_find(key, hash)
+        if stash_index >= 0:
+            return self._stash[stash_index].value
+        return None
+
+    def _contains(self, key: str, hash: int) -> bool:
+        """
+        Performs contains_key() given the already computed hash of key.
+        """
+        index, _ = self._find(key, hash)
+        return index >= 0 or self._stash_find(key, hash) >= 0
+
+    def _pop(self, key: str, hash: int, default: object = None) -> object:
+        """
+        Performs pop() given the already computed hash of key.
+        """
+        index, _ = self._find(key, hash)
+        if index >= 0:
+            entry = self._buckets[index]
+            self._buckets[index] = None
         else:
-            while current_bucket is None or current_bucket.is_tombstone:
-                self.index += 1
-                current_bucket = self._buckets[self.index]
+            stash_index = self._stash_find(key, hash)
+            if stash_index < 0:
+                return default
+            entry = self._stash.pop(stash_index)
+
+        self._size -= 1
+        self._shrink_if_sparse()
+        return entry.value
+
+    def get_many(self, keys) -> DynamicArray:
+        """
+        Returns a dynamic array holding the value of each key in keys,
+        or None for keys that are not in the hash map. A lookup already
+        inspects at most ways slots and the stash, so each key goes through
+        _get() after every key is hashed up front.
+        """
+        keys = as_list(keys)
+        hashes = map(self._hash_function, keys)
+        _get = self._get
+        return DynamicArray([_get(key, hash) for key, hash in zip(keys, hashes)])
+
+    def contains_many(self, keys) -> DynamicArray:
+        """
+        Returns a dynamic array holding contains_key() of each key in keys.
+        """
+        keys = as_list(keys)
+        hashes = map(self._hash_function, keys)
+        _contains = self._contains
+        return DynamicArray([_contains(key, hash) for key, hash in zip(keys, hashes)])
+
+    def remove_many(self, keys) -> None:
+        """
+        Removes every key in keys from the hash map.
+        """
+        keys = as_list(keys)
+        hashes = map(self._hash_function, keys)
+        _remove = self._remove
+        for key, hash in zip(keys, hashes):
+            _remove(key, hash)
+
+    def stash_size(self) -> int:
+        """
+        Returns the number of entries in the stash.
+        """
+        return len(self._stash)
 
-                if self.index == self._buckets.length() - 1:
-                    raise StopIteration
+    def probe_lengths(self) -> DynamicArray:
+        """
+        Returns a dynamic array holding, for each key in the hash map, the number
+        of slots a successful lookup inspects before reaching it (1 for the slot
+        of the first way). Stash entries come after every candidate slot.
+        """
+        output_da = DynamicArray()
+        for i, entry in enumerate(self._buckets):
+            if entry is not None:
+                output_da.append(self._slots(entry.hash).index(i) + 1)
+        for i in range(len(self._stash)):
+            output_da.append(self._ways + i + 1)
+        return output_da
+
+    def get_keys_and_values(self) -> DynamicArray:
+        """
+        Returns a dynamic array where each index contains a tuple of a key/value pair
+        stored in the hash map.
+        """
+        output_da = super().get_keys_and_values()
+        for entry in self._stash:
+            output_da.append((entry.key, entry.value))
+        return output_da
 
-            # if current_bucket.is_tombstone is False:
-            not_none_bucket = self._buckets[self.index]
+    def __iter__(self):
+        """
+        Yields the HashEntry of each key, including those in the stash.
+        """
+        buckets = self._buckets
+        for entry in buckets:
+            if entry is not None:
+                yield entry
+                # A resize or rebuild places the entries in a new table
+                if self._buckets is not buckets:
+                    raise RuntimeError("hash map resized during iteration")
+        yield from self._stash
 
-            self.index += 1
-            return not_none_bucket
 
 # ------------------- BASIC TESTING ---------------------------------------- #
 
@@ -530,7 +1946,7 @@ if __name__ == "__main__":
     print(m)
     print(m.get_keys_and_values())
 
-    print("\nTest Case - __iter__(), __next__() test 1")
+    print("\nTest Case - __iter__() test 1")
     print("---------------------")
     m = HashMap(10, hash_function_1)
     for i in range(5):
@@ -539,7 +1955,7 @@ if __name__ == "__main__":
     for item in m:
         print('K:', item.key, 'V:', item.value)
 
-    print("\nTest Case - __iter__(), __next__() test 2")
+    print("\nTest Case - __iter__() test 2")
     print("---------------------")
     m = HashMap(10, hash_function_2)
     for i in range(5):
@@ -549,3 +1965,253 @@ if __name__ == "__main__":
     print(m)
     for item in m:
         print('K:', item.key, 'V:', item.value)
+
+    print("\nTest Case - tombstone / compact test 1")
+    print("----------------------")
+    m = HashMap(53, hash_function_2)
+    for i in range(20):
+        m.put('key' + str(i), i)
+    for i in range(15):
+        m.remove('key' + str(i))
+    print(m.get_size(), m.tombstone_count(), round(m.occupied_load(), 2))
+    m.put('key0', 0)
+    print(m.get_size(), m.tombstone_count(), round(m.occupied_load(), 2))
+    m.compact()
+    print(m.get_size(), m.tombstone_count(), m.get_capacity(), m.get('key0'), m.get('key19'))
+
+    print("\nTest Case - incremental resize test 1")
+    print("----------------------")
+    m = HashMap(53, hash_function_1, incremental=True)
+    result = True
+    for i in range(150):
+        m.put('key' + str(i), i * 100)
+        if i % 30 == 0:
+            print(m.get_size(), m.get_capacity())
+    for i in range(150):
+        # all inserted keys must be present
+        result &= m.get('key' + str(i)) == i * 100
+        # NOT inserted keys must be absent
+        result &= not m.contains_key('str' + str(i))
+    print(result, m.get_size(), m.get_capacity())
+
+    print("\nTest Case - storage=\"arrays\" test 1")
+    print("---------------------")
+    m = HashMap(79, hash_function_2, storage="arrays")
+    keys = [i for i in range(1, 1000, 13)]
+    for key in keys:
+        m.put(str(key), key * 42)
+    print(type(m).__name__, m.get_size(), m.get_capacity())
+    m.remove('1')
+    result = not m.contains_key('1')
+    for key in keys[1:]:
+        # all inserted keys must be present
+        result &= m.get(str(key)) == key * 42
+        # NOT inserted keys must be absent
+        result &= not m.contains_key(str(key + 1))
+    print(result, m.get_size(), m.get_capacity(), m.empty_buckets())
+
+    print("\nTest Case - shrink test 1")
+    print("----------------------")
+    m = HashMap(11, hash_function_2, shrink_load=0.1)
+    for i in range(1000):
+        m.put(str(i), i)
+    print(m.get_size(), m.get_capacity())
+    for i in range(0, 1000):
+        m.remove(str(i))
+        if i % 200 == 199:
+            print(m.get_size(), m.get_capacity())
+    print(m.get('999'), m.get_capacity())
+
+    print("\nTest Case - batch API test 1")
+    print("----------------------")
+    m = HashMap(11, hash_function_2)
+    m.put_many(DynamicArray([(str(i), i * 10) for i in range(1, 41)]))
+    print(m.get_size(), m.get_capacity())
+    print(m.get_many(DynamicArray(['1', '2', '40', '41'])))
+    m.remove_many(['1', '2', '3'])
+    print(m.contains_many(['1', '2', '3', '4']), m.get_size())
+
+    print("\nTest Case - probing=\"robin_hood\" test 1")
+    print("----------------------")
+    m = HashMap(11, hash_function_2, probing="robin_hood", max_load=0.9)
+    for i in range(1, 201):
+        m.put(str(i), i * 10)
+    print(type(m).__name__, m.get_size(), m.get_capacity(), round(m.table_load(), 2))
+    for i in range(1, 201, 2):
+        m.remove(str(i))
+    result = m.tombstone_count() == 0
+    for i in range(1, 201):
+        result &= m.get(str(i)) == (i * 10 if i % 2 == 0 else None)
+    print(result, m.get_size(), max(m.probe_lengths()))
+
+    print("\nTest Case - probing=\"cuckoo\" test 1")
+    print("----------------------")
+    for ways in (2, 3):
+        m = HashMap(11, hash_function_2, probing="cuckoo", ways=ways)
+        for i in range(1, 201):
+            m.put(str(i), i * 10)
+        for i in range(1, 201, 2):
+            m.remove(str(i))
+        result = m.get_size() == 100
+        for i in range(1, 201):
+            result &= m.get(str(i)) == (i * 10 if i % 2 == 0 else None)
+            result &= m.contains_key(str(i)) == (i % 2 == 0)
+        # a lookup never inspects more than the candidate slots and the stash
+        result &= max(m.probe_lengths()) <= ways + m.stash_size()
+        print(type(m).__name__, ways, result, m.get_size())
+
+    print("\nTest Case - probing=\"cuckoo\" test 2")
+    print("----------------------")
+    # Anagrams share a hash under hash_function_1, so they all compete for the
+    # same two slots: five end up in the stash, one more than it holds, and
+    # the table is rebuilt with new seeds at the same capacity
+    from itertools import permutations
+    anagrams = [''.join(letters) for letters in permutations('abcd')][:7]
+    m = HashMap(101, hash_function_1, probing="cuckoo")
+    seeds = list(m._seeds)
+    for i, key in enumerate(anagrams):
+        m.put(key, i)
+    result = all(m.get(key) == i for i, key in enumerate(anagrams))
+    print(result, m._seeds != seeds, m.get_capacity(), m.get_size(), m.stash_size())
+
+    print("\nTest Case - probing=\"cuckoo\" test 3")
+    print("----------------------")
+    from hash_functions import fnv1a_64
+    for ways, cap in ((2, 0.5), (3, 0.85), (4, 0.9)):
+        # filled right up to the cap without growing
+        m = HashMap(1009, fnv1a_64, probing="cuckoo", ways=ways, max_load=cap)
+        count = int(m.get_capacity() * cap)
+        for i in range(count):
+            m.put('key' + str(i), i)
+        result = all(m.get('key' + str(i)) == i for i in range(count))
+        result &= max(m.probe_lengths()) <= ways + m.stash_size()
+        try:
+            HashMap(1009, fnv1a_64, probing="cuckoo", ways=ways, max_load=cap + 0.01)
+            result = False
+        except ValueError:
+            pass
+        print(ways, result, m.get_size(), m.get_capacity(), round(m.table_load(), 2))
+
+    print("\nTest Case - probing=\"cuckoo\" test 4")
+    print("----------------------")
+    # Removing keys while some of them are in the stash
+    anagrams = [''.join(letters) for letters in permutations('abc')]
+    m = HashMap(101, hash_function_1, probing="cuckoo")
+    for i, key in enumerate(anagrams):
+        m.put(key, i)
+    print(m.get_size(), m.stash_size())
+    stashed = m._stash[0].key
+    in_table = next(key for key in anagrams if key not in [entry.key for entry in m._stash])
+    m.remove(stashed)
+    print(m.get_size(), m.stash_size(), m.get(stashed))
+    # removing stashed again is a no-op
+    m.remove_many([in_table, stashed])
+    print(m.get_size(), m.stash_size(), m.get(in_table))
+    remaining = [key for key in anagrams if key not in (stashed, in_table)]
+    result = all(m.get(key) == anagrams.index(key) for key in remaining)
+    print(result, sorted(m.keys()) == sorted(remaining))
+
+    print("\nTest Case - probing=\"triangular\" test 1")
+    print("----------------------")
+    m = HashMap(11, hash_function_2, probing="triangular", max_load=0.9)
+    for i in range(1, 201):
+        m.put(str(i), i * 10)
+    print(type(m).__name__, m.get_size(), m.get_capacity())
+    for i in range(1, 201, 2):
+        m.remove(str(i))
+    result = True
+    for i in range(1, 201):
+        # lookups continue past the tombstones left by the removals
+        result &= m.get(str(i)) == (i * 10 if i % 2 == 0 else None)
+    print(result, m.get_size(), m.tombstone_count())
+    # a nearly full table still finds the one free slot left
+    m = HashMap(16, hash_function_1, probing="triangular", max_load=0.95)
+    for i in range(15):
+        m.put('key' + str(i), i)
+    print(m.get_size(), m.get_capacity(), m.empty_buckets(), m.get('key14'))
+
+    print("\nTest Case - upsert/setdefault/increment/pop test 1")
+    print("----------------------")
+    for kwargs in ({}, {'storage': "arrays"}, {'probing': "triangular"},
+                   {'probing': "robin_hood"}, {'probing': "cuckoo"}):
+        m = HashMap(11, hash_function_1, **kwargs)
+        for i in range(300):
+            m.increment('key' + str(i % 100), i)
+        result = m.get('key7') == 7 + 107 + 207 and m.get_size() == 100
+        result &= m.setdefault('key7', 0) == 321 and m.setdefault('new', 'x') == 'x'
+        result &= m.upsert('new', lambda value: value * 2) == 'xx' == m.get('new')
+        result &= m.pop('key7') == 321 and m.pop('key7', -1) == -1
+        print(type(m).__name__, result, m.get_size())
+
+    print("\nTest Case - stats test 1")
+    print("----------------------")
+    for kwargs in ({}, {'storage': "arrays"}, {'probing': "robin_hood"},
+                   {'probing': "cuckoo"}):
+        m = HashMap(11, hash_function_1, **kwargs)
+        m.enable_stats()
+        for i in range(1, 41):
+            m.put('key' + str(i), i)
+        for i in range(1, 51):
+            m.contains_key('key' + str(i))
+        m.remove('key1')
+        stats = m.get_stats()
+        # every put and lookup inspects at least one slot
+        print(type(m).__name__, stats['puts'], stats['gets'], stats['hits'],
+              stats['misses'], stats['removes'], stats['resizes'] > 0,
+              stats['probe_steps'] >= 91)
+
+    print("\nTest Case - save/load test 1")
+    print("----------------------")
+    import os
+    import pickle
+    import tempfile
+    path = os.path.join(tempfile.mkdtemp(), 'table.snap')
+    for kwargs in ({}, {'storage': "arrays"}, {'probing': "triangular"},
+                   {'probing': "robin_hood"}, {'probing': "cuckoo"}):
+        m = HashMap(11, hash_function_2, **kwargs)
+        for i in range(1, 201):
+            m.put('key' + str(i), [i])
+        m.remove('key1')
+        m.save(path)
+        loaded = HashMap.load(path, **kwargs)
+        copied = pickle.loads(pickle.dumps(m))
+        result = type(loaded) is type(copied) is type(m)
+        for i in range(1, 201):
+            result &= loaded.get('key' + str(i)) == copied.get('key' + str(i)) == m.get('key' + str(i))
+        print(type(m).__name__, result, loaded.get_size(), copied.get_size())
+    os.remove(path)
+    os.rmdir(os.path.dirname(path))
+
+    print("\nTest Case - keys/values/items test 1")
+    print("----------------------")
+    for kwargs in ({}, {'storage': "arrays"}, {'probing': "cuckoo"}):
+        m = HashMap(11, hash_function_1, **kwargs)
+        for i in range(1, 21):
+            m.put('key' + str(i), i)
+        m.remove('key1')
+        # nested loops each get their own generator
+        pairs = [(key, other) for key in m.keys() for other in m.keys()]
+        result = len(pairs) == 19 * 19 and sum(m.values()) == 209
+        result &= sorted(m.items()) == sorted(m.get_keys_and_values())
+        try:
+            for key in m.keys():
+                m.put(key + 'x', 0)
+            result = False
+        except RuntimeError:
+            pass
+        print(type(m).__name__, result)
+
+    print("\nTest Case - storage/probing type test 1")
+    print("----------------------")
+    for kwargs, expected in (({}, HashMap), ({'storage': "arrays"}, ArrayHashMap),
+                             ({'probing': "triangular"}, TriangularHashMap),
+                             ({'probing': "robin_hood"}, RobinHoodHashMap),
+                             ({'probing': "cuckoo"}, CuckooHashMap)):
+        m = HashMap(11, hash_function_1, **kwargs)
+        print(type(m).__name__, type(m) is expected)
+    # Options are keyword-only, so they cannot be silently ignored
+    try:
+        HashMap(11, hash_function_1, "arrays")
+        print(False)
+    except TypeError:
+        print(True)
@@ -3,71 +3,123 @@
 # Description: A HashMap implementation using separate chaining for collision resolution.
 #           It includes the following methods: put(), get(), remove(), contains_key(),
 #           clear(), empty_buckets(), resize_table(), table_load(), get_keys().
+#           keys(), values() and items() return independent generators over the table.
+#           upsert(), setdefault(), increment() and pop() update a key with a single probe.
 #          It also includes a separate find_mode() function using a HashMap to find
 #           the mode of an array.
+#           enable_stats() and get_stats() (from ds.StatsMixin) count operations and chain walks.
+#           save(), load() and pickling (from snapshot.SnapshotMixin) store the map in a binary snapshot.
 
 
-from ds import (DynamicArray, LinkedList, SLNode,
-                hash_function_1, hash_function_2)
+import time
 
+from ds import (DynamicArray, LinkedList, SLNode, StatsMixin, as_list,
+                hash_function_1, hash_function_2, is_prime, next_prime)
+from hash_functions import finalized
+from snapshot import SnapshotMixin
 
-class HashMap:
+# Number of old buckets moved to the new table per operation during an
+# incremental resize
+_MIGRATION_STEP = 4
+
+
+class HashMap(StatsMixin, SnapshotMixin):
     def __init__(self,
                  capacity: int = 11,
-                 function: callable = hash_function_1) -> None:
+                 function: callable = hash_function_1,
+                 incremental: bool = False,
+                 max_load: float = 1.0,
+                 shrink_load: float = None,
+                 power_of_two: bool = False) -> None:
         """
         Initialize new HashMap that uses
-        separate chaining for collision resolution
+        separate chaining for collision resolution.
+        With power_of_two=True, capacities are powers of two instead of primes,
+        so no prime has to be searched for on resize. The hash function is
+        then followed by a finalizer that mixes its high bits into the low
+        bits, which are the only ones a power-of-two capacity uses.
+        With incremental=True, growing the table moves the old buckets over a
+        few at a time on each operation instead of all at once.
+        The table doubles once the load factor reaches max_load. If shrink_load
+        is given, the table halves (never below the initial capacity) once
+        removals drop the load factor below it; it must be under max_load / 2
+        so that a shrink cannot immediately be followed by a grow.
         """
-        self._buckets = DynamicArray()
-
-        # capacity must be a prime number
-        self._capacity = self._next_prime(capacity)
-        for _ in range(self._capacity):
-            self._buckets.append(LinkedList())
-
-        self._hash_function = function
+        if max_load <= 0:
+            raise ValueError("max_load must be positive")
+        if shrink_load is not None and not 0 < shrink_load < max_load / 2:
+            raise ValueError("shrink_load must be between 0 and max_load / 2")
+        self._max_load = max_load
+        self._shrink_load = shrink_load
+
+        self._power_of_two = power_of_two
+        self._capacity = self._table_capacity(capacity)
+        self._buckets = self._new_buckets(self._capacity)
+        self._min_capacity = self._capacity
+
+        self._hash_function = finalized(function) if power_of_two else function
         self._size = 0
+        self._last_resize_time = 0.0
+
+        # State of an in-progress incremental resize; _old_buckets is None
+        # when no resize is in progress
+        self._incremental = incremental
+        self._old_buckets = None
+        self._old_capacity = 0
+        self._migrate_index = 0
 
     def __str__(self) -> str:
         """
         Override string method to provide more readable output
         """
+        self._finish_migration()
         out = ''
         for i in range(self._buckets.length()):
-            out += str(i) + ': ' + str(self._buckets[i]) + '\n'
+            bucket = self._buckets[i]
+            out += str(i) + ': ' + str(bucket if bucket is not None else LinkedList()) + '\n'
         return out
 
-    def _next_prime(self, capacity: int) -> int:
+    @staticmethod
+    def _new_buckets(capacity: int) -> DynamicArray:
         """
-        Increment from given number and the find the closest prime number
+        Returns a table of capacity buckets. Buckets start out as None and a
+        LinkedList is only allocated on the first insert into it, so creating,
+        clearing or resizing a large, sparse table is cheap.
         """
-        if capacity % 2 == 0:
-            capacity += 1
+        return DynamicArray([None] * capacity)
 
-        while not self._is_prime(capacity):
-            capacity += 2
+    @staticmethod
+    def _bucket_for_insert(buckets: DynamicArray, index: int) -> LinkedList:
+        """
+        Returns the bucket at index, allocating it if needed
+        """
+        bucket = buckets[index]
+        if bucket is None:
+            bucket = LinkedList()
+            buckets[index] = bucket
+        return bucket
 
-        return capacity
+    def _table_capacity(self, capacity: int) -> int:
+        """
+        Returns the table capacity to use for a requested capacity: the
+        next power of two in power-of-two mode, otherwise the next prime number
+        """
+        if self._power_of_two:
+            return 1 << max(capacity - 1, 1).bit_length()
+        return self._next_prime(capacity)
+
+    def _next_prime(self, capacity: int) -> int:
+        """
+        Increment from given number and the find the closest prime number
+        """
+        return next_prime(capacity)
 
     @staticmethod
     def _is_prime(capacity: int) -> bool:
         """
         Determine if given integer is a prime number and return boolean
         """
-        if capacity == 2 or capacity == 3:
-            return True
-
-        if capacity == 1 or capacity % 2 == 0:
-            return False
-
-        factor = 3
-        while factor ** 2 <= capacity:
-            if capacity % factor == 0:
-                return False
-            factor += 2
-
-        return True
+        return is_prime(capacity)
 
     def get_size(self) -> int:
         """
@@ -81,46 +133,82 @@ class HashMap:
         """
         return self._capacity
 
+    def get_hash_function(self) -> callable:
+        """
+        Return hash function of map
+        """
+        return self._hash_function
+
+    def get_last_resize_time(self) -> float:
+        """
+        Return the duration in seconds of the most recent resize_table() call
+        """
+        return self._last_resize_time
+
     def put(self, key: str, value: object) -> None:
         """
         Updates the key/value pair in the hash map. If the given key already exists in
         the hash map, its associated value is replaced with the new value. If the given key is
         not in the hash map, a new key/value pair is added.
         """
-        if self.table_load() >= 1:
-            self.resize_table(self._capacity * 2)
+        self._put(key, value, self._hash_function(key))
 
-        # Compute the element’s bucket using the hash function
-        hash = self._hash_function(key)
+    def _put(self, key: str, value: object, hash: int) -> None:
+        """
+        Performs put() given the already computed hash of key.
+        """
+        self._find_or_insert(key, hash)[0].value = value
+
+    def _find_or_insert(self, key: str, hash: int, default: object = None) -> (SLNode, bool):
+        """
+        Returns the node holding key, inserting it with the value default if it
+        is not in the hash map, and whether it was inserted. The bucket is
+        walked once, so the caller can read and update the value in place.
+        """
+        if self._old_buckets is not None:
+            self._migrate_step()
+
+        if self.table_load() >= self._max_load:
+            if self._incremental:
+                self._start_migration(self._capacity * 2)
+            else:
+                self.resize_table(self._capacity * 2)
+
+        # A key not yet migrated is updated where it is
+        if self._old_buckets is not None:
+            old_node = self._old_lookup(key, hash)
+            if old_node is not None:
+                return old_node, False
+
+        # Compute the element’s bucket using the hash
         index = hash % self._capacity
+        bucket = self._buckets[index]
 
         # Search the data structure at that bucket for the element using the key
         # (e.g., iterate through the items in the linked list).
 
         # Find the location in DA matching the index
-        # if it's empty, append new key/value pair
-        if self._buckets[index].length() == 0:
-            self._buckets[index].insert(key, value)
+        # if it's empty, allocate the bucket and add the new key/value pair
+        if bucket is None:
             self._size += 1
+            return self._bucket_for_insert(self._buckets, index).insert(key, default, hash), True
 
-        # if it's not empty, find the node containing the key and replace the value
-        else:
-            target_node = self._buckets[index].contains(key)
-            # if no match, create a node
-            # else, replace new value
-            if target_node is None:
-                self._buckets[index].insert(key, value)
-                self._size += 1
-            else:
-                target_node.value = value
+        # if it's not empty, find the node containing the key
+        # if no match, create a node
+        target_node = bucket.contains(key, hash)
+        if target_node is None:
+            self._size += 1
+            return bucket.insert(key, default, hash), True
+        return target_node, False
 
     def empty_buckets(self) -> int:
         """
         Returns the number of empty buckets in the hash table.
         """
+        self._finish_migration()
         empty_count = 0
-        for i in range(self._buckets.length()):
-            if self._buckets[i].length() == 0:
+        for bucket in self._buckets:
+            if bucket is None or bucket.length() == 0:
                 empty_count += 1
         return empty_count
 
@@ -134,11 +222,9 @@ class HashMap:
         """
         Clears the contents of the hash map.
         """
-        self._buckets = DynamicArray()
-        # capacity must be a prime number
-        for _ in range(self._capacity):
-            self._buckets.append(LinkedList())
+        self._buckets = self._new_buckets(self._capacity)
         self._size = 0
+        self._old_buckets = None
 
     def resize_table(self, new_capacity: int) -> None:
         """
@@ -147,44 +233,158 @@ class HashMap:
         if new_capacity < 1:
             return
 
-        if self._is_prime(new_capacity) is False:
-            new_capacity = self._next_prime(new_capacity)
+        self._finish_migration()
 
-        # Recompute hash of existing keys
-        # # Rehashing all links
+        new_capacity = self._table_capacity(new_capacity)
 
-        new_buckets = DynamicArray()
-        for _ in range(new_capacity):
-            new_buckets.append(LinkedList())
+        # Grow the target up front to where re-inserting every key through
+        # put() would have ended up, rather than resizing again mid-rehash
+        while self._size > 1 and (self._size - 1) / new_capacity >= self._max_load:
+            new_capacity = self._table_capacity(new_capacity * 2)
+
+        start = time.perf_counter()
 
         old_buckets = self._buckets
-        self._buckets = new_buckets
+        self._buckets = self._new_buckets(new_capacity)
         self._capacity = new_capacity
-        self._size = 0
+        self._rehash(old_buckets)
+
+        self._last_resize_time = time.perf_counter() - start
+
+    def _rehash(self, old_buckets: DynamicArray) -> None:
+        """
+        Moves every node of old_buckets into the current buckets.
+        Keys are already unique and the cached hash is reused, so nodes are
+        relinked directly without duplicate checks, load checks or new allocations.
+        """
+        buckets, capacity = self._buckets, self._capacity
+        bucket_for_insert = self._bucket_for_insert
+        for bucket in old_buckets:
+            if bucket is None:
+                continue
+            # The list iterator steps past a node before returning it,
+            # so relinking the returned node is safe
+            for link_node in bucket:
+                bucket_for_insert(buckets, link_node.hash % capacity).insert_node(link_node)
+
+    def _start_migration(self, new_capacity: int) -> None:
+        """
+        Begins an incremental resize: a new table becomes the insert target
+        and the current one is kept as the old table until it is emptied.
+        """
+        self._finish_migration()
+        start = time.perf_counter()
+
+        new_capacity = self._table_capacity(new_capacity)
+
+        self._old_buckets = self._buckets
+        self._old_capacity = self._capacity
+        self._migrate_index = 0
+        self._buckets = self._new_buckets(new_capacity)
+        self._capacity = new_capacity
+
+        self._last_resize_time = time.perf_counter() - start
 
-        for i in range(old_buckets.length()):
+    def _migrate_step(self, steps: int = _MIGRATION_STEP) -> None:
+        """
+        Relinks the nodes of the next few old buckets into the new table,
+        dropping the old table once every bucket has been moved.
+        """
+        old_buckets, buckets, capacity = self._old_buckets, self._buckets, self._capacity
+        end = min(self._migrate_index + steps, self._old_capacity)
+        for i in range(self._migrate_index, end):
+            if old_buckets[i] is None:
+                continue
             for link_node in old_buckets[i]:
-                self.put(link_node.key, link_node.value)
+                self._bucket_for_insert(buckets, link_node.hash % capacity).insert_node(link_node)
+        self._migrate_index = end
+
+        if end == self._old_capacity:
+            self._old_buckets = None
+
+    def _finish_migration(self) -> None:
+        """
+        Completes any in-progress incremental resize.
+        """
+        if self._old_buckets is not None:
+            self._migrate_step(self._old_capacity)
+
+    def _old_bucket(self, hash: int) -> LinkedList:
+        """
+        Returns the old table bucket for hash if it has not been migrated yet,
+        otherwise None.
+        """
+        index = hash % self._old_capacity
+        if index < self._migrate_index:
+            return None
+        return self._old_buckets[index]
+
+    def _old_lookup(self, key: str, hash: int) -> SLNode:
+        """
+        Returns the node for key in the old table, or None if it is not there.
+        """
+        bucket = self._old_bucket(hash)
+        if bucket is None:
+            return None
+        return bucket.contains(key, hash)
 
     def get(self, key: str):
         """
         Returns the value associated with the given key.
         """
-        hash = self._hash_function(key)
-        index = hash % self._capacity
-        for link_node in self._buckets[index]:
-            if link_node.key == key:
+        return self._get(key, self._hash_function(key))
+
+    def _get(self, key: str, hash: int):
+        """
+        Performs get() given the already computed hash of key.
+        """
+        if self._old_buckets is not None:
+            self._migrate_step()
+        if self._old_buckets is not None:
+            old_node = self._old_lookup(key, hash)
+            if old_node is not None:
+                return old_node.value
+
+        bucket = self._buckets[hash % self._capacity]
+        if bucket is None:
+            return None
+        for link_node in bucket:
+            if link_node.hash == hash and link_node.key == key:
                 return link_node.value
         return None
 
+    def _probe_length(self, key, hash: int) -> int:
+        """
+        Returns the number of nodes a lookup of key walks in its bucket of the
+        current table, for the stats.
+        """
+        bucket = self._buckets[hash % self._capacity]
+        steps = 0
+        if bucket is not None:
+            for link_node in bucket:
+                steps += 1
+                if link_node.hash == hash and link_node.key == key:
+                    break
+        return steps
+
     def contains_key(self, key: str) -> bool:
         """
         Returns True if the given key is in the hash map. False otherwise.
         """
-        hash = self._hash_function(key)
-        index = hash % self._capacity
-        for link_node in self._buckets[index]:
-            if link_node.key == key:
+        return self._contains(key, self._hash_function(key))
+
+    def _contains(self, key: str, hash: int) -> bool:
+        """
+        Performs contains_key() given the already computed hash of key.
+        """
+        if self._old_buckets is not None and self._old_lookup(key, hash) is not None:
+            return True
+
+        bucket = self._buckets[hash % self._capacity]
+        if bucket is None:
+            return False
+        for link_node in bucket:
+            if link_node.hash == hash and link_node.key == key:
                 return True
         return False
 
@@ -192,26 +392,265 @@ class HashMap:
         """
         Removes the given key and its associated value from the hash map.
         """
+        self._remove(key, self._hash_function(key))
+
+    def _remove(self, key: str, hash: int) -> None:
+        """
+        Performs remove() given the already computed hash of key.
+        """
+        self._pop(key, hash)
+
+    def upsert(self, key: str, function: callable, default: object = None) -> object:
+        """
+        Sets the value of key to function(value), where value is the current
+        value of key, or default if key is not in the hash map, and returns the
+        new value. The chain is walked once; function must not modify the map.
+        """
         hash = self._hash_function(key)
-        index = hash % self._capacity
-        match = False
-        for link_node in self._buckets[index]:
-            if link_node.key == key:
-                match = True
-                self._buckets[index].remove(key)
+        node, inserted = self._find_or_insert(key, hash, default)
+        try:
+            value = function(node.value)
+        except BaseException:
+            if inserted:
+                self._remove(key, hash)
+            raise
+        node.value = value
+        return value
+
+    def setdefault(self, key: str, default: object = None) -> object:
+        """
+        Returns the value of key, first inserting key with the value default
+        if it is not in the hash map.
+        """
+        return self._find_or_insert(key, self._hash_function(key), default)[0].value
+
+    def increment(self, key: str, delta: int = 1) -> int:
+        """
+        Adds delta to the value of key, which starts at 0 if key is not in the
+        hash map, and returns the new value.
+        """
+        return self._increment(key, delta, self._hash_function(key))
+
+    def _increment(self, key: str, delta: int, hash: int) -> int:
+        """
+        Performs increment() given the already computed hash of key.
+        """
+        node = self._find_or_insert(key, hash, 0)[0]
+        node.value += delta
+        return node.value
+
+    def pop(self, key: str, default: object = None) -> object:
+        """
+        Removes the given key and returns its value, or returns default if the
+        key is not in the hash map.
+        """
+        return self._pop(key, self._hash_function(key), default)
+
+    def _pop(self, key: str, hash: int, default: object = None) -> object:
+        """
+        Performs pop() given the already computed hash of key.
+        """
+        if self._old_buckets is not None:
+            self._migrate_step()
+        if self._old_buckets is not None:
+            old_bucket = self._old_bucket(hash)
+            old_node = None if old_bucket is None else old_bucket.pop(key, hash)
+            if old_node is not None:
                 self._size -= 1
+                self._shrink_if_sparse()
+                return old_node.value
+
+        index = hash % self._capacity
+        bucket = self._buckets[index]
+        node = None if bucket is None else bucket.pop(key, hash)
+        if node is None:
+            return default
+        # Release buckets that become empty
+        if bucket.length() == 0:
+            self._buckets[index] = None
+        self._size -= 1
+        self._shrink_if_sparse()
+        return node.value
+
+    def _shrink_if_sparse(self) -> None:
+        """
+        Halves the capacity once the load factor drops below shrink_load, as
+        many times as needed after a batch of removals
+        """
+        if (self._shrink_load is not None and self.table_load() < self._shrink_load
+                and self._capacity > self._min_capacity):
+            new_capacity = max(self._capacity // 2, self._min_capacity)
+            while (new_capacity > self._min_capacity
+                   and self._size / new_capacity < self._shrink_load):
+                new_capacity = max(new_capacity // 2, self._min_capacity)
+            if self._incremental:
+                self._start_migration(new_capacity)
+            else:
+                self.resize_table(new_capacity)
+
+    def _reserve(self, count: int) -> None:
+        """
+        Resizes once, if needed, so that count more keys can be added
+        without put() triggering a resize
+        """
+        new_capacity = self._capacity
+        while (self._size + count) / new_capacity >= self._max_load:
+            new_capacity *= 2
+        if new_capacity != self._capacity:
+            self.resize_table(new_capacity)
+
+    def put_many(self, pairs) -> None:
+        """
+        Puts every (key, value) tuple of pairs, a DynamicArray or any iterable.
+        The table is sized once for the whole batch and every key is hashed up
+        front, so no resize happens part way through.
+        """
+        pairs = as_list(pairs)
+        hashes = list(map(self._hash_function, [pair[0] for pair in pairs]))
+        self._finish_migration()
+        self._reserve(len(pairs))
+
+        if self._counting():
+            # One key at a time through the counting _put()
+            _put = self._put
+            for (key, value), hash in zip(pairs, hashes):
+                _put(key, value, hash)
+            return
+
+        buckets, capacity = self._buckets, self._capacity
+        bucket_for_insert = self._bucket_for_insert
+        for (key, value), hash in zip(pairs, hashes):
+            bucket = bucket_for_insert(buckets, hash % capacity)
+            target_node = bucket.contains(key, hash)
+            if target_node is None:
+                bucket.insert(key, value, hash)
+                self._size += 1
+            else:
+                target_node.value = value
+
+    def get_many(self, keys) -> DynamicArray:
+        """
+        Returns a dynamic array holding the value of each key in keys,
+        or None for keys that are not in the hash map.
+        """
+        keys = as_list(keys)
+        hashes = map(self._hash_function, keys)
+        self._finish_migration()
+        if self._counting():
+            _get = self._get
+            return DynamicArray([_get(key, hash) for key, hash in zip(keys, hashes)])
+
+        buckets, capacity = self._buckets, self._capacity
+        output_da = DynamicArray()
+        for key, hash in zip(keys, hashes):
+            bucket = buckets[hash % capacity]
+            link_node = None if bucket is None else bucket.contains(key, hash)
+            output_da.append(None if link_node is None else link_node.value)
+        return output_da
+
+    def contains_many(self, keys) -> DynamicArray:
+        """
+        Returns a dynamic array holding contains_key() of each key in keys.
+        """
+        keys = as_list(keys)
+        hashes = map(self._hash_function, keys)
+        self._finish_migration()
+        if self._counting():
+            _contains = self._contains
+            return DynamicArray([_contains(key, hash) for key, hash in zip(keys, hashes)])
+
+        buckets, capacity = self._buckets, self._capacity
+        output_da = DynamicArray()
+        for key, hash in zip(keys, hashes):
+            bucket = buckets[hash % capacity]
+            output_da.append(bucket is not None and bucket.contains(key, hash) is not None)
+        return output_da
+
+    def remove_many(self, keys) -> None:
+        """
+        Removes every key in keys from the hash map. The table shrinks at
+        most once, after the whole batch.
+        """
+        keys = as_list(keys)
+        hashes = list(map(self._hash_function, keys))
+        self._finish_migration()
+        if self._counting():
+            _remove = self._remove
+            for key, hash in zip(keys, hashes):
+                _remove(key, hash)
+            return
+
+        buckets, capacity = self._buckets, self._capacity
+        removed = 0
+        for key, hash in zip(keys, hashes):
+            index = hash % capacity
+            bucket = buckets[index]
+            if bucket is not None and bucket.pop(key, hash) is not None:
+                removed += 1
+                # Release buckets that become empty
+                if bucket.length() == 0:
+                    buckets[index] = None
+        self._size -= removed
+        self._shrink_if_sparse()
+
+    def chain_lengths(self) -> DynamicArray:
+        """
+        Returns a dynamic array holding the length of the chain in each bucket.
+        """
+        self._finish_migration()
+        output_da = DynamicArray()
+        for bucket in self._buckets:
+            output_da.append(0 if bucket is None else bucket.length())
+        return output_da
 
     def get_keys_and_values(self) -> DynamicArray:
         """
         Returns a dynamic array where each index contains a tuple of a key/value pair
         stored in the hash map.
         """
+        self._finish_migration()
         output_da = DynamicArray()
-        for i in range(self._buckets.length()):
-            for link_node in self._buckets[i]:
+        for bucket in self._buckets:
+            if bucket is None:
+                continue
+            for link_node in bucket:
                 output_da.append((link_node.key, link_node.value))
         return output_da
 
+    def _entries(self):
+        """
+        Yields the key, value and cached hash of each key, without copying the table
+        """
+        self._finish_migration()
+        buckets = self._buckets
+        for bucket in buckets:
+            if bucket is None:
+                continue
+            for link_node in bucket:
+                yield link_node.key, link_node.value, link_node.hash
+            # A resize relinks the nodes into new buckets
+            if self._buckets is not buckets:
+                raise RuntimeError("hash map resized during iteration")
+
+    def keys(self):
+        """
+        Returns a generator over the keys in the hash map. Each call returns
+        an independent generator that walks the table in place.
+        """
+        return (key for key, _, _ in self._entries())
+
+    def values(self):
+        """
+        Returns a generator over the values in the hash map.
+        """
+        return (value for _, value, _ in self._entries())
+
+    def items(self):
+        """
+        Returns a generator over the (key, value) tuples in the hash map.
+        """
+        return ((key, value) for key, value, _ in self._entries())
+
 
 def find_mode(da: DynamicArray) -> (DynamicArray, int):
     """
@@ -220,30 +659,25 @@ def find_mode(da: DynamicArray) -> (DynamicArray, int):
     frequency (how many times they appear).
 
     Algorithm:
-    1. check element exists in hashmap
-    2. if it doesn't exist, put element into hashmap with key=element, value=1
-    3. if it does, get the key and increment the value
-        -if value > max_freq, set max_freq to value
+    1. increment the element's value in the hashmap, which starts at 0
+       if it doesn't exist, with a single chain walk
+    2. if value > max_freq, the element is the only mode so far
+       if value == max_freq, it joins the modes
+    The modes are listed in the order they reached the highest frequency.
+    See frequency.py for counting streams and top-k.
     """
     map = HashMap()
-    max_freq = 1
-
-    for i in range(da.length()):
-        if map.contains_key(da[i]):
-            element_freq = map.get(da[i])
-            element_freq += 1
-            map.put(da[i], element_freq)
-            if element_freq > max_freq:
-                max_freq = element_freq
-        else:
-            map.put(da[i], 1)
-
-    mode = DynamicArray()
-    all_keys_values = map.get_keys_and_values()
-    for i in range(all_keys_values.length()):
-        if all_keys_values[i][1] == max_freq:
-            mode.append(all_keys_values[i][0])
-    return mode, max_freq
+    # Starting at 1, an empty array has no modes and a frequency of 1
+    mode, max_freq = [], 1
+
+    for element in da:
+        element_freq = map.increment(element)
+        if element_freq > max_freq:
+            mode, max_freq = [element], element_freq
+        elif element_freq == max_freq:
+            mode.append(element)
+
+    return DynamicArray(mode), max_freq
 
 
 # ------------------- BASIC TESTING ---------------------------------------- #
@@ -437,6 +871,20 @@ if __name__ == "__main__":
     m.resize_table(2)
     print(m.get_keys_and_values())
 
+    print("\nTest Case - incremental resize test 1")
+    print("----------------------")
+    m = HashMap(53, hash_function_1, incremental=True)
+    result = True
+    for i in range(150):
+        m.put('key' + str(i), i * 100)
+        if i % 30 == 0:
+            print(m.get_size(), m.get_capacity())
+    for i in range(0, 150, 2):
+        m.remove('key' + str(i))
+    for i in range(150):
+        result &= m.get('key' + str(i)) == (i * 100 if i % 2 else None)
+    print(result, m.get_size(), m.get_capacity())
+
     print("\nTest Case - find_mode test 1")
     print("-----------------------------")
     da = DynamicArray(["apple", "apple", "grape", "melon", "peach"])
@@ -456,3 +904,104 @@ if __name__ == "__main__":
         da = DynamicArray(case)
         mode, frequency = find_mode(da)
         print(f"Input: {da}\nMode : {mode}, Frequency: {frequency}\n")
+
+    print("\nTest Case - shrink test 1")
+    print("----------------------")
+    m = HashMap(11, hash_function_2, shrink_load=0.1)
+    for i in range(1000):
+        m.put(str(i), i)
+    print(m.get_size(), m.get_capacity())
+    for i in range(0, 1000):
+        m.remove(str(i))
+        if i % 200 == 199:
+            print(m.get_size(), m.get_capacity())
+    print(m.get('999'), m.get_capacity())
+
+    print("\nTest Case - batch API test 1")
+    print("----------------------")
+    m = HashMap(11, hash_function_2)
+    m.put_many(DynamicArray([(str(i), i * 10) for i in range(1, 41)]))
+    print(m.get_size(), m.get_capacity())
+    print(m.get_many(DynamicArray(['1', '2', '40', '41'])))
+    m.remove_many(['1', '2', '3'])
+    print(m.contains_many(['1', '2', '3', '4']), m.get_size())
+
+    print("\nTest Case - power_of_two test 1")
+    print("----------------------")
+    m = HashMap(50, hash_function_1, power_of_two=True)
+    for i in range(1, 201):
+        m.put('key' + str(i), i * 10)
+    print(m.get_size(), m.get_capacity(), round(m.table_load(), 2))
+    for i in range(1, 201, 2):
+        m.remove('key' + str(i))
+    result = True
+    for i in range(1, 201):
+        result &= m.get('key' + str(i)) == (i * 10 if i % 2 == 0 else None)
+    print(result, m.get_size(), m.empty_buckets(), max(m.chain_lengths()))
+
+    print("\nTest Case - upsert/setdefault/increment/pop test 1")
+    print("----------------------")
+    m = HashMap(11, hash_function_1)
+    for word in ['a', 'b', 'a', 'c', 'a', 'b']:
+        m.increment(word)
+    print(m.get('a'), m.get('b'), m.get('c'), m.get_size())
+    print(m.setdefault('a', 0), m.setdefault('d', []), m.get_size())
+    m.setdefault('d', []).append(1)
+    print(m.get('d'), m.upsert('d', lambda value: value + [2]), m.upsert('e', str, 5))
+    print(m.pop('a'), m.pop('a', 'missing'), m.contains_key('a'), m.get_size())
+
+    print("\nTest Case - stats test 1")
+    print("----------------------")
+    m = HashMap(11, hash_function_1)
+    m.enable_stats()
+    for i in range(1, 41):
+        m.put('key' + str(i), i)
+    for i in range(1, 51):
+        m.get('key' + str(i))
+    m.remove('key1')
+    stats = m.get_stats()
+    print(stats['puts'], stats['gets'], stats['hits'], stats['misses'],
+          stats['removes'], stats['resizes'], stats['max_probe_length'])
+    m.disable_stats()
+    m.get('key2')
+    print(m.get_stats()['gets'], m.get_stats()['enabled'])
+
+    print("\nTest Case - save/load test 1")
+    print("----------------------")
+    import os
+    import pickle
+    import tempfile
+    from hash_functions import fnv1a_64, seeded
+    path = os.path.join(tempfile.mkdtemp(), 'table.snap')
+    for kwargs in ({}, {'power_of_two': True}):
+        m = HashMap(11, seeded(fnv1a_64), **kwargs)
+        for i in range(1, 201):
+            m.put('key' + str(i), [i])
+        m.remove('key1')
+        m.save(path)
+        loaded = HashMap.load(path, **kwargs)
+        copied = pickle.loads(pickle.dumps(m))
+        result = loaded.get_capacity() == copied.get_capacity() == m.get_capacity()
+        for i in range(1, 201):
+            result &= loaded.get('key' + str(i)) == copied.get('key' + str(i)) == m.get('key' + str(i))
+        print(result, loaded.get_size(), copied.get_size(), loaded.get_capacity())
+    os.remove(path)
+    os.rmdir(os.path.dirname(path))
+
+    print("\nTest Case - keys/values/items test 1")
+    print("----------------------")
+    m = HashMap(11, hash_function_1)
+    for i in range(1, 21):
+        m.put('key' + str(i), i)
+    m.remove('key1')
+    # nested loops each get their own generator
+    pairs = [(key, other) for key in m.keys() for other in m.keys()]
+    result = len(pairs) == 19 * 19 and sum(m.values()) == 209
+    result &= sorted(m.items()) == sorted(m.get_keys_and_values())
+    try:
+        for key in m.keys():
+            m.put(key + 'x', 0)
+        result = False
+    except RuntimeError:
+        pass
+    print(result, max(DynamicArray([3, 1, 2])), sorted(DynamicArray([3, 1, 2])))
@@ -0,0 +1,436 @@
+# Description: A HashMap front-end that shards keys across worker processes, so CPU-bound
+#           work is not limited to the one core a single interpreter can use. Each worker
+#           owns one separate chaining or open addressing HashMap shard and serves batched
+#           requests over a pipe. It also includes a parallel find_mode() that counts
+#           chunks of the array in the workers and merges the per-shard counts.
+
+
+import multiprocessing
+import os
+
+import hash_map_oa
+import hash_map_sc
+from ds import DynamicArray, as_list, hash_function_1, hash_function_2
+from hash_functions import fmix64
+
+# HashMap classes a shard can use, by name
+MAP_TYPES = {
+    'sc': hash_map_sc.HashMap,
+    'oa': hash_map_oa.HashMap,
+}
+
+
+def _context():
+    """
+    Returns the multiprocessing context to start workers with. Forked workers
+    inherit the parent's hash seeds, which builtin_hash() relies on to hash
+    keys in the same way in every process.
+    """
+    if 'fork' in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context('fork')
+    return multiprocessing.get_context()
+
+
+def _shard_of(hash: int, shards: int) -> int:
+    """
+    Returns the shard owning a key with the given hash. The hash is mixed
+    first so that keys within one shard still spread over all of its buckets.
+    """
+    return fmix64(hash) % shards
+
+
+def _split(keys: list, hashes: list, shards: int) -> list:
+    """
+    Returns, for each shard, the positions in keys of the keys it owns
+    """
+    positions = [[] for _ in range(shards)]
+    for position, hash in enumerate(hashes):
+        positions[_shard_of(hash, shards)].append(position)
+    return positions
+
+
+def _put_many(shard, entries: list) -> None:
+    """
+    Puts each (key, value, hash) tuple of entries into shard
+    """
+    for key, value, hash in entries:
+        shard._put(key, value, hash)
+
+
+def _get_many(shard, entries: list) -> list:
+    """
+    Returns the value in shard of each (key, hash) tuple of entries
+    """
+    return [shard._get(key, hash) for key, hash in entries]
+
+
+def _contains_many(shard, entries: list) -> list:
+    """
+    Returns whether shard holds each (key, hash) tuple of entries
+    """
+    return [shard._contains(key, hash) for key, hash in entries]
+
+
+def _remove_many(shard, entries: list) -> None:
+    """
+    Removes each (key, hash) tuple of entries from shard
+    """
+    for key, hash in entries:
+        shard._remove(key, hash)
+
+
+def _add_counts(shard, counts: list) -> None:
+    """
+    Adds (key, count, hash) tuples to the counts stored in shard
+    """
+    for key, count, hash in counts:
+        shard._increment(key, count, hash)
+
+
+def _count_chunk(counts, keys: list, shards: int) -> list:
+    """
+    Counts keys in counts, an empty HashMap, and returns (key, count, hash)
+    tuples split by the shard owning each key
+    """
+    function = counts.get_hash_function()
+    for key in keys:
+        counts._increment(key, 1, function(key))
+
+    partials = [[] for _ in range(shards)]
+    for key, count, hash in counts._entries():
+        partials[_shard_of(hash, shards)].append((key, count, hash))
+    return partials
+
+
+def _mode(shard) -> (list, int):
+    """
+    Returns the keys of shard with the highest value, and that value
+    """
+    mode, max_freq = [], 0
+    for key, count in shard.items():
+        if count > max_freq:
+            mode, max_freq = [key], count
+        elif count == max_freq:
+            mode.append(key)
+    return mode, max_freq
+
+
+# Requests a worker serves, by name; each takes the shard and the request's arguments
+_OPERATIONS = {
+    'put_many': _put_many,
+    'get_many': _get_many,
+    'contains_many': _contains_many,
+    'remove_many': _remove_many,
+    'get_size': lambda shard: shard.get_size(),
+    'get_keys_and_values': lambda shard: as_list(shard.get_keys_and_values()),
+    'clear': lambda shard: shard.clear(),
+    'count_chunk': _count_chunk,
+    'add_counts': _add_counts,
+    'mode': _mode,
+}
+
+
+def _serve(connection, map_class, capacity: int, function: callable, kwargs: dict) -> None:
+    """
+    Worker process loop: applies each (operation, arguments) request received
+    on connection to its shard and sends back (True, result), or (False,
+    exception) if the operation raised. count_chunk works on a new, empty map
+    rather than the shard.
+    """
+    shard = map_class(capacity, function, **kwargs)
+    while True:
+        try:
+            operation, arguments = connection.recv()
+        except EOFError:
+            break
+        if operation == 'close':
+            break
+        target = map_class(capacity, function, **kwargs) if operation == 'count_chunk' else shard
+        try:
+            connection.send((True, _OPERATIONS[operation](target, *arguments)))
+        except Exception as exception:
+            connection.send((False, exception))
+    connection.close()
+
+
+class ShardedHashMap:
+    """
+    HashMap front-end whose keys are partitioned by hash over worker
+    processes, each owning a HashMap shard of map_type ('sc' or 'oa').
+    Keys are hashed in the calling process to find their shard, and each
+    batch operation sends one request per shard, to all shards before
+    waiting on any, so the shards work in parallel. Single-key operations
+    are one round trip each; use the batch methods for throughput.
+    """
+
+    def __init__(self,
+                 shards: int = None,
+                 map_type: str = 'sc',
+                 capacity: int = 11,
+                 function: callable = hash_function_1,
+                 **kwargs) -> None:
+        """
+        Starts shards worker processes (default: one per CPU), each holding a
+        map_type HashMap created with capacity, function and any further
+        keyword arguments of that HashMap.
+        """
+        if map_type not in MAP_TYPES:
+            raise ValueError(f"map_type must be one of {tuple(MAP_TYPES)}")
+        if shards is None:
+            shards = os.cpu_count() or 1
+        if shards < 1:
+            raise ValueError("shards must be positive")
+
+        map_class = MAP_TYPES[map_type]
+        # The shards hash keys with the map's own function, which some
+        # variants wrap (e.g. power_of_two); requests must carry that hash
+        self._hash_function = map_class(capacity, function, **kwargs).get_hash_function()
+
+        context = _context()
+        self._connections, self._workers = [], []
+        for _ in range(shards):
+            parent_end, child_end = context.Pipe()
+            worker = context.Process(target=_serve, daemon=True,
+                                     args=(child_end, map_class, capacity, function, kwargs))
+            worker.start()
+            child_end.close()
+            self._connections.append(parent_end)
+            self._workers.append(worker)
+
+    def __enter__(self) -> "ShardedHashMap":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """
+        Stops the worker processes; their shards are discarded.
+        """
+        for connection in self._connections:
+            try:
+                connection.send(('close', ()))
+            except (BrokenPipeError, OSError):
+                pass
+            connection.close()
+        for worker in self._workers:
+            worker.join()
+        self._connections, self._workers = [], []
+
+    def _call(self, requests: list) -> list:
+        """
+        Sends the (operation, arguments) request for each shard, skipping
+        shards whose request is None, then returns their results in shard order.
+        """
+        for connection, request in zip(self._connections, requests):
+            if request is not None:
+                connection.send(request)
+
+        results, error = [], None
+        for connection, request in zip(self._connections, requests):
+            if request is None:
+                results.append(None)
+                continue
+            ok, result = connection.recv()
+            if not ok and error is None:
+                error = result
+            results.append(result)
+        # Every reply is collected first, so the pipes stay in step
+        if error is not None:
+            raise error
+        return results
+
+    def _broadcast(self, operation: str, *arguments) -> list:
+        """
+        Runs operation on every shard and returns their results
+        """
+        return self._call([(operation, arguments)] * len(self._connections))
+
+    def _batch(self, operation: str, keys: list, values: list = None) -> list:
+        """
+        Routes each key (with its value, if values is given) to its shard and
+        returns the per-key results in the order of keys
+        """
+        hashes = list(map(self._hash_function, keys))
+        positions = _split(keys, hashes, len(self._connections))
+        requests = []
+        for shard_positions in positions:
+            if not shard_positions:
+                requests.append(None)
+            elif values is None:
+                requests.append((operation, ([(keys[p], hashes[p]) for p in shard_positions],)))
+            else:
+                requests.append((operation, ([(keys[p], values[p], hashes[p])
+                                              for p in shard_positions],)))
+
+        output = [None] * len(keys)
+        for shard_positions, results in zip(positions, self._call(requests)):
+            if results is not None:
+                for position, result in zip(shard_positions, results):
+                    output[position] = result
+        return output
+
+    def get_shard_count(self) -> int:
+        """
+        Return number of shards
+        """
+        return len(self._connections)
+
+    def get_size(self) -> int:
+        """
+        Return size of map, summed over the shards
+        """
+        return sum(self._broadcast('get_size'))
+
+    def get_hash_function(self) -> callable:
+        """
+        Return hash function of map
+        """
+        return self._hash_function
+
+    def put(self, key: str, value: object) -> None:
+        """
+        Updates the key/value pair in the hash map.
+        """
+        self.put_many([(key, value)])
+
+    def get(self, key: str):
+        """
+        Returns the value associated with the given key.
+        """
+        return self._batch('get_many', [key])[0]
+
+    def contains_key(self, key: str) -> bool:
+        """
+        Returns True if the given key is in the hash map. False otherwise.
+        """
+        return self._batch('contains_many', [key])[0]
+
+    def remove(self, key: str) -> None:
+        """
+        Removes the given key and its associated value from the hash map.
+        """
+        self.remove_many([key])
+
+    def put_many(self, pairs) -> None:
+        """
+        Puts every (key, value) tuple of pairs, a DynamicArray or any iterable,
+        with one request per shard.
+        """
+        pairs = as_list(pairs)
+        self._batch('put_many', [pair[0] for pair in pairs], [pair[1] for pair in pairs])
+
+    def get_many(self, keys) -> DynamicArray:
+        """
+        Returns a dynamic array holding the value of each key in keys,
+        or None for keys that are not in the hash map.
+        """
+        return DynamicArray(self._batch('get_many', as_list(keys)))
+
+    def contains_many(self, keys) -> DynamicArray:
+        """
+        Returns a dynamic array holding contains_key() of each key in keys.
+        """
+        return DynamicArray(self._batch('contains_many', as_list(keys)))
+
+    def remove_many(self, keys) -> None:
+        """
+        Removes every key in keys from the hash map.
+        """
+        self._batch('remove_many', as_list(keys))
+
+    def clear(self) -> None:
+        """
+        Clears the contents of every shard.
+        """
+        self._broadcast('clear')
+
+    def get_keys_and_values(self) -> DynamicArray:
+        """
+        Returns a dynamic array where each index contains a tuple of a key/value pair
+        stored in the hash map, shard by shard.
+        """
+        output_da = DynamicArray()
+        for keys_and_values in self._broadcast('get_keys_and_values'):
+            for pair in keys_and_values:
+                output_da.append(pair)
+        return output_da
+
+    def count_many(self, keys) -> None:
+        """
+        Adds the number of occurrences of each key in keys to its value,
+        treating a missing key as 0. The keys are split into one contiguous
+        chunk per worker, and each worker counts its chunk on its own and
+        hashes the distinct keys it saw; the counts are then sent on to the
+        shards owning the keys and added there. The calling process only
+        relays the counts, so it never hashes a key.
+        """
+        keys = as_list(keys)
+        shards = len(self._connections)
+        chunk = -(-len(keys) // shards)
+        partials = self._call([('count_chunk', (keys[i * chunk:(i + 1) * chunk], shards))
+                               for i in range(shards)])
+        self._call([('add_counts', ([count for worker in partials for count in worker[shard]],))
+                    for shard in range(shards)])
+
+    def find_mode(self) -> (DynamicArray, int):
+        """
+        Returns a tuple containing a dynamic array of the keys with the highest
+        value and that value, merged from each shard's own mode.
+        """
+        mode, max_freq = DynamicArray(), 0
+        for shard_mode, shard_freq in self._broadcast('mode'):
+            if shard_freq > max_freq:
+                mode, max_freq = DynamicArray(), shard_freq
+            if shard_freq == max_freq:
+                for key in shard_mode:
+                    mode.append(key)
+        return mode, max_freq
+
+
+def find_mode(da: DynamicArray, shards: int = None, map_type: str = 'sc',
+              function: callable = hash_function_1) -> (DynamicArray, int):
+    """
+    Returns a tuple containing, in this order, a dynamic array comprising the mode
+    (most occurring) value/s of the array, and an integer that represents the highest
+    frequency, as hash_map_sc.find_mode() does, counting in shards worker processes.
+    The modes come back grouped by shard rather than in hash table order.
+    """
+    with ShardedHashMap(shards, map_type, function=function) as sharded:
+        sharded.count_many(da)
+        return sharded.find_mode()
+
+
+# ------------------- BASIC TESTING ---------------------------------------- #
+
+if __name__ == "__main__":
+
+    print("\nTest Case - batch API test 1")
+    print("----------------------")
+    with ShardedHashMap(4, 'sc', 11, hash_function_2) as m:
+        m.put_many(DynamicArray([(str(i), i * 10) for i in range(1, 41)]))
+        print(m.get_shard_count(), m.get_size())
+        print(m.get_many(DynamicArray(['1', '2', '40', '41'])))
+        m.remove_many(['1', '2', '3'])
+        print(m.contains_many(['1', '2', '3', '4']), m.get_size())
+        m.put('4', 'four')
+        print(m.get('4'), m.contains_key('41'), m.get_keys_and_values().length())
+
+    print("\nTest Case - batch API test 2")
+    print("----------------------")
+    with ShardedHashMap(3, 'oa', 11, hash_function_1, probing="robin_hood") as m:
+        m.put_many([('key' + str(i), i) for i in range(1000)])
+        m.remove_many(['key' + str(i) for i in range(0, 1000, 2)])
+        values = m.get_many(['key' + str(i) for i in range(1000)])
+        print(m.get_size(), all(values[i] == (i if i % 2 else None) for i in range(1000)))
+
+    print("\nTest Case - find_mode test 1")
+    print("-----------------------------")
+    test_cases = (
+        ["Arch", "Manjaro", "Manjaro", "Mint", "Mint", "Mint", "Ubuntu", "Ubuntu", "Ubuntu"],
+        ["one", "two", "three", "four", "five"],
+        ["2", "2", "2", "2", "1", "1", "1", "1"],
+    )
+    for case in test_cases:
+        mode, frequency = find_mode(DynamicArray(case), shards=2)
+        print(f"Input: {case}\nMode : {sorted(as_list(mode))}, Frequency: {frequency}\n")
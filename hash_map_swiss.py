@@ -0,0 +1,457 @@
+# Description: A SwissTable-style HashMap engine (after Abseil's flat_hash_map and Rust's
+#           hashbrown) with the same methods as the open addressing HashMap in hash_map_oa.py.
+#           Each slot has a control byte holding 7 bits of the key's hash, or an empty or
+#           deleted marker. Slots are probed a group of 16 at a time: the group's control bytes
+#           are read as one integer and matched against the hash with bit tricks, so slots
+#           whose 7 hash bits differ are rejected without touching their keys.
+
+
+import time
+from array import array
+
+import hash_map_oa
+from ds import DynamicArray, HashEntry, as_list, hash_function_1, hash_function_2
+
+# Slots per group; the capacity is always a power-of-two number of groups
+_GROUP_WIDTH = 16
+
+# Control bytes: a full slot holds the top 7 bits of its hash (high bit clear)
+_CTRL_EMPTY = 0xFF
+_CTRL_DELETED = 0x80
+_H2_SHIFT = 57
+
+# Fibonacci hashing: multiplying by 2^64 / golden ratio carries every bit of
+# the hash into the high bits of the product, which are the ones used
+_MULTIPLIER = 0x9E3779B97F4A7C15
+# Undoes the multiplication, recovering the hash a slot was placed by
+_INVERSE_MULTIPLIER = pow(_MULTIPLIER, -1, 1 << 64)
+_HASH_MASK = 0xFFFFFFFFFFFFFFFF
+
+# The lowest and highest bit of every byte in a group's control word
+_LSB = int.from_bytes(b'\x01' * _GROUP_WIDTH, 'little')
+_MSB = _LSB * 0x80
+
+
+def _first_byte(mask: int) -> int:
+    """
+    Returns the position of the lowest byte flagged in mask
+    """
+    return ((mask & -mask).bit_length() >> 3) - 1
+
+
+class HashMap(hash_map_oa.HashMap):
+    """
+    Open addressing HashMap that keeps a control byte per slot and probes in
+    groups of _GROUP_WIDTH slots. The key's hash is mixed into 64 bits, whose
+    top 7 are stored in the control byte and the bits below them pick the
+    first group to probe. A lookup compares the 7 bits against a
+    whole group at once and only checks the keys of the slots that match,
+    about one in 128 of the others. Groups are visited in triangular order,
+    which covers every group of a power-of-two table.
+    """
+
+    # A probe ends at the first group with an empty slot; 7/8 keeps those common
+    _DEFAULT_MAX_LOAD = 0.875
+    _MAX_LOAD_LIMIT = 0.9375
+    # A probe starts at a whole group of slots
+    _HOME_WIDTH = _GROUP_WIDTH
+    _TABLE_ATTRIBUTES = ('_control', '_hashes', '_keys', '_values')
+
+    def __init__(self, capacity: int, function, max_load: float = None,
+                 shrink_load: float = None) -> None:
+        """
+        Initialize new HashMap that uses SwissTable group probing
+        for collision resolution.
+        The capacity is rounded up to a power-of-two number of groups.
+        """
+        super().__init__(capacity, function, max_load=max_load, shrink_load=shrink_load)
+
+    def _table_capacity(self, capacity: int) -> int:
+        """
+        Returns the smallest power-of-two number of groups, in slots, holding capacity slots
+        """
+        groups = 1
+        while groups * _GROUP_WIDTH < capacity:
+            groups *= 2
+        return groups * _GROUP_WIDTH
+
+    def _allocate(self, capacity: int) -> None:
+        """
+        Create empty control bytes and slot arrays of the given capacity
+        """
+        self._control = bytearray([_CTRL_EMPTY]) * capacity
+        self._hashes = array('Q', bytes(8 * capacity))
+        self._keys = [None] * capacity
+        self._values = [None] * capacity
+        self._group_mask = capacity // _GROUP_WIDTH - 1
+        self._group_shift = _H2_SHIFT - self._group_mask.bit_length()
+
+    def __str__(self) -> str:
+        """
+        Override string method to provide more readable output
+        """
+        out = ''
+        for i in range(self._capacity):
+            if self._control[i] == _CTRL_EMPTY:
+                out += str(i) + ': None\n'
+            else:
+                out += (str(i) + ': K: ' + str(self._keys[i]) +
+                        ' V: ' + str(self._values[i]) +
+                        ' TS: ' + str(self._control[i] == _CTRL_DELETED) + '\n')
+        return out
+
+    def _find(self, key, hash: int) -> (int, int):
+        """
+        Group probe for key, given its mixed hash, until a group with an empty slot.
+        Returns the index of the slot holding key (-1 if there is none), and the
+        slot where key would be inserted: the first empty or deleted slot passed.
+        """
+        control, hashes, keys = self._control, self._hashes, self._keys
+        group_mask = self._group_mask
+        pattern = _LSB * (hash >> _H2_SHIFT)
+        group, stride = (hash >> self._group_shift) & group_mask, 0
+        free = -1
+        while True:
+            offset = group * _GROUP_WIDTH
+            word = int.from_bytes(control[offset:offset + _GROUP_WIDTH], 'little')
+
+            # Bytes equal to the 7 hash bits become zero; flag every zero byte.
+            # A borrow can flag a byte next to a match as well, which the hash
+            # comparison then rejects.
+            x = word ^ pattern
+            match = (x - _LSB) & ~x & _MSB
+            while match:
+                index = offset + _first_byte(match)
+                if hashes[index] == hash and keys[index] == key:
+                    return index, free
+                match &= match - 1
+
+            # Empty and deleted slots are the control bytes with the high bit set
+            if free < 0 and word & _MSB:
+                free = offset + _first_byte(word & _MSB)
+
+            # Only an empty slot (0xFF) has the two highest bits set
+            if word & (word << 1) & _MSB:
+                return -1, free
+
+            stride += 1
+            group = (group + stride) & group_mask
+
+    def _home_slot(self, hash: int) -> int:
+        """
+        Returns the first slot of the group a probe for a key with the given hash starts at
+        """
+        hash = (hash * _MULTIPLIER) & _HASH_MASK
+        return ((hash >> self._group_shift) & self._group_mask) * _GROUP_WIDTH
+
+    def _probe_length(self, key, hash: int) -> int:
+        """
+        Returns the number of groups a lookup of key inspects, for the stats.
+        """
+        hash = (hash * _MULTIPLIER) & _HASH_MASK
+        control, group_mask = self._control, self._group_mask
+        group, stride = (hash >> self._group_shift) & group_mask, 0
+        while True:
+            offset = group * _GROUP_WIDTH
+            for index in range(offset, offset + _GROUP_WIDTH):
+                if (control[index] < _CTRL_DELETED and self._hashes[index] == hash
+                        and self._keys[index] == key):
+                    return stride + 1
+            if _CTRL_EMPTY in control[offset:offset + _GROUP_WIDTH]:
+                return stride + 1
+            stride += 1
+            group = (group + stride) & group_mask
+
+    def _find_many(self, keys: list, hashes: list):
+        """
+        Yields, for each key of keys and its hash in hashes, the index of the
+        slot holding it, or -1, with the group probe of _find() inlined
+        """
+        control, slot_hashes, slot_keys = self._control, self._hashes, self._keys
+        group_mask, group_shift = self._group_mask, self._group_shift
+        from_bytes = int.from_bytes
+        for key, hash in zip(keys, hashes):
+            hash = (hash * _MULTIPLIER) & _HASH_MASK
+            pattern = _LSB * (hash >> _H2_SHIFT)
+            group, stride = (hash >> group_shift) & group_mask, 0
+            found = -1
+            while found < 0:
+                offset = group * _GROUP_WIDTH
+                word = from_bytes(control[offset:offset + _GROUP_WIDTH], 'little')
+                x = word ^ pattern
+                match = (x - _LSB) & ~x & _MSB
+                while match:
+                    index = offset + _first_byte(match)
+                    if slot_hashes[index] == hash and slot_keys[index] == key:
+                        found = index
+                        break
+                    match &= match - 1
+                if word & (word << 1) & _MSB:
+                    break
+                stride += 1
+                group = (group + stride) & group_mask
+            yield found
+
+    def _find_insert_slot(self, hash: int) -> int:
+        """
+        Group probe for the first slot that is empty or deleted
+        """
+        control, group_mask = self._control, self._group_mask
+        group, stride = (hash >> self._group_shift) & group_mask, 0
+        while True:
+            offset = group * _GROUP_WIDTH
+            word = int.from_bytes(control[offset:offset + _GROUP_WIDTH], 'little')
+            if word & _MSB:
+                return offset + _first_byte(word & _MSB)
+            stride += 1
+            group = (group + stride) & group_mask
+
+    def _put(self, key: str, value: object, hash: int) -> None:
+        """
+        Performs put() given the already computed hash of key.
+        """
+        # The insert may resize, so _values is looked up afterwards
+        index = self._find_or_insert(key, hash)[0]
+        self._values[index] = value
+
+    def _find_or_insert(self, key: str, hash: int, default: object = None) -> (int, bool):
+        """
+        Returns the index of the slot holding key, inserting key with the value
+        default if it is not in the hash map, and whether it was inserted.
+        """
+        if self.occupied_load() >= self._max_load:
+            self._grow_or_compact()
+
+        hash = (hash * _MULTIPLIER) & _HASH_MASK
+        index, free = self._find(key, hash)
+        if index >= 0:
+            return index, False
+
+        if self._control[free] == _CTRL_DELETED:
+            self._tombstones -= 1
+        self._control[free] = hash >> _H2_SHIFT
+        self._hashes[free] = hash
+        self._keys[free] = key
+        self._values[free] = default
+        self._size += 1
+        return free, True
+
+    def _slot_value(self, slot: int) -> object:
+        """
+        Returns the value in the slot at index slot
+        """
+        return self._values[slot]
+
+    def _set_slot_value(self, slot: int, value: object) -> None:
+        """
+        Sets the value in the slot at index slot
+        """
+        self._values[slot] = value
+
+    def empty_buckets(self) -> int:
+        """
+        Returns the number of empty buckets in the hash table.
+        """
+        return self._control.count(_CTRL_EMPTY)
+
+    def resize_table(self, new_capacity: int) -> None:
+        """
+        Changes the capacity of the internal hash table.
+        """
+        if new_capacity < self._size:
+            return
+
+        new_capacity = self._table_capacity(new_capacity)
+        new_capacity = self._grow_for_load(new_capacity)
+
+        start = time.perf_counter()
+
+        old_control, old_hashes = self._control, self._hashes
+        old_keys, old_values = self._keys, self._values
+
+        self._capacity = new_capacity
+        self._tombstones = 0
+        self._allocate(new_capacity)
+
+        # Cached hashes let entries be placed without calling the hash function
+        for i in range(len(old_control)):
+            if old_control[i] < _CTRL_DELETED:
+                hash = old_hashes[i]
+                index = self._find_insert_slot(hash)
+                self._control[index] = hash >> _H2_SHIFT
+                self._hashes[index] = hash
+                self._keys[index] = old_keys[i]
+                self._values[index] = old_values[i]
+
+        self._last_resize_time = time.perf_counter() - start
+
+    def _get(self, key: str, hash: int) -> object:
+        """
+        Performs get() given the already computed hash of key.
+        """
+        index, _ = self._find(key, (hash * _MULTIPLIER) & _HASH_MASK)
+        if index < 0:
+            return None
+        return self._values[index]
+
+    def _contains(self, key: str, hash: int) -> bool:
+        """
+        Performs contains_key() given the already computed hash of key.
+        """
+        index, _ = self._find(key, (hash * _MULTIPLIER) & _HASH_MASK)
+        return index >= 0
+
+    def _pop(self, key: str, hash: int, default: object = None) -> object:
+        """
+        Performs pop() given the already computed hash of key.
+        """
+        index, _ = self._find(key, (hash * _MULTIPLIER) & _HASH_MASK)
+        if index < 0:
+            return default
+        value = self._values[index]
+        self._clear_slot(index)
+        self._size -= 1
+        self._shrink_if_sparse()
+        return value
+
+    def _clear_slot(self, index: int) -> None:
+        """
+        Removes the key at index. The caller updates the size.
+        """
+        # A group that still has an empty slot has never been full, so no
+        # probe has gone past it and the slot can become empty again rather
+        # than a tombstone
+        offset = index - index % _GROUP_WIDTH
+        group = self._control[offset:offset + _GROUP_WIDTH]
+        if _CTRL_EMPTY in group:
+            self._control[index] = _CTRL_EMPTY
+        else:
+            self._control[index] = _CTRL_DELETED
+            self._tombstones += 1
+        self._keys[index] = None
+        self._values[index] = None
+
+    def get_many(self, keys) -> DynamicArray:
+        """
+        Returns a dynamic array holding the value of each key in keys,
+        or None for keys that are not in the hash map.
+        """
+        keys = as_list(keys)
+        hashes = list(map(self._hash_function, keys))
+        if self._counting():
+            _get = self._get
+            return DynamicArray([_get(key, hash) for key, hash in zip(keys, hashes)])
+
+        values = self._values
+        return DynamicArray([None if index < 0 else values[index]
+                             for index in self._find_many(keys, hashes)])
+
+    def probe_lengths(self) -> DynamicArray:
+        """
+        Returns a dynamic array holding, for each key in the hash map, the number
+        of groups a successful lookup inspects before reaching it (1 for its home group).
+        """
+        output_da = DynamicArray()
+        group_mask = self._group_mask
+        for i in range(self._capacity):
+            if self._control[i] >= _CTRL_DELETED:
+                continue
+            group, stride = (self._hashes[i] >> self._group_shift) & group_mask, 0
+            while group != i // _GROUP_WIDTH:
+                stride += 1
+                group = (group + stride) & group_mask
+            output_da.append(stride + 1)
+        return output_da
+
+    def get_keys_and_values(self) -> DynamicArray:
+        """
+        Returns a dynamic array where each index contains a tuple of a key/value pair
+        stored in the hash map.
+        """
+        output_da = DynamicArray()
+        control, keys, values = self._control, self._keys, self._values
+        for i in range(self._capacity):
+            if control[i] < _CTRL_DELETED:
+                output_da.append((keys[i], values[i]))
+        return output_da
+
+    def _entries(self):
+        """
+        Yields the key, value and hash of each key, without copying the table.
+        The hash is the one given to put(), recovered from the mixed hash in the slot.
+        """
+        control, hashes, keys, values = self._control, self._hashes, self._keys, self._values
+        for i in range(self._capacity):
+            if control[i] < _CTRL_DELETED:
+                yield keys[i], values[i], (hashes[i] * _INVERSE_MULTIPLIER) & _HASH_MASK
+                # A resize moves the slots into new arrays
+                if self._control is not control:
+                    raise RuntimeError("hash map resized during iteration")
+
+    def __iter__(self):
+        """
+        Yields a HashEntry for each live slot.
+        """
+        for key, value, _ in self._entries():
+            yield HashEntry(key, value)
+
+
+# ------------------- BASIC TESTING ---------------------------------------- #
+
+
+if __name__ == "__main__":
+
+    print("\nTest Case - put test 1")
+    print("-------------------")
+    m = HashMap(53, hash_function_1)
+    for i in range(150):
+        m.put('str' + str(i), i * 100)
+        if i % 25 == 24:
+            print(m.empty_buckets(), round(m.table_load(), 2),
+                  m.get_size(), m.get_capacity())
+
+    print("\nTest Case - get test 1")
+    print("-------------------")
+    m = HashMap(151, hash_function_2)
+    for i in range(200, 300, 7):
+        m.put(str(i), i * 10)
+    print(m.get_size(), m.get_capacity())
+    for i in range(200, 300, 21):
+        print(i, m.get(str(i)), m.get(str(i)) == i * 10)
+        print(i + 1, m.get(str(i + 1)), m.get(str(i + 1)) == (i + 1) * 10)
+
+    print("\nTest Case - contains_key / remove test 1")
+    print("----------------------------")
+    m = HashMap(79, hash_function_2)
+    keys = [i for i in range(1, 1000, 7)]
+    for key in keys:
+        m.put(str(key), key * 42)
+    for key in keys[::2]:
+        m.remove(str(key))
+    result = True
+    for i, key in enumerate(keys):
+        # removed keys and NOT inserted keys must be absent
+        result &= m.contains_key(str(key)) == (i % 2 == 1)
+        result &= not m.contains_key(str(key + 1))
+    print(result, m.get_size(), m.get_capacity(), m.tombstone_count())
+
+    print("\nTest Case - resize test 1")
+    print("----------------------")
+    m = HashMap(23, hash_function_1)
+    m.put('key1', 10)
+    print(m.get_size(), m.get_capacity(),
+          m.get('key1'), m.contains_key('key1'))
+    m.resize_table(100)
+    print(m.get_size(), m.get_capacity(),
+          m.get('key1'), m.contains_key('key1'))
+
+    print("\nTest Case - high load test 1")
+    print("----------------------")
+    m = HashMap(16, hash_function_2)
+    for i in range(1000):
+        m.put(str(i), i)
+    lengths = m.probe_lengths()
+    print(m.get_size(), m.get_capacity(), round(m.table_load(), 2),
+          max(lengths))
+    m.clear()
+    print(m.get_size(), m.get_capacity(), m.get('1'))
@@ -0,0 +1,244 @@
+# Description: Binary snapshots of both HashMaps (SC & OA). A snapshot holds a header with the
+#           capacity, the size and an id naming the hash function, then one record per key:
+#           the key's cached hash followed by the pickled key and value. Records are written
+#           and read one at a time, so a snapshot can be streamed between a map and a file
+#           without either side ever holding a copy of the whole table. SnapshotMixin gives
+#           both HashMaps save(), load() and pickle support built on the same format.
+
+
+import io
+import os
+import pickle
+import re
+import struct
+from functools import partial
+
+from ds import StatsMixin, hash_function_1, hash_function_2
+from hash_functions import HASH_FUNCTIONS, finalized
+
+_MAGIC = b'HMSNAP01'
+_HEADER = struct.Struct('<8sQQH')      # magic, capacity, size, length of the function id
+_RECORD = struct.Struct('<QI')         # cached hash, length of the pickled (key, value)
+_HASH_MASK = 0xFFFFFFFFFFFFFFFF
+
+# Hash functions that can be named in a snapshot
+_FUNCTIONS = {
+    'hash_function_1': hash_function_1,
+    'hash_function_2': hash_function_2,
+    **HASH_FUNCTIONS,
+}
+
+_FINALIZED_ID = re.compile(r'finalized\((.*)\)$')
+_PARAMETER_ID = re.compile(r'(\w+)\((seed|PYTHONHASHSEED)=(\d+)\)$')
+# builtin without a fixed PYTHONHASHSEED
+_RANDOM_BUILTIN_ID = re.compile(r'\bbuiltin(?!\()')
+
+
+def function_id(function: callable) -> str:
+    """
+    Returns an id naming function, or '' if it cannot be named. Named
+    functions are those of HASH_FUNCTIONS and hash_function_1/2, optionally
+    with a seed bound by seeded() and wrapped by finalized(), and
+    function_from_id() turns the id back into an equivalent function.
+    """
+    if isinstance(function, partial):
+        if function.args or set(function.keywords) != {'seed'}:
+            return ''
+        inner = function_id(function.func)
+        return f"{inner}(seed={function.keywords['seed']})" if inner else ''
+
+    wrapped = getattr(function, '__wrapped__', None)
+    if wrapped is not None:
+        inner = function_id(wrapped)
+        return f'finalized({inner})' if inner else ''
+
+    for name, candidate in _FUNCTIONS.items():
+        if candidate is function:
+            if name == 'builtin':
+                # The builtin hash only repeats across processes with a fixed seed
+                seed = os.environ.get('PYTHONHASHSEED', 'random')
+                if seed.isdigit():
+                    return f'builtin(PYTHONHASHSEED={seed})'
+            return name
+    return ''
+
+
+def function_from_id(id: str) -> callable:
+    """
+    Returns the hash function named by an id from function_id()
+    """
+    match = _FINALIZED_ID.match(id)
+    if match:
+        return finalized(function_from_id(match.group(1)))
+
+    match = _PARAMETER_ID.match(id)
+    name = match.group(1) if match else id
+    if name not in _FUNCTIONS:
+        raise ValueError(f"unknown hash function id: {id!r}; pass the function explicitly")
+    if match and match.group(2) == 'seed':
+        return partial(_FUNCTIONS[name], seed=int(match.group(3)))
+    return _FUNCTIONS[name]
+
+
+def hashes_match(id: str, function: callable) -> bool:
+    """
+    Returns True if hashes cached under the function named id are the ones
+    function gives in this process, so they can be used without rehashing
+    """
+    return (id != '' and id == function_id(function)
+            and _RANDOM_BUILTIN_ID.search(id) is None)
+
+
+def write_snapshot(file, capacity: int, size: int, function: callable, entries) -> None:
+    """
+    Writes a snapshot to the binary file object file: the header, then one
+    record for each (key, value, hash) of entries, which must yield size of
+    them. entries is consumed one record at a time.
+    """
+    name = function_id(function).encode('utf-8')
+    file.write(_HEADER.pack(_MAGIC, capacity, size, len(name)))
+    file.write(name)
+
+    write, pack, dumps = file.write, _RECORD.pack, pickle.dumps
+    for key, value, hash in entries:
+        record = dumps((key, value), pickle.HIGHEST_PROTOCOL)
+        write(pack(hash & _HASH_MASK, len(record)))
+        write(record)
+
+
+def read_snapshot(file) -> (int, int, str, object):
+    """
+    Reads the header of the snapshot in the binary file object file.
+    Returns its capacity, size and function id, and a generator yielding the
+    (key, value, hash) of each record, read from file as it is consumed.
+    """
+    header = file.read(_HEADER.size)
+    if len(header) != _HEADER.size or header[:len(_MAGIC)] != _MAGIC:
+        raise ValueError("not a HashMap snapshot")
+    _, capacity, size, name_length = _HEADER.unpack(header)
+    id = file.read(name_length).decode('utf-8')
+    return capacity, size, id, _records(file, size)
+
+
+def _records(file, size: int):
+    """
+    Yields the (key, value, hash) of the next size records of file
+    """
+    read, unpack, loads = file.read, _RECORD.unpack, pickle.loads
+    for _ in range(size):
+        header = read(_RECORD.size)
+        if len(header) != _RECORD.size:
+            raise ValueError("truncated HashMap snapshot")
+        hash, length = unpack(header)
+        key, value = loads(read(length))
+        yield key, value, hash
+
+
+def iter_snapshot(path: str):
+    """
+    Yields the (key, value) tuples of the snapshot at path one at a time,
+    without building a map, for snapshots too large to load into memory.
+    """
+    with open(path, 'rb') as file:
+        records = read_snapshot(file)[3]
+        for key, value, _ in records:
+            yield key, value
+
+
+class SnapshotMixin:
+    """
+    save(), load() and pickling for the HashMaps, all through the snapshot
+    format. Each map provides _entries(), yielding the (key, value, hash) of
+    every key with the hash it was placed by. A load sizes the table for
+    every record up front, then places each record by its cached hash when
+    the map's hash function is the one the snapshot was written with, so
+    nothing is rehashed and the table is never resized along the way.
+    """
+
+    # Attributes holding the table itself, which pickled state leaves out
+    _TABLE_ATTRIBUTES = ('_buckets', '_old_buckets')
+
+    def save(self, path: str) -> None:
+        """
+        Writes the hash map to a snapshot file at path.
+        """
+        with open(path, 'wb') as file:
+            self._write_snapshot(file)
+
+    def _write_snapshot(self, file) -> None:
+        """
+        Writes the hash map as a snapshot to the binary file object file
+        """
+        write_snapshot(file, self._capacity, self._size, self._hash_function, self._entries())
+
+    @classmethod
+    def load(cls, path: str, /, function: callable = None, **kwargs):
+        """
+        Returns a new hash map holding the snapshot at path, created with the
+        snapshot's capacity and any other constructor arguments in kwargs.
+        function defaults to the one named in the snapshot; it must be given
+        if the snapshot was saved with a function that has no id. Records are
+        streamed from the file, so a snapshot larger than memory can be
+        loaded into a map that keeps its data on disk: path is positional, so
+        hash_map_mmap.HashMap.load(path, path=index_path) works.
+        """
+        with open(path, 'rb') as file:
+            capacity, size, id, records = read_snapshot(file)
+            if function is None:
+                # The map applies finalized() itself when it needs it
+                match = _FINALIZED_ID.match(id)
+                function = function_from_id(match.group(1) if match else id)
+            hash_map = cls(capacity=capacity, function=function, **kwargs)
+            hash_map._restore(size, id, records)
+        return hash_map
+
+    def _restore(self, size: int, id: str, records) -> None:
+        """
+        Adds the (key, value, hash) records of a snapshot saved with the hash
+        function named id, resizing at most once beforehand
+        """
+        # The last record goes in with size - 1 keys in the table, and a
+        # put() only grows the table when it is already at max_load
+        self._reserve(size - 1)
+        put = self._put
+        if hashes_match(id, self._hash_function):
+            for key, value, hash in records:
+                put(key, value, hash)
+        else:
+            function = self._hash_function
+            for key, value, _ in records:
+                put(key, value, function(key))
+
+    def __getstate__(self) -> dict:
+        """
+        Returns the pickled state: the map's settings, with the table
+        replaced by a snapshot of it and the hash function by its id if it
+        has one.
+        """
+        state = {name: value for name, value in self.__dict__.items()
+                 if name not in self._TABLE_ATTRIBUTES
+                 and name not in StatsMixin._COUNTED_METHODS}
+        id = function_id(self._hash_function)
+        if id:
+            del state['_hash_function']
+            state['_hash_function_id'] = id
+
+        file = io.BytesIO()
+        self._write_snapshot(file)
+        state['_snapshot'] = file.getvalue()
+        return state
+
+    def __setstate__(self, state: dict) -> None:
+        """
+        Restores a pickled hash map, placing the records of its snapshot in
+        one pass over a table of the pickled capacity.
+        """
+        state = dict(state)
+        file = io.BytesIO(state.pop('_snapshot'))
+        if '_hash_function_id' in state:
+            state['_hash_function'] = function_from_id(state.pop('_hash_function_id'))
+        self.__dict__.update(state)
+        self.clear()
+
+        _, size, id, records = read_snapshot(file)
+        self._restore(size, id, records)